@@ -0,0 +1,137 @@
+"""
+SSE throughput and per-chunk latency through the raw ASGI AuthMiddleware vs the previous
+BaseHTTPMiddleware implementation.
+
+The app is driven in-process through its ASGI interface, so the numbers isolate middleware overhead from
+networking. Token lookups are served from the in-process token cache.
+
+Usage:
+    uv run python benchmarks/auth_middleware_sse.py --streams 200 --chunks 500
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fastapi import FastAPI, Request, status  # noqa: E402
+from fastapi.responses import JSONResponse, StreamingResponse  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from app.core.auth import AuthHandler  # noqa: E402
+from app.core.cache import TokenCache  # noqa: E402
+from app.core.exceptions import AuthenticationError  # noqa: E402
+from app.middleware.auth import AuthMiddleware  # noqa: E402
+
+TOKEN = "benchmark-token"
+
+
+class LegacyAuthMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation AuthMiddleware replaced."""
+
+    def __init__(self, app, public_paths):
+        super().__init__(app)
+        self.public_paths = set(public_paths)
+        self.auth_handler = AuthHandler(TokenCache())
+
+    async def dispatch(self, request: Request, call_next):
+        try:
+            if request.method == "OPTIONS" or request.url.path in self.public_paths:
+                return await call_next(request)
+
+            request.state.user_id = await self.auth_handler.authenticate(request.headers.get("Authorization"))
+            return await call_next(request)
+        except AuthenticationError as e:
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"detail": str(e)},
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+
+def build_app(middleware, chunks: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(middleware, public_paths=[])
+
+    @app.get("/stream")
+    async def stream():
+        async def generate():
+            for i in range(chunks):
+                yield f'data: {{"content": "token {i}"}}\n\n'
+                await asyncio.sleep(0)
+
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    return app
+
+
+async def run_stream(app: FastAPI, gaps: list[float]) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/stream",
+        "raw_path": b"/stream",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"authorization", f"Bearer {TOKEN}".encode())],
+        "client": ("127.0.0.1", 1234),
+        "server": ("127.0.0.1", 8000),
+    }
+    received = 0
+    last = time.perf_counter()
+
+    async def receive():
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal received, last
+        if message["type"] == "http.response.body" and message.get("body"):
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+            received += 1
+
+    await app(scope, receive, send)
+    return received
+
+
+async def measure(name: str, middleware, streams: int, chunks: int) -> None:
+    app = build_app(middleware, chunks)
+    gaps: list[float] = []
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    frames = sum(await asyncio.gather(*(run_stream(app, gaps) for _ in range(streams))))
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    us = sorted(g * 1e6 for g in gaps)
+    p99 = us[min(len(us) - 1, int(len(us) * 0.99))]
+    print(
+        f"{name:<18} frames/s={frames / elapsed:10.0f}  cpu/stream={cpu / streams * 1000:7.2f}ms  "
+        f"chunk gap p50={statistics.median(us):7.1f}us  p99={p99:8.1f}us"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=500)
+    args = parser.parse_args()
+
+    # Serve the token from the in-process tier so no Redis is needed
+    TokenCache._local.set(TOKEN, {"user_id": 1}, ttl=3600)
+
+    await measure("BaseHTTPMiddleware", LegacyAuthMiddleware, args.streams, args.chunks)
+    await measure("ASGI middleware", AuthMiddleware, args.streams, args.chunks)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
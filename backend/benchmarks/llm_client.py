@@ -0,0 +1,107 @@
+"""
+CPU time per streamed token: LangChain ChatOpenAI.astream vs the native LLMClient.stream_chat.
+
+Both clients read the same canned OpenAI-compatible SSE stream from an in-process httpx transport, delivered one
+event per read as a real upstream would, so the numbers cover request building, SSE parsing and per-chunk objects
+but no network.
+
+Usage:
+    uv run python benchmarks/llm_client.py --tokens 500 --runs 20
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import orjson
+from langchain.schema import HumanMessage
+from langchain_openai import ChatOpenAI
+from pydantic import SecretStr
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from app.core.llm import LLMClient  # noqa: E402
+
+BASE_URL = "http://upstream/v1"
+
+
+def events(tokens: int) -> list[bytes]:
+    chunk = {"id": "1", "object": "chat.completion.chunk", "created": 1, "model": "m"}
+    frames = [
+        b"data: "
+        + orjson.dumps({**chunk, "choices": [{"index": 0, "delta": {"content": f" tok{i}"}, "finish_reason": None}]})
+        + b"\n\n"
+        for i in range(tokens)
+    ]
+    usage = {"prompt_tokens": 10, "completion_tokens": tokens, "total_tokens": tokens + 10}
+    frames.append(b"data: " + orjson.dumps({**chunk, "choices": [], "usage": usage}) + b"\n\n")
+    frames.append(b"data: [DONE]\n\n")
+    return frames
+
+
+def client(frames: list[bytes]) -> httpx.AsyncClient:
+    async def stream():
+        for frame in frames:
+            yield frame
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=stream(), headers={"content-type": "text/event-stream"})
+
+    return httpx.AsyncClient(base_url=BASE_URL, transport=httpx.MockTransport(handler))
+
+
+async def langchain(frames: list[bytes], prompt: str) -> int:
+    llm = ChatOpenAI(model="m", base_url=BASE_URL, api_key=SecretStr("x"), streaming=True, http_async_client=client(frames))
+    count = 0
+    async for chunk in llm.astream(
+        [HumanMessage(content=prompt)], stream_usage=True, max_tokens=len(frames), temperature=0.7, top_p=0.9
+    ):
+        if chunk.content:
+            count += 1
+    return count
+
+
+async def native(frames: list[bytes], prompt: str) -> int:
+    LLMClient._instance = client(frames)
+    count = 0
+    usage: dict = {}
+    async for _ in LLMClient.stream_chat(
+        "m",
+        [{"role": "user", "content": prompt}],
+        usage,
+        max_tokens=len(frames),
+        temperature=0.7,
+        top_p=0.9,
+        top_k=50,
+        repetition_penalty=1.0,
+    ):
+        count += 1
+    return count
+
+
+async def measure(name: str, run, tokens: int, runs: int) -> None:
+    frames = events(tokens)
+    prompt = "Tell me a story."
+    await run(frames, prompt)  # warm up imports and caches
+    cpu = time.process_time()
+    for _ in range(runs):
+        assert await run(frames, prompt) == tokens
+    per_token = (time.process_time() - cpu) / (runs * tokens)
+    print(f"{name:<10} {per_token * 1e6:8.1f} µs CPU/token")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    await measure("langchain", langchain, args.tokens, args.runs)
+    await measure("native", native, args.tokens, args.runs)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
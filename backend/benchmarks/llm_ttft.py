@@ -0,0 +1,76 @@
+"""
+Time-to-first-token against the Typhoon API with a fresh client per request vs the shared pooled client.
+
+Usage:
+    uv run python benchmarks/llm_ttft.py --requests 20 --model typhoon-v1.5-instruct
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from app.config import settings  # noqa: E402
+from app.core.llm import LLMClient  # noqa: E402
+
+
+async def first_token(client: httpx.AsyncClient, model: str) -> float:
+    """Seconds from sending the request until the first streamed data line arrives."""
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": "Say hello."}],
+        "max_tokens": 8,
+        "stream": True,
+    }
+    start = time.perf_counter()
+    async with client.stream("POST", "/chat/completions", json=payload) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith("data:"):
+                return time.perf_counter() - start
+    return time.perf_counter() - start
+
+
+async def cold(requests: int, model: str) -> list[float]:
+    timings = []
+    for _ in range(requests):
+        async with httpx.AsyncClient(
+            base_url=settings.TYPHOON_API_URL, headers={"Authorization": f"Bearer {settings.TYPHOON_API_KEY}"}
+        ) as client:
+            timings.append(await first_token(client, model))
+    return timings
+
+
+async def pooled(requests: int, model: str) -> list[float]:
+    client = await LLMClient.get_instance()
+    # Open the connection once so every measured request reuses it
+    await first_token(client, model)
+    timings = [await first_token(client, model) for _ in range(requests)]
+    await LLMClient.close()
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    ms = sorted(t * 1000 for t in timings)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(f"{name:<8} n={len(ms):<4} mean={statistics.mean(ms):8.1f}ms  p50={statistics.median(ms):8.1f}ms  p95={p95:8.1f}ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--model", default="typhoon-v1.5-instruct")
+    args = parser.parse_args()
+
+    report("cold", await cold(args.requests, args.model))
+    report("pooled", await pooled(args.requests, args.model))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+"""
+Response serialization for GET /chat/sessions and transcripts (the ?latest=N path of GET /chat/sessions/{id};
+the full transcript is built in Postgres, see transcript.py): model_validate per row followed by
+FastAPI's response_model validation and JSONResponse, vs CamelModel.response, which validates and serializes once.
+
+Rows are transient ORM objects, so this measures serialization only; no database is needed.
+
+Usage:
+    uv run python benchmarks/responses.py --sessions 50 200 --messages 100 1000 --runs 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from app.api.chat.schema import ChatMessageResponse, ChatSessionMessagesResponse, ChatSessionResponse  # noqa: E402
+from app.db import orm  # noqa: E402
+
+SESSIONS_FIELD = create_model_field("Response_get_chat_sessions", list[ChatSessionResponse], mode="serialization")
+TRANSCRIPT_FIELD = create_model_field("Response_get_chat_session", ChatSessionMessagesResponse, mode="serialization")
+
+
+def sessions(count: int) -> list[orm.ChatSession]:
+    now = datetime.now()
+    return [
+        orm.ChatSession(
+            id=i,
+            user_id=1,
+            title=f"Chat {i}",
+            created_at=now,
+            updated_at=now,
+            message_count=12,
+            last_message_preview="สวัสดีครับ " * 10,
+            last_message_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def messages(count: int) -> list[orm.ChatMessage]:
+    now = datetime.now()
+    rows = []
+    for i in range(count):
+        message = orm.ChatMessage(
+            id=i,
+            session_id=1,
+            sender="user" if i % 2 == 0 else "assistant",
+            content=f"message {i} " + "สวัสดีครับ " * 20,
+            tokens=120,
+            tokens_per_second=45,
+            response_time_ms=2650.5,
+            model="typhoon-v1.5-instruct",
+            cached=False,
+            status=orm.MessageStatusEnum.COMPLETED,
+            created_at=now,
+        )
+        if i % 20 == 1:
+            message.feedback = orm.Feedback(id=i, message_id=i, feedback_type=orm.FeedbackTypeEnum.UPVOTE, created_at=now)
+        rows.append(message)
+    return rows
+
+
+async def list_before(rows: list[orm.ChatSession]) -> bytes:
+    content = [ChatSessionResponse.model_validate(session) for session in rows]
+    return JSONResponse(await serialize_response(field=SESSIONS_FIELD, response_content=content)).body
+
+
+async def list_after(rows: list[orm.ChatSession]) -> bytes:
+    return ChatSessionResponse.response(rows).body
+
+
+async def transcript_before(rows: list[orm.ChatMessage]) -> bytes:
+    session = sessions(1)[0]
+    content = ChatSessionMessagesResponse(
+        **ChatSessionResponse.model_validate(session).model_dump(),
+        messages=[ChatMessageResponse.model_validate(m) for m in rows],
+        has_more_messages=False,
+    )
+    return JSONResponse(await serialize_response(field=TRANSCRIPT_FIELD, response_content=content)).body
+
+
+async def transcript_after(rows: list[orm.ChatMessage]) -> bytes:
+    session = sessions(1)[0]
+    return ChatSessionMessagesResponse.response(
+        {
+            **{field: getattr(session, field) for field in ChatSessionResponse.model_fields},
+            "messages": rows,
+            "has_more_messages": False,
+        }
+    ).body
+
+
+async def measure(name: str, before, after, rows: list, runs: int) -> None:
+    results = []
+    for run in (before, after):
+        await run(rows)
+        samples = []
+        for _ in range(runs):
+            start = time.process_time()
+            await run(rows)
+            samples.append(time.process_time() - start)
+        results.append(statistics.median(samples) * 1000)
+    print(f"{name:<28} {results[0]:9.2f} ms {results[1]:9.2f} ms {results[0] / results[1]:7.1f}x")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--messages", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'CPU per response':<28} {'before':>12} {'after':>12} {'speedup':>8}")
+    for count in args.sessions:
+        await measure(f"GET /chat/sessions ({count})", list_before, list_after, sessions(count), args.runs)
+    for count in args.messages:
+        await measure(f"transcript ({count} messages)", transcript_before, transcript_after, messages(count), args.runs)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""
+Frames/s, bytes and CPU per stream for the chat SSE encoder: one json.dumps frame per upstream chunk (the
+previous behaviour) vs coalesced orjson frames.
+
+The upstream is simulated as an async generator emitting small tokens with a fixed gap. Every frame is written
+and drained through a local socket pair, as the server would for a real client, so the numbers include the
+per-frame write syscall but no network latency.
+
+Usage:
+    uv run python benchmarks/sse_coalescing.py --streams 200 --tokens 500 --gap-ms 1
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from app.api.chat.sse import coalesce, encode_event  # noqa: E402
+
+
+async def upstream(tokens: int, gap: float):
+    for i in range(tokens):
+        if gap:
+            await asyncio.sleep(gap)
+        yield f"token{i % 10} "
+
+
+async def per_chunk(tokens: int, gap: float, args):
+    full_content = []
+    async for chunk in upstream(tokens, gap):
+        full_content.append(chunk)
+        yield f"data: {json.dumps({'content': chunk})}\n\n".encode()
+
+
+async def coalesced(tokens: int, gap: float, args):
+    async for text in coalesce(upstream(tokens, gap), args.max_bytes, args.max_delay_ms / 1000):
+        yield encode_event({"content": text})
+
+
+async def run_stream(fn, gap: float, args) -> tuple[int, int]:
+    server_sock, client_sock = socket.socketpair()
+    client, client_writer = await asyncio.open_connection(sock=client_sock)
+    _, server = await asyncio.open_connection(sock=server_sock)
+
+    async def drain_client() -> int:
+        received = 0
+        while data := await client.read(65536):
+            received += len(data)
+        return received
+
+    reader = asyncio.create_task(drain_client())
+    frames = 0
+    async for frame in fn(args.tokens, gap, args):
+        server.write(frame)
+        await server.drain()
+        frames += 1
+    server.close()
+    await server.wait_closed()
+    received = await reader
+    client_writer.close()
+    return frames, received
+
+
+async def measure(name: str, fn, args) -> None:
+    gap = args.gap_ms / 1000
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    results = await asyncio.gather(*(run_stream(fn, gap, args) for _ in range(args.streams)))
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    frames = sum(f for f, _ in results)
+    size = sum(s for _, s in results)
+    print(
+        f"{name:<10} frames={frames:8d}  frames/s={frames / elapsed:10.0f}  bytes/stream={size / args.streams:9.0f}  "
+        f"cpu/stream={cpu / args.streams * 1000:7.2f}ms  wall={elapsed:6.2f}s"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--tokens", type=int, default=500)
+    parser.add_argument("--gap-ms", type=float, default=1.0)
+    parser.add_argument("--max-bytes", type=int, default=512)
+    parser.add_argument("--max-delay-ms", type=float, default=30)
+    args = parser.parse_args()
+
+    await measure("per-chunk", per_chunk, args)
+    await measure("coalesced", coalesced, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
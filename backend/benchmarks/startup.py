@@ -0,0 +1,131 @@
+"""
+Worker cold start: import time of app.main broken down by module, and time to first response.
+
+Each run is a fresh interpreter. Import time comes from `python -X importtime`. Time to first response is measured
+from process launch until `GET /` has been served in-process through the full middleware stack. The lifespan does
+not run, so no database, Redis or upstream is needed.
+
+Exits with status 1 when the median of either number is over its budget. Budgets are read from
+[tool.startup-budget] in pyproject.toml, and the CLI flags override them.
+
+Usage:
+    uv run python benchmarks/startup.py --runs 5 --top 15
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tomllib
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Settings are required at import; placeholders are enough since nothing connects
+ENV = {
+    "SECRET_KEY": "benchmark",
+    "DB_USERNAME": "postgres",
+    "DB_PASSWORD": "postgres",
+    "DB_HOST": "localhost",
+    "DB_DATABASE": "benchmark",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "TYPHOON_API_URL": "http://localhost/v1",
+    "TYPHOON_API_KEY": "benchmark",
+}
+
+FIRST_RESPONSE = """
+import asyncio, httpx
+from app.main import app
+
+async def main():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app") as client:
+        assert (await client.get("/")).status_code == 200
+
+asyncio.run(main())
+print("served", flush=True)
+"""
+
+
+def python(*args: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, **ENV, "PYTHONPATH": str(ROOT / "src"), "PYTHONDONTWRITEBYTECODE": ""}
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+def import_times() -> tuple[float, dict[str, int], dict[str, int]]:
+    """Seconds to import app.main, plus cumulative and self microseconds for each module"""
+    lines = python("-X", "importtime", "-c", "import app.main").stderr.splitlines()
+    cumulative, own = {}, {}
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        cumulative[name.strip()] = int(cumulative_us)
+        own[name.strip()] = int(self_us)
+    return cumulative["app.main"] / 1e6, cumulative, own
+
+
+def first_response() -> float:
+    start = time.perf_counter()
+    python("-c", FIRST_RESPONSE)
+    return time.perf_counter() - start
+
+
+def budgets() -> dict:
+    pyproject = tomllib.loads((ROOT / "pyproject.toml").read_text())
+    return pyproject.get("tool", {}).get("startup-budget", {})
+
+
+def main() -> int:
+    configured = budgets()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="packages to list by import time")
+    parser.add_argument("--import-budget-ms", type=float, default=configured.get("import-ms"))
+    parser.add_argument("--first-response-budget-ms", type=float, default=configured.get("first-response-ms"))
+    args = parser.parse_args()
+
+    python("-c", "import app.main")  # populate the bytecode cache so every run measures the same thing
+
+    totals, responses = [], []
+    packages: dict[str, list[int]] = defaultdict(list)
+    modules: dict[str, list[int]] = defaultdict(list)
+    for _ in range(args.runs):
+        total, cumulative, own = import_times()
+        totals.append(total)
+        # Attribute each module's own time to its top-level package, and keep app modules separately
+        per_package: dict[str, int] = defaultdict(int)
+        for name, us in own.items():
+            per_package[name.split(".")[0]] += us
+        for name, us in per_package.items():
+            packages[name].append(us)
+        for name, us in cumulative.items():
+            if name.startswith("app."):
+                modules[name].append(us)
+        responses.append(first_response())
+
+    print(f"{'package':<40} {'self ms':>9}")
+    for name, samples in sorted(packages.items(), key=lambda item: -statistics.median(item[1]))[: args.top]:
+        print(f"{name:<40} {statistics.median(samples) / 1000:9.1f}")
+    print(f"\n{'app module':<40} {'cumulative ms':>14}")
+    for name, samples in sorted(modules.items(), key=lambda item: -statistics.median(item[1]))[: args.top]:
+        print(f"{name:<40} {statistics.median(samples) / 1000:14.1f}")
+
+    results = [
+        ("import app.main", statistics.median(totals) * 1000, args.import_budget_ms),
+        ("time to first response", statistics.median(responses) * 1000, args.first_response_budget_ms),
+    ]
+    print()
+    over = False
+    for name, ms, budget in results:
+        verdict = "" if budget is None else f" (budget {budget:.0f} ms{', OVER' if ms > budget else ''})"
+        over = over or (budget is not None and ms > budget)
+        print(f"{name:<24} {ms:8.0f} ms{verdict}")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+GET /chat/sessions/{id} body: ORM + Pydantic serialization vs JSON aggregated in Postgres.
+
+The ORM path is what the endpoint used to do: joinedload the session with its messages and feedback, model_validate
+the response, then let FastAPI validate and serialize it against response_model. The SQL path is
+ChatRepo.get_session_json, whose bytes are sent as is.
+
+Creates a throwaway user with one session per size in the database configured in .env, and deletes it afterwards.
+
+Usage:
+    uv run python benchmarks/transcript.py --sizes 100 1000 10000 --runs 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy import delete, insert
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from app.api.chat.repo import ChatRepo  # noqa: E402
+from app.api.chat.schema import ChatSessionMessagesResponse  # noqa: E402
+from app.db import orm  # noqa: E402
+from app.db.session import async_engine, async_session_maker  # noqa: E402
+
+RESPONSE_FIELD = create_model_field("Response_get_chat_session", ChatSessionMessagesResponse, mode="serialization")
+
+
+async def seed(sizes: list[int]) -> tuple[int, dict[int, int]]:
+    """A user with one session of each size; every tenth assistant message has feedback"""
+    async with async_session_maker() as session:
+        user = orm.UserAccount(email=f"bench-{uuid.uuid4().hex}@example.com", hashed_password="x", password_salt="x")
+        session.add(user)
+        await session.flush()
+        sessions = {}
+        for size in sizes:
+            chat = orm.ChatSession(user_id=user.id, title=f"{size} messages")
+            session.add(chat)
+            await session.flush()
+            sessions[size] = chat.id
+            rows = [
+                {
+                    "session_id": chat.id,
+                    "sender": "user" if i % 2 == 0 else "assistant",
+                    "content": f"message {i} " + "สวัสดีครับ " * 20,
+                    "tokens": 0 if i % 2 == 0 else 120,
+                    "tokens_per_second": 0 if i % 2 == 0 else 45,
+                    "response_time_ms": None if i % 2 == 0 else 2650.5,
+                    "model": None if i % 2 == 0 else "typhoon-v1.5-instruct",
+                }
+                for i in range(size)
+            ]
+            ids = (await session.scalars(insert(orm.ChatMessage).returning(orm.ChatMessage.id), rows)).all()
+            feedback = [{"message_id": id, "feedback_type": orm.FeedbackTypeEnum.UPVOTE} for id in ids[1::20]]
+            if feedback:
+                await session.execute(insert(orm.Feedback), feedback)
+        await session.commit()
+        return user.id, sessions
+
+
+async def orm_path(session_id: int, user_id: int) -> bytes:
+    async with async_session_maker() as session:
+        chat = await ChatRepo(session).get_session(session_id, user_id)
+        content = ChatSessionMessagesResponse.model_validate(chat)
+        return JSONResponse(await serialize_response(field=RESPONSE_FIELD, response_content=content)).body
+
+
+async def sql_path(session_id: int, user_id: int) -> bytes:
+    async with async_session_maker() as session:
+        return await ChatRepo(session).get_session_json(session_id, user_id)
+
+
+async def measure(name: str, run, session_id: int, user_id: int, runs: int) -> None:
+    body = await run(session_id, user_id)  # warm up the pool and statement cache
+    wall, cpu = [], []
+    for _ in range(runs):
+        start, start_cpu = time.perf_counter(), time.process_time()
+        await run(session_id, user_id)
+        wall.append(time.perf_counter() - start)
+        cpu.append(time.process_time() - start_cpu)
+    print(
+        f"  {name:<4} {statistics.median(wall) * 1000:9.1f} ms wall {statistics.median(cpu) * 1000:9.1f} ms CPU"
+        f" {len(body) / 1024:9.0f} KiB"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    user_id, sessions = await seed(args.sizes)
+    try:
+        for size, session_id in sessions.items():
+            print(f"{size} messages")
+            await measure("orm", orm_path, session_id, user_id, args.runs)
+            await measure("sql", sql_path, session_id, user_id, args.runs)
+    finally:
+        async with async_session_maker() as session:
+            await session.execute(delete(orm.UserAccount).where(orm.UserAccount.id == user_id))
+            await session.commit()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,195 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import Depends
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import app.db.orm as orm
+from app.core.sketch import QuantileSketch
+from app.db.session import get_async_session
+
+GRANULARITIES = ("hour", "day")
+
+_rollups = orm.ModelUsageRollup.__table__
+_insert = insert(_rollups)
+# Adds one bucket's deltas to its rollup row, creating it on first use
+MODEL_ROLLUP_UPSERT = _insert.on_conflict_do_update(
+    index_elements=[_rollups.c.model, _rollups.c.granularity, _rollups.c.bucket_start],
+    set_={
+        "message_count": _rollups.c.message_count + _insert.excluded.message_count,
+        "prompt_tokens": _rollups.c.prompt_tokens + _insert.excluded.prompt_tokens,
+        "completion_tokens": _rollups.c.completion_tokens + _insert.excluded.completion_tokens,
+        "tokens": _rollups.c.tokens + _insert.excluded.tokens,
+        "total_tokens_per_second": _rollups.c.total_tokens_per_second + _insert.excluded.total_tokens_per_second,
+        "total_response_time_ms": _rollups.c.total_response_time_ms + _insert.excluded.total_response_time_ms,
+        "ttft_ms_sketch": func.sketch_merge(_rollups.c.ttft_ms_sketch, _insert.excluded.ttft_ms_sketch),
+        "response_time_ms_sketch": func.sketch_merge(
+            _rollups.c.response_time_ms_sketch, _insert.excluded.response_time_ms_sketch
+        ),
+        "upvotes": _rollups.c.upvotes + _insert.excluded.upvotes,
+        "downvotes": _rollups.c.downvotes + _insert.excluded.downvotes,
+    },
+)
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Truncate `moment` to the start of its hour or day, like Postgres date_trunc"""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if granularity == "day" else moment
+
+
+def empty_rollup(model: str, granularity: str, start: datetime) -> dict[str, Any]:
+    return {
+        "model": model,
+        "granularity": granularity,
+        "bucket_start": start,
+        "message_count": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "tokens": 0,
+        "total_tokens_per_second": 0,
+        "total_response_time_ms": 0.0,
+        "ttft_ms_sketch": {},
+        "response_time_ms_sketch": {},
+        "upvotes": 0,
+        "downvotes": 0,
+    }
+
+
+def is_generation(row: dict[str, Any]) -> bool:
+    return row["sender"] == "assistant" and bool(row.get("model")) and not row.get("cached")
+
+
+def generation_rollups(rows: list[dict[str, Any]], now: datetime) -> list[dict[str, Any]]:
+    """
+    Fold assistant message rows written at `now` into one MODEL_ROLLUP_UPSERT parameter set per model and bucket.
+    Responses replayed from the cache are left out, since the model did no work for them.
+    """
+    by_model: dict[str, list[dict[str, Any]]] = {}
+    for row in rows:
+        if is_generation(row):
+            by_model.setdefault(row["model"], []).append(row)
+
+    rollups = []
+    for model, messages in by_model.items():
+        delta = empty_rollup(model, "", now)
+        delta["message_count"] = len(messages)
+        for key in ("prompt_tokens", "completion_tokens", "tokens"):
+            delta[key] = sum(message.get(key) or 0 for message in messages)
+        delta["total_tokens_per_second"] = sum(message.get("tokens_per_second") or 0 for message in messages)
+        delta["total_response_time_ms"] = sum(message.get("response_time_ms") or 0 for message in messages)
+        delta["ttft_ms_sketch"] = QuantileSketch.of(
+            message["ttft_ms"] for message in messages if message.get("ttft_ms") is not None
+        ).to_json()
+        delta["response_time_ms_sketch"] = QuantileSketch.of(
+            message["response_time_ms"] for message in messages if message.get("response_time_ms") is not None
+        ).to_json()
+        for granularity in GRANULARITIES:
+            rollups.append({**delta, "granularity": granularity, "bucket_start": bucket_start(now, granularity)})
+    return rollups
+
+
+def round_or_none(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 2)
+
+
+def summarize(model: str, start: Optional[datetime], rollups: list[orm.ModelUsageRollup]) -> dict:
+    """Merge rollup rows into the response fields of ModelUsage"""
+    ttft = QuantileSketch()
+    response_time = QuantileSketch()
+    totals = empty_rollup(model, "", start)
+    for rollup in rollups:
+        for key in (
+            "message_count",
+            "prompt_tokens",
+            "completion_tokens",
+            "tokens",
+            "total_tokens_per_second",
+            "total_response_time_ms",
+            "upvotes",
+            "downvotes",
+        ):
+            totals[key] += getattr(rollup, key)
+        ttft.merge(QuantileSketch.from_json(rollup.ttft_ms_sketch))
+        response_time.merge(QuantileSketch.from_json(rollup.response_time_ms_sketch))
+
+    messages = totals["message_count"]
+    votes = totals["upvotes"] + totals["downvotes"]
+    return {
+        "model": model,
+        "bucket_start": start,
+        "message_count": messages,
+        "prompt_tokens": totals["prompt_tokens"],
+        "completion_tokens": totals["completion_tokens"],
+        "tokens": totals["tokens"],
+        "avg_tokens_per_second": round(totals["total_tokens_per_second"] / messages, 2) if messages else 0.0,
+        "avg_response_time_ms": round(totals["total_response_time_ms"] / messages, 2) if messages else 0.0,
+        **{f"p{int(q * 100)}_ttft_ms": round_or_none(ttft.quantile(q)) for q in (0.5, 0.95, 0.99)},
+        **{f"p{int(q * 100)}_response_time_ms": round_or_none(response_time.quantile(q)) for q in (0.5, 0.95, 0.99)},
+        "upvotes": totals["upvotes"],
+        "downvotes": totals["downvotes"],
+        "upvote_ratio": round(totals["upvotes"] / votes, 4) if votes else None,
+    }
+
+
+class AnalyticsRepo:
+    def __init__(self, session: AsyncSession = Depends(get_async_session)) -> None:
+        self.session = session
+
+    async def record_generations(self, rows: list[dict[str, Any]]) -> None:
+        """Add newly inserted message rows to the model rollups. Does not commit."""
+        if not any(is_generation(row) for row in rows):
+            return
+        # Same clock as the messages' created_at server default
+        now = (await self.session.execute(select(func.localtimestamp()))).scalar_one()
+        await self.session.execute(MODEL_ROLLUP_UPSERT, generation_rollups(rows, now))
+
+    async def record_feedback(
+        self,
+        message: orm.ChatMessage,
+        feedback_type: orm.FeedbackTypeEnum,
+        previous: Optional[orm.FeedbackTypeEnum] = None,
+    ) -> None:
+        """Count a vote (replacing `previous`, if any) in the rollups of the message's model. Does not commit."""
+        if not message.model or feedback_type == previous:
+            return
+        rollups = []
+        for granularity in GRANULARITIES:
+            delta = empty_rollup(message.model, granularity, bucket_start(message.created_at, granularity))
+            for vote, change in ((feedback_type, 1), (previous, -1)):
+                if vote is not None:
+                    delta["upvotes" if vote == orm.FeedbackTypeEnum.UPVOTE else "downvotes"] += change
+            rollups.append(delta)
+        await self.session.execute(MODEL_ROLLUP_UPSERT, rollups)
+
+    async def get_model_usage(
+        self,
+        granularity: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        model: Optional[str] = None,
+        merge: bool = False,
+    ) -> list[dict]:
+        """
+        Usage per model and bucket in [start, end), oldest first, read only from the rollups.
+        With `merge`, the range is folded into one entry per model.
+        """
+        query = select(orm.ModelUsageRollup).where(orm.ModelUsageRollup.granularity == granularity)
+        if start is not None:
+            query = query.where(orm.ModelUsageRollup.bucket_start >= start)
+        if end is not None:
+            query = query.where(orm.ModelUsageRollup.bucket_start < end)
+        if model is not None:
+            query = query.where(orm.ModelUsageRollup.model == model)
+        result = await self.session.execute(query.order_by(orm.ModelUsageRollup.bucket_start, orm.ModelUsageRollup.model))
+        rollups = result.scalars().all()
+
+        if merge:
+            by_model: dict[str, list[orm.ModelUsageRollup]] = {}
+            for rollup in rollups:
+                by_model.setdefault(rollup.model, []).append(rollup)
+            return [summarize(name, None, rows) for name, rows in sorted(by_model.items())]
+
+        return [summarize(rollup.model, rollup.bucket_start, [rollup]) for rollup in rollups]
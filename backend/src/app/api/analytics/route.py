@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, Response
+
+from app.api.analytics.repo import AnalyticsRepo
+from app.api.analytics.schema import Granularity, ModelUsage
+from app.api.dependencies import get_current_superuser
+from app.core.principal import Principal
+
+router = APIRouter(prefix="/admin/analytics", tags=["analytics"])
+
+
+@router.get("/models", response_model=List[ModelUsage])
+async def get_model_usage(
+    granularity: Granularity = "hour",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    model: Optional[str] = None,
+    merge: bool = Query(False, description="Fold the range into one entry per model"),
+    current_user: Principal = Depends(get_current_superuser),
+    analytics_repo: AnalyticsRepo = Depends(),
+) -> Response:
+    """Per-model generation analytics from the hourly/daily rollups"""
+    usage = await analytics_repo.get_model_usage(granularity, start, end, model, merge)
+    return ModelUsage.response(usage)
@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Literal, Optional
+from app.core.base_schema import CamelModel
+
+Granularity = Literal["hour", "day"]
+
+
+# Response schemas
+class ModelUsage(CamelModel):
+    model: str
+    bucket_start: Optional[datetime] = None  # None when the requested range is merged
+    message_count: int  # Assistant messages generated
+    prompt_tokens: int  # Upstream-reported usage
+    completion_tokens: int
+    tokens: int
+    avg_tokens_per_second: float
+    avg_response_time_ms: float
+    p50_ttft_ms: Optional[float] = None  # Percentiles from mergeable sketches, within 1% relative error
+    p95_ttft_ms: Optional[float] = None
+    p99_ttft_ms: Optional[float] = None
+    p50_response_time_ms: Optional[float] = None
+    p95_response_time_ms: Optional[float] = None
+    p99_response_time_ms: Optional[float] = None
+    upvotes: int
+    downvotes: int
+    upvote_ratio: Optional[float] = None  # Upvotes / all votes; None without votes
@@ -1,5 +1,5 @@
 # app/api/auth/route.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 
 from app.api.auth.schema import Token, UserLoginReq
 from app.api.auth.service import AuthService
@@ -9,10 +9,10 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/create-account", response_model=UserCreateRes)
-async def register(user_create: UserCreate, auth_service: AuthService = Depends()) -> UserCreateRes:
-    return await auth_service.register(user_create)
+async def register(user_create: UserCreate, auth_service: AuthService = Depends()) -> Response:
+    return UserCreateRes.response(await auth_service.register(user_create))
 
 
 @router.post("/login", response_model=Token)
-async def login(login_req: UserLoginReq, auth_service: AuthService = Depends()) -> Token:
-    return await auth_service.login(login_req)
+async def login(login_req: UserLoginReq, auth_service: AuthService = Depends()) -> Response:
+    return Token.response(await auth_service.login(login_req))
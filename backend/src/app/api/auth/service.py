@@ -5,7 +5,7 @@ from fastapi import Depends, HTTPException
 from app.api.auth.schema import Token, UserLoginReq, UserLoginRes
 from app.api.users.repo import UserRepo
 from app.api.users.schema import UserCreate, UserCreateRes
-from app.core.security import create_access_token, verify_password
+from app.core.security import ITERATIONS, create_access_token, hash_password_async, verify_password_async
 
 
 class AuthService:
@@ -24,12 +24,21 @@ class AuthService:
                 raise HTTPException(status_code=401, detail="Invalid credentials1") from e
             raise
 
-        if not verify_password(login_req.password, user.hashed_password, user.password_salt):
+        if not await verify_password_async(
+            login_req.password, user.hashed_password, user.password_salt, user.password_iterations
+        ):
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
         # Update last login
         user.last_login_at = datetime.now()
-        await self.user_repo.update(user.id, {"last_login_at": user.last_login_at})
+        update_data: dict = {"last_login_at": user.last_login_at}
+
+        # Upgrade hashes made with fewer iterations than the current setting while we have the plaintext
+        if user.password_iterations < ITERATIONS:
+            hashed_password, salt = await hash_password_async(login_req.password)
+            update_data.update(hashed_password=hashed_password, password_salt=salt, password_iterations=ITERATIONS)
+
+        await self.user_repo.update(user.id, update_data)
 
         # Create access token
         token_data = {"sub": str(user.id), "email": user.email}
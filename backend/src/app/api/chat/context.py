@@ -0,0 +1,115 @@
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+from app.db import orm
+
+# OpenAI chat message ({"role": "system" | "user" | "assistant", "content": ...}), sent upstream as is
+Message = dict[str, str]
+
+# Per-message framing (role, separators) added by the chat template
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_INSTRUCTION = (
+    "You maintain a running summary of a conversation between a user and an assistant. "
+    "Update the summary with the new messages below. Keep facts, names, decisions and open questions; "
+    "drop pleasantries. Reply with the updated summary only, in the language of the conversation."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate used for budgeting only (~4 UTF-8 bytes per token).
+    Thai characters are 3 bytes each, which tracks the Typhoon tokenizer closely enough.
+    """
+    return len(text.encode()) // 4 + MESSAGE_OVERHEAD_TOKENS
+
+
+@dataclass
+class ChatContext:
+    """Messages to send upstream plus the bookkeeping needed to update the session summary afterwards."""
+
+    messages: list[Message]
+    prompt_tokens: int  # Estimated tokens actually sent
+    full_tokens: int  # Estimated tokens if the whole history had been sent
+    to_fold: list[orm.ChatMessage] = field(default_factory=list)  # Older turns to merge into the summary
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.full_tokens - self.prompt_tokens)
+
+
+def to_message(message: orm.ChatMessage) -> Message:
+    return {"role": "user" if message.sender == "user" else "assistant", "content": str(message.content)}
+
+
+def build_context(
+    history: Sequence[orm.ChatMessage],
+    prompt: str,
+    budget: int,
+    summary: Optional[str] = None,
+    summary_message_id: Optional[int] = None,
+    fold_budget: Optional[int] = None,
+    fold_through_id: Optional[int] = None,
+) -> ChatContext:
+    """
+    Fit the conversation into `budget` tokens.
+
+    Turns already folded into `summary` are replaced by it, and the most recent turns are kept verbatim
+    for as long as they fit. When some turns no longer fit, `to_fold` lists the oldest unsummarized turns
+    that should be merged into the summary so the verbatim window shrinks to half the budget; that leaves
+    headroom for several more turns before the summary needs updating again.
+
+    `fold_budget` caps the summary request built from `to_fold` (instruction, current summary and turns). A
+    backlog larger than that, such as a long session that has never been summarized, is folded oldest first
+    over several turns; at least one turn is folded each time so the backlog always shrinks. When `history` is
+    missing turns after `fold_through_id` (see ChatRepo.get_unsummarized), nothing past that id is folded.
+    """
+    history = sorted(history, key=lambda m: m.id)
+    unsummarized = [m for m in history if summary_message_id is None or m.id > summary_message_id]
+    costs = [estimate_tokens(str(m.content)) for m in unsummarized]
+
+    prompt_cost = estimate_tokens(prompt)
+    summary_cost = estimate_tokens(summary) if summary else 0
+    full_tokens = sum(estimate_tokens(str(m.content)) for m in history) + prompt_cost
+
+    # Keep the newest turns that fit next to the prompt and summary
+    used = prompt_cost + summary_cost
+    keep_from = len(unsummarized)
+    while keep_from > 0 and used + costs[keep_from - 1] <= budget:
+        keep_from -= 1
+        used += costs[keep_from]
+
+    to_fold: list[orm.ChatMessage] = []
+    if keep_from > 0:
+        verbatim = used - prompt_cost - summary_cost
+        fold_until = keep_from
+        while fold_until < len(unsummarized) and verbatim > budget // 2:
+            verbatim -= costs[fold_until]
+            fold_until += 1
+        if fold_through_id is not None:
+            fold_until = min(fold_until, sum(1 for m in unsummarized if m.id <= fold_through_id))
+        if fold_budget is not None:
+            fold_cost = estimate_tokens(SUMMARY_INSTRUCTION) + summary_cost + costs[0]
+            fold_cap = 1
+            while fold_cap < fold_until and fold_cost + costs[fold_cap] <= fold_budget:
+                fold_cost += costs[fold_cap]
+                fold_cap += 1
+            fold_until = fold_cap
+        to_fold = unsummarized[:fold_until]
+
+    messages: list[Message] = []
+    if summary:
+        messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+    messages.extend(to_message(m) for m in unsummarized[keep_from:])
+    messages.append({"role": "user", "content": prompt})
+
+    return ChatContext(messages=messages, prompt_tokens=used, full_tokens=full_tokens, to_fold=to_fold)
+
+
+def build_summary_request(summary: Optional[str], messages: Sequence[orm.ChatMessage]) -> list[Message]:
+    """Prompt asking the model to merge `messages` into the existing summary."""
+    transcript = "\n".join(f"{m.sender}: {m.content}" for m in messages)
+    return [
+        {"role": "system", "content": SUMMARY_INSTRUCTION},
+        {"role": "user", "content": f"Current summary:\n{summary or '(empty)'}\n\nNew messages:\n{transcript}"},
+    ]
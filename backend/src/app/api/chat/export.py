@@ -0,0 +1,48 @@
+import zlib
+from typing import AsyncIterator, Sequence
+
+from app.api.chat.repo import HISTORY_FIELDS, ChatRepo
+from app.api.chat.schema import ChatMessageExport, ChatSessionExport
+from app.config import settings
+from app.db.session import async_session_maker
+
+SESSION_FIELDS, MESSAGE_FIELDS, FEEDBACK_FIELDS = HISTORY_FIELDS
+# Column ranges of each schema within a HISTORY row
+MESSAGES_FROM = len(SESSION_FIELDS)
+FEEDBACK_FROM = MESSAGES_FROM + len(MESSAGE_FIELDS)
+
+
+def history_lines(rows: Sequence[Sequence], session_id: int | None) -> tuple[list[bytes], int | None]:
+    """NDJSON lines for a batch of HISTORY rows; `session_id` is the session the previous batch ended in"""
+    lines = []
+    for row in rows:
+        if row[0] != session_id:
+            session_id = row[0]
+            lines.append(ChatSessionExport.serialize(dict(zip(SESSION_FIELDS, row[:MESSAGES_FROM]))))
+        if row[MESSAGES_FROM] is not None:
+            message = dict(zip(MESSAGE_FIELDS, row[MESSAGES_FROM:FEEDBACK_FROM]))
+            feedback = row[FEEDBACK_FROM:]
+            message["feedback"] = dict(zip(FEEDBACK_FIELDS, feedback)) if feedback[0] is not None else None
+            lines.append(ChatMessageExport.serialize(message))
+    return lines, session_id
+
+
+async def export_history(user_id: int, compress: bool = False) -> AsyncIterator[bytes]:
+    """
+    Stream a user's whole chat history as NDJSON, gzip-compressed when `compress` is set.
+
+    Runs inside the streaming response, after the request's database session is closed, so it reads through its own
+    session. Only one batch of rows (CHAT_EXPORT_BATCH_SIZE) is held at a time.
+    """
+    compressor = zlib.compressobj(settings.CHAT_EXPORT_GZIP_LEVEL, wbits=31) if compress else None  # gzip container
+    session_id = None
+    async with async_session_maker() as db:
+        async for rows in ChatRepo(db).stream_history(user_id, settings.CHAT_EXPORT_BATCH_SIZE):
+            lines, session_id = history_lines(rows, session_id)
+            chunk = b"\n".join(lines) + b"\n"
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+    if compressor:
+        yield compressor.flush()
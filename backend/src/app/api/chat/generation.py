@@ -0,0 +1,179 @@
+import asyncio
+import re
+import time
+from contextlib import suppress
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from app.api.chat.sse import encode_event
+from app.config import settings
+from app.core.redis import RedisClient
+
+PREFIX = "chat:generation:"
+EVENT_ID = re.compile(r"^\d+-\d+$")
+KEEP_ALIVE = b": keep-alive\n\n"
+
+
+class GenerationStream:
+    """
+    Buffers each generation in a Redis Stream so a client whose connection dropped can resume it with
+    Last-Event-ID, on any worker, without another upstream call.
+
+    The generation runs in its own task and appends every SSE frame to `chat:generation:<id>`; responses only
+    read from the stream, using the entry ids as SSE event ids. Streams expire SSE_RESUME_TTL seconds after
+    their last write.
+
+    Readers are counted in `chat:generation:<id>:readers`. A generation nobody has been reading for
+    SSE_DISCONNECT_GRACE_MS is cancelled, which stops the upstream and stores the partial answer.
+    """
+
+    _running: dict[str, asyncio.Task] = {}
+    _background: set[asyncio.Task] = set()
+
+    @staticmethod
+    def key(generation_id: str) -> str:
+        return PREFIX + generation_id
+
+    @classmethod
+    async def start(
+        cls,
+        generation_id: str,
+        user_id: int,
+        chunks: AsyncIterator[str],
+        on_done: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> None:
+        """
+        Run the generation in the background, buffering its text chunks.
+
+        `on_done` is awaited once the generation ends however it ends, including when its task is cancelled
+        before `chunks` is first iterated.
+        """
+        redis = await RedisClient.get_instance()
+        await redis.set(f"{cls.key(generation_id)}:owner", user_id, ex=settings.SSE_RESUME_TTL)
+        task = asyncio.create_task(cls._publish(generation_id, chunks))
+        cls._running[generation_id] = task
+        task.add_done_callback(lambda _: cls._running.pop(generation_id, None))
+        if on_done is not None:
+            task.add_done_callback(lambda _: cls._spawn(on_done()))
+
+    @classmethod
+    async def close(cls) -> None:
+        """Stop generations still running on this worker; their readers get an error event"""
+        for task in list(cls._running.values()):
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+    @classmethod
+    async def owner(cls, generation_id: str) -> Optional[int]:
+        redis = await RedisClient.get_instance()
+        owner = await redis.get(f"{cls.key(generation_id)}:owner")
+        return int(owner) if owner is not None else None
+
+    @classmethod
+    async def _publish(cls, generation_id: str, chunks: AsyncIterator[str]) -> None:
+        redis = await RedisClient.get_instance()
+        key = cls.key(generation_id)
+        grace = settings.SSE_DISCONNECT_GRACE_MS / 1000
+
+        async def append(fields: dict) -> int:
+            """Append an entry; returns the number of connected readers"""
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.xadd(key, fields)
+                pipe.expire(key, settings.SSE_RESUME_TTL)
+                pipe.expire(f"{key}:owner", settings.SSE_RESUME_TTL)
+                pipe.get(f"{key}:readers")
+                results = await pipe.execute()
+            return int(results[-1] or 0)
+
+        try:
+            unread_since = None
+            async for text in chunks:
+                if await append({"content": text}):
+                    unread_since = None
+                elif unread_since is None:
+                    unread_since = time.monotonic()
+                elif time.monotonic() - unread_since >= grace:
+                    # Readers may have been on another worker, so the producer checks too
+                    raise asyncio.CancelledError()
+            await append({"done": "1"})
+        except asyncio.CancelledError:
+            with suppress(Exception):
+                await append({"error": "Generation was interrupted"})
+            raise
+        except Exception as e:
+            try:
+                await append({"error": str(e)})
+            except Exception as redis_error:
+                print(f"Generation stream error: {str(redis_error)}")
+        finally:
+            # Stops the upstream if the loop was left early
+            await chunks.aclose()
+
+    @classmethod
+    async def _leave(cls, generation_id: str, finished: bool) -> None:
+        """Count a reader out; cancel the generation if it stays unread for the grace period"""
+        readers = f"{cls.key(generation_id)}:readers"
+        try:
+            redis = await RedisClient.get_instance()
+            if await redis.decr(readers) > 0 or finished:
+                return
+            task = cls._running.get(generation_id)
+            if task is None:
+                # Generating on another worker, which notices when it next publishes
+                return
+            await asyncio.sleep(settings.SSE_DISCONNECT_GRACE_MS / 1000)
+            if not task.done() and int(await redis.get(readers) or 0) <= 0:
+                task.cancel()
+        except Exception as e:
+            print(f"Generation stream error: {str(e)}")
+
+    @classmethod
+    async def events(cls, generation_id: str, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        SSE frames of a generation after `last_event_id`. A fresh response (no `last_event_id`) starts with a
+        `generation` event carrying the id to resume with.
+        """
+        redis = await RedisClient.get_instance()
+        # XREAD BLOCK holds its connection for up to SSE_KEEP_ALIVE_MS, so it reads from the blocking pool
+        blocking = await RedisClient.get_blocking()
+        key = cls.key(generation_id)
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.incr(f"{key}:readers")
+            pipe.expire(f"{key}:readers", settings.SSE_RESUME_TTL)
+            await pipe.execute()
+
+        finished = False
+        try:
+            if last_event_id is None:
+                yield encode_event({"generationId": generation_id}, event="generation")
+                last_event_id = "0-0"
+
+            while True:
+                entries = await blocking.xread({key: last_event_id}, block=settings.SSE_KEEP_ALIVE_MS, count=100)
+                if not entries:
+                    if not await redis.exists(key, f"{key}:owner"):
+                        finished = True
+                        yield encode_event({"error": "Generation expired"}, event="error")
+                        return
+                    yield KEEP_ALIVE
+                    continue
+
+                for last_event_id, fields in entries[0][1]:
+                    if "content" in fields:
+                        yield encode_event({"content": fields["content"]}, event_id=last_event_id)
+                    else:
+                        finished = True
+                        if "error" in fields:
+                            yield encode_event({"error": fields["error"]}, event="error", event_id=last_event_id)
+                        else:
+                            yield encode_event({}, event="done", event_id=last_event_id)
+                        return
+        finally:
+            # In its own task: a disconnected response is cancelled again at every await
+            cls._spawn(cls._leave(generation_id, finished))
+
+    @classmethod
+    def _spawn(cls, coroutine: Awaitable[None]) -> None:
+        task = asyncio.ensure_future(coroutine)
+        cls._background.add(task)
+        task.add_done_callback(cls._background.discard)
@@ -0,0 +1,50 @@
+import time
+from typing import Optional
+
+
+def percentile(values: list[float], q: float) -> Optional[float]:
+    """Linearly interpolated percentile of sorted `values` (same definition as Postgres percentile_cont)"""
+    if not values:
+        return None
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class LatencyTracker:
+    """
+    Records the timing of one streamed generation: time to first token and the gaps between content chunks.
+    Call `chunk()` as each content chunk arrives from the upstream, then `summary()` once the stream ends.
+    """
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        self.gaps: list[float] = []
+
+    def chunk(self) -> None:
+        now = time.perf_counter()
+        if self.first is None:
+            self.first = now
+        else:
+            self.gaps.append(now - self.last)
+        self.last = now
+
+    @property
+    def chunks(self) -> int:
+        return 0 if self.first is None else len(self.gaps) + 1
+
+    def summary(self) -> dict:
+        """Message columns in milliseconds; latency fields are None when nothing (or one chunk) was streamed"""
+        end = time.perf_counter()
+        gaps = sorted(gap * 1000 for gap in self.gaps)
+        return {
+            "response_time_ms": (end - self.start) * 1000,
+            "ttft_ms": None if self.first is None else (self.first - self.start) * 1000,
+            "itl_p50_ms": percentile(gaps, 0.5),
+            "itl_p95_ms": percentile(gaps, 0.95),
+            "itl_p99_ms": percentile(gaps, 0.99),
+            "itl_max_ms": gaps[-1] if gaps else None,
+        }
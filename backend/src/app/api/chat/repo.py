@@ -1,20 +1,185 @@
-from typing import List, Optional
+import enum
+from typing import Any, AsyncIterator, List, Optional, Sequence
 from fastapi import Depends, HTTPException
-from sqlalchemy import select, update
+from pydantic import BaseModel
+from sqlalchemy import (
+    ColumnElement,
+    Row,
+    LargeBinary,
+    String,
+    Text,
+    bindparam,
+    case,
+    cast,
+    false,
+    literal_column,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload, joinedload
 from sqlalchemy import func
 
 import app.db.orm as orm
-from app.core.base_repository import BaseRepository
+from app.api.analytics.repo import AnalyticsRepo
+from app.api.chat.schema import ChatMessageResponse, ChatSessionMessagesResponse, ChatSessionResponse, FeedbackResponse
+from app.core.base_repository import BaseRepository, Page
 from app.db.session import get_async_session
 
+LAST_MESSAGE_PREVIEW_LENGTH = 200
+
+_sessions = orm.ChatSession.__table__
+# Increments one session's rollups; executed with one parameter set per session (see session_rollups)
+SESSION_ROLLUP = (
+    update(_sessions)
+    .where(_sessions.c.id == bindparam("session"))
+    .values(
+        message_count=_sessions.c.message_count + bindparam("messages"),
+        assistant_message_count=_sessions.c.assistant_message_count + bindparam("assistant_messages"),
+        total_tokens=_sessions.c.total_tokens + bindparam("tokens"),
+        total_tokens_per_second=_sessions.c.total_tokens_per_second + bindparam("tokens_per_second"),
+        total_response_time_ms=_sessions.c.total_response_time_ms + bindparam("response_time_ms"),
+        total_context_tokens=_sessions.c.total_context_tokens + bindparam("context_tokens"),
+        total_context_tokens_saved=_sessions.c.total_context_tokens_saved + bindparam("context_tokens_saved"),
+        total_prompt_tokens=_sessions.c.total_prompt_tokens + bindparam("prompt_tokens"),
+        total_completion_tokens=_sessions.c.total_completion_tokens + bindparam("completion_tokens"),
+        total_ttft_ms=_sessions.c.total_ttft_ms + bindparam("ttft_ms"),
+        ttft_count=_sessions.c.ttft_count + bindparam("ttft_messages"),
+        # GREATEST ignores NULLs
+        max_itl_ms=func.greatest(_sessions.c.max_itl_ms, bindparam("itl_max_ms")),
+        last_message_preview=bindparam("preview"),
+        last_message_at=func.now(),
+        updated_at=func.now(),
+    )
+)
+
+
+def enum_value(column: ColumnElement, enum_type: type[enum.Enum]) -> ColumnElement:
+    """Enum columns store member names; the API returns values"""
+    return case({member.name: member.value for member in enum_type}, value=cast(column, String))
+
+
+def json_object(schema: type[BaseModel], table, **columns: ColumnElement) -> ColumnElement:
+    """
+    json_build_object with one camelCase key per field of `schema`, so the JSON Postgres builds matches the
+    schema's serialization. Fields default to the table column of the same name; `columns` overrides them.
+    """
+    args: list = []
+    for name, field in schema.model_fields.items():
+        args += [literal_column(f"'{field.alias or name}'"), columns[name] if name in columns else table.c[name]]
+    return func.json_build_object(*args)
+
+
+_messages = orm.ChatMessage.__table__
+_feedback = orm.Feedback.__table__
+# A session with its full transcript as ChatSessionMessagesResponse JSON, built entirely in Postgres
+_transcript = (
+    select(
+        func.coalesce(
+            func.json_agg(
+                aggregate_order_by(
+                    json_object(
+                        ChatMessageResponse,
+                        _messages,
+                        status=enum_value(_messages.c.status, orm.MessageStatusEnum),
+                        feedback=case(
+                            (_feedback.c.id.is_(None), None),
+                            else_=json_object(
+                                FeedbackResponse,
+                                _feedback,
+                                feedback_type=enum_value(_feedback.c.feedback_type, orm.FeedbackTypeEnum),
+                            ),
+                        ),
+                    ),
+                    _messages.c.id,
+                )
+            ),
+            text("'[]'::json"),
+        )
+    )
+    .select_from(_messages.outerjoin(_feedback, _feedback.c.message_id == _messages.c.id))
+    .where(_messages.c.session_id == _sessions.c.id)
+    .scalar_subquery()
+)
+TRANSCRIPT = select(
+    func.convert_to(
+        cast(json_object(ChatSessionMessagesResponse, _sessions, messages=_transcript, has_more_messages=false()), Text),
+        "UTF8",
+        type_=LargeBinary,
+    )
+)
+
+# A user's full history for export: one row per message (or per session without messages), with the fields of
+# HISTORY_FIELDS' response schemas in that order
+HISTORY_FIELDS = (
+    list(ChatSessionResponse.model_fields),
+    [name for name in ChatMessageResponse.model_fields if name != "feedback"],
+    list(FeedbackResponse.model_fields),
+)
+HISTORY = (
+    select(
+        *(_sessions.c[name].label(f"session_{name}") for name in HISTORY_FIELDS[0]),
+        *(_messages.c[name].label(f"message_{name}") for name in HISTORY_FIELDS[1]),
+        *(_feedback.c[name].label(f"feedback_{name}") for name in HISTORY_FIELDS[2]),
+    )
+    .select_from(
+        _sessions.outerjoin(_messages, _messages.c.session_id == _sessions.c.id).outerjoin(
+            _feedback, _feedback.c.message_id == _messages.c.id
+        )
+    )
+    .order_by(_sessions.c.id, _messages.c.id)
+)
+
+
+def session_rollups(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Fold message rows (in insert order) into one SESSION_ROLLUP parameter set per session"""
+    rollups: dict[int, dict[str, Any]] = {}
+    for row in rows:
+        rollup = rollups.get(row["session_id"])
+        if rollup is None:
+            rollup = rollups[row["session_id"]] = {
+                "session": row["session_id"],
+                "messages": 0,
+                "assistant_messages": 0,
+                "tokens": 0,
+                "tokens_per_second": 0,
+                "response_time_ms": 0.0,
+                "context_tokens": 0,
+                "context_tokens_saved": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "ttft_ms": 0.0,
+                "ttft_messages": 0,
+                "itl_max_ms": None,
+            }
+        rollup["messages"] += 1
+        if row["sender"] == "assistant":
+            rollup["assistant_messages"] += 1
+        for key in (
+            "tokens",
+            "tokens_per_second",
+            "response_time_ms",
+            "context_tokens",
+            "context_tokens_saved",
+            "prompt_tokens",
+            "completion_tokens",
+        ):
+            rollup[key] += row.get(key) or 0
+        if row.get("ttft_ms") is not None:
+            rollup["ttft_ms"] += row["ttft_ms"]
+            rollup["ttft_messages"] += 1
+        if row.get("itl_max_ms") is not None:
+            rollup["itl_max_ms"] = max(rollup["itl_max_ms"] or 0, row["itl_max_ms"])
+        rollup["preview"] = row["content"][:LAST_MESSAGE_PREVIEW_LENGTH]
+    return list(rollups.values())
+
 
 class ChatRepo:
     def __init__(self, session: AsyncSession = Depends(get_async_session)) -> None:
         self.session = session
         self.chat_session_repo = BaseRepository[orm.ChatSession](orm.ChatSession, session)
-        self.chat_message_repo = BaseRepository[orm.ChatMessage](orm.ChatMessage, session)
         self.feedback_repo = BaseRepository[orm.Feedback](orm.Feedback, session)
 
     async def create_session(self, user_id: int, title: Optional[str] = None) -> orm.ChatSession:
@@ -26,27 +191,43 @@ class ChatRepo:
         """Update the title of a chat session"""
         return await self.chat_session_repo.update(session_id, {"title": title})
 
-    async def get_user_sessions(self, user_id: int, skip: int = 0, limit: int = 50) -> List[orm.ChatSession]:
-        """Get paginated chat sessions for a user with message counts"""
-        result = await self.session.execute(
-            select(orm.ChatSession)
-            .where(orm.ChatSession.user_id == user_id)
-            # .options(selectinload(orm.ChatSession.messages))
-            .order_by(orm.ChatSession.updated_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
-        return list(result.scalars().all())
+    async def update_session_summary(self, session_id: int, summary: str, summary_message_id: int) -> orm.ChatSession:
+        """Store the rolling summary and the last message it covers"""
+        return await self.chat_session_repo.update(session_id, {"summary": summary, "summary_message_id": summary_message_id})
 
-    async def get_session(self, session_id: int, user_id: Optional[int] = None) -> orm.ChatSession:
-        """Get a specific chat session with its messages and feedback"""
-        query = (
-            select(orm.ChatSession)
-            .where(orm.ChatSession.id == session_id)
-            .options(
+    async def get_user_sessions(
+        self, user_id: int, skip: int = 0, limit: int = 50, cursor: Optional[str] = None
+    ) -> Page[orm.ChatSession]:
+        """Get chat sessions for a user, most recently updated first, by cursor (or by offset when skip is set)"""
+        if skip:
+            result = await self.session.execute(
+                select(orm.ChatSession)
+                .where(orm.ChatSession.user_id == user_id)
+                # .options(selectinload(orm.ChatSession.messages))
+                .order_by(orm.ChatSession.updated_at.desc(), orm.ChatSession.id.desc())
+                .offset(skip)
+                .limit(limit)
+            )
+            return Page(items=list(result.scalars().all()))
+
+        try:
+            return await self.chat_session_repo.get_page(
+                cursor,
+                limit,
+                order_by=[orm.ChatSession.updated_at],
+                descending=True,
+                filters=[orm.ChatSession.user_id == user_id],
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+    async def get_session(self, session_id: int, user_id: Optional[int] = None, with_messages: bool = True) -> orm.ChatSession:
+        """Get a specific chat session, optionally with all its messages and feedback"""
+        query = select(orm.ChatSession).where(orm.ChatSession.id == session_id)
+        if with_messages:
+            query = query.options(
                 joinedload(orm.ChatSession.messages).joinedload(orm.ChatMessage.feedback),
             )
-        )
 
         if user_id is not None:
             query = query.where(orm.ChatSession.user_id == user_id)
@@ -59,27 +240,75 @@ class ChatRepo:
 
         return session
 
-    async def create_message(
+    async def get_session_json(self, session_id: int, user_id: int) -> bytes:
+        """
+        A session and its whole transcript as ChatSessionMessagesResponse JSON bytes, aggregated in Postgres.
+
+        Same content as serializing `get_session`, without loading ORM objects or validating each message.
+        """
+        result = await self.session.execute(TRANSCRIPT.where(_sessions.c.id == session_id).where(_sessions.c.user_id == user_id))
+        transcript = result.scalar_one_or_none()
+
+        if transcript is None:
+            raise HTTPException(status_code=404, detail="Chat session not found")
+
+        return transcript
+
+    async def stream_history(self, user_id: int, batch_size: int) -> AsyncIterator[Sequence[Row]]:
+        """
+        HISTORY rows for one user, read from a server-side cursor `batch_size` rows at a time, so memory use does
+        not depend on the size of the history. Holds the session's connection until exhausted.
+        """
+        result = await self.session.stream(HISTORY.where(_sessions.c.user_id == user_id).execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield rows
+
+    async def get_messages(
         self,
         session_id: int,
-        content: str,
-        sender: str,
-        tokens: int = 0,
-        tokens_per_second: int = 0,
-        response_time_ms: Optional[float] = None,
-    ) -> orm.ChatMessage:
-        """Create a new chat message with performance metrics"""
-        chat_message = orm.ChatMessage(
-            session_id=session_id,
-            content=content,
-            sender=sender,
-            tokens=tokens,
-            tokens_per_second=tokens_per_second,
-            response_time_ms=response_time_ms,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None,
+        limit: int = 50,
+    ) -> List[orm.ChatMessage]:
+        """Get a page of session messages with their feedback, newest first, using (session_id, id) as keyset"""
+        query = (
+            select(orm.ChatMessage)
+            .where(orm.ChatMessage.session_id == session_id)
+            .options(selectinload(orm.ChatMessage.feedback))
+            .limit(limit)
         )
-        # Update session's updated_at timestamp
-        await self.session.execute(update(orm.ChatSession).where(orm.ChatSession.id == session_id).values(updated_at=func.now()))
-        return await self.chat_message_repo.create(chat_message)
+        if before_id is not None:
+            query = query.where(orm.ChatMessage.id < before_id)
+
+        if after_id is not None:
+            # Walk forward from the cursor so the page is adjacent to it, then flip to newest first
+            query = query.where(orm.ChatMessage.id > after_id).order_by(orm.ChatMessage.id.asc())
+            result = await self.session.execute(query)
+            return list(reversed(result.scalars().all()))
+
+        result = await self.session.execute(query.order_by(orm.ChatMessage.id.desc()))
+        return list(result.scalars().all())
+
+    async def get_unsummarized(self, session: orm.ChatSession, limit: int) -> tuple[List[orm.ChatMessage], Optional[int]]:
+        """
+        Messages not folded into the session summary yet, for build_context, read by keyset after
+        `summary_message_id` instead of loading the whole transcript.
+
+        That tail is normally short, since folding keeps it to about half the context window. A longer backlog (a
+        session that was never summarized) is read as its oldest and newest `limit` messages, and the id of the
+        last of the oldest part is returned: turns past it are missing, so they must not be folded yet.
+        """
+        oldest = await self.get_messages(session.id, after_id=session.summary_message_id or 0, limit=limit)
+        if len(oldest) < limit:
+            return oldest, None
+        newest = await self.get_messages(session.id, limit=limit)
+        messages = {message.id: message for message in [*oldest, *newest]}
+        # Pages are newest first
+        return list(messages.values()), oldest[0].id
+
+    async def update_session_rollups(self, rows: list[dict[str, Any]]) -> None:
+        """Add newly inserted message rows to their sessions' rollups. Does not commit."""
+        await self.session.execute(SESSION_ROLLUP, session_rollups(rows))
 
     async def get_message(self, message_id: int) -> orm.ChatMessage:
         """Get a specific chat message with its feedback"""
@@ -93,39 +322,57 @@ class ChatRepo:
 
         return message
 
-    async def add_feedback(self, message_id: int, feedback_type: orm.FeedbackTypeEnum) -> orm.Feedback:
+    async def add_feedback(self, message: orm.ChatMessage, feedback_type: orm.FeedbackTypeEnum) -> orm.Feedback:
         """Add or update feedback for a message"""
         # Check if feedback exists
-        result = await self.session.execute(select(orm.Feedback).where(orm.Feedback.message_id == message_id))
+        result = await self.session.execute(select(orm.Feedback).where(orm.Feedback.message_id == message.id))
         existing_feedback = result.scalar_one_or_none()
 
+        # Count the vote for the message's model; committed together with the feedback
+        await AnalyticsRepo(self.session).record_feedback(
+            message, feedback_type, existing_feedback.feedback_type if existing_feedback else None
+        )
+
         if existing_feedback:
             return await self.feedback_repo.update(existing_feedback.id, {"feedback_type": feedback_type})
 
-        feedback = orm.Feedback(message_id=message_id, feedback_type=feedback_type)
+        feedback = orm.Feedback(message_id=message.id, feedback_type=feedback_type)
         return await self.feedback_repo.create(feedback)
 
     async def delete_session(self, session_id: int) -> None:
         """Delete a chat session and all its messages"""
         await self.chat_session_repo.delete(session_id)
 
-    async def get_session_metrics(self, session_id: int) -> dict:
-        """Get aggregate metrics for a chat session"""
+    def get_session_metrics(self, session: orm.ChatSession) -> dict:
+        """Aggregate metrics for a chat session, read from its rollup columns"""
+        assistant_messages = session.assistant_message_count
+        return {
+            "total_messages": assistant_messages,
+            "total_tokens": session.total_tokens,
+            "avg_tokens_per_second": round(session.total_tokens_per_second / assistant_messages, 2)
+            if assistant_messages
+            else 0.0,
+            "avg_response_time_ms": round(session.total_response_time_ms / assistant_messages, 2) if assistant_messages else 0.0,
+            "total_context_tokens": session.total_context_tokens,
+            "total_context_tokens_saved": session.total_context_tokens_saved,
+            "total_prompt_tokens": session.total_prompt_tokens,
+            "total_completion_tokens": session.total_completion_tokens,
+            "avg_ttft_ms": round(session.total_ttft_ms / session.ttft_count, 2) if session.ttft_count else 0.0,
+            "max_itl_ms": round(session.max_itl_ms or 0, 2),
+        }
+
+    async def get_session_latency_percentiles(self, session_id: int) -> dict:
+        """TTFT and inter-token latency percentiles; these scan the session's messages, unlike the rollups"""
         result = await self.session.execute(
             select(
-                func.count(orm.ChatMessage.id).label("total_messages"),
-                func.sum(orm.ChatMessage.tokens).label("total_tokens"),
-                func.avg(orm.ChatMessage.tokens_per_second).label("avg_tokens_per_second"),
-                func.avg(orm.ChatMessage.response_time_ms).label("avg_response_time_ms"),
+                func.percentile_cont(0.5).within_group(orm.ChatMessage.ttft_ms).label("p50_ttft_ms"),
+                func.percentile_cont(0.95).within_group(orm.ChatMessage.ttft_ms).label("p95_ttft_ms"),
+                func.percentile_cont(0.5).within_group(orm.ChatMessage.itl_p50_ms).label("p50_itl_ms"),
+                func.percentile_cont(0.95).within_group(orm.ChatMessage.itl_p95_ms).label("p95_itl_ms"),
             )
             .where(orm.ChatMessage.session_id == session_id)
             .where(orm.ChatMessage.sender == "assistant")
         )
-        metrics = result.one()
+        percentiles = result.one()
 
-        return {
-            "total_messages": metrics.total_messages,
-            "total_tokens": metrics.total_tokens or 0,
-            "avg_tokens_per_second": round(metrics.avg_tokens_per_second or 0, 2),
-            "avg_response_time_ms": round(metrics.avg_response_time_ms or 0, 2),
-        }
+        return {key: round(value or 0, 2) for key, value in percentiles._mapping.items()}
@@ -1,15 +1,18 @@
-import json
-import time
-from typing import List
+import asyncio
+import uuid
+from contextlib import suppress
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
-import app.db.orm as orm
+from app.api.chat.export import export_history
+from app.api.chat.generation import EVENT_ID, GenerationStream
 from app.api.chat.repo import ChatRepo
 from app.api.chat.schema import (
     ChatMessageCreate,
-    ChatMessageResponse,
+    ChatMessagePage,
     ChatSessionCreate,
     ChatSessionMessagesResponse,
     ChatSessionMetrics,
@@ -19,7 +22,12 @@ from app.api.chat.schema import (
     FeedbackResponse,
 )
 from app.api.chat.service import ChatService
+from app.api.chat.sse import coalesce, encode_event
+from app.api.chat.writer import ChatMessageWriter
 from app.api.dependencies import get_current_user
+from app.config import settings
+from app.core.admission import Admission
+from app.core.principal import Principal
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -27,49 +35,99 @@ router = APIRouter(prefix="/chat", tags=["chat"])
 # Session Management
 @router.post("/sessions", response_model=ChatSessionResponse)
 async def create_chat_session(
-    data: ChatSessionCreate, current_user: orm.UserAccount = Depends(get_current_user), chat_repo: ChatRepo = Depends()
-) -> ChatSessionResponse:
+    data: ChatSessionCreate, current_user: Principal = Depends(get_current_user), chat_repo: ChatRepo = Depends()
+) -> Response:
     """Create new chat session for current user"""
     session = await chat_repo.create_session(current_user.id, data.title)
-    return ChatSessionResponse.model_validate(session)
+    return ChatSessionResponse.response(session)
 
 
 @router.get("/sessions", response_model=List[ChatSessionResponse])
 async def get_chat_sessions(
-    skip: int = 0, limit: int = 50, current_user: orm.UserAccount = Depends(get_current_user), chat_repo: ChatRepo = Depends()
-) -> List[ChatSessionResponse]:
-    """Get paginated chat history"""
-    sessions = await chat_repo.get_user_sessions(current_user.id, skip, limit)
-    return [ChatSessionResponse.model_validate(session) for session in sessions]
+    skip: int = 0,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    current_user: Principal = Depends(get_current_user),
+    chat_repo: ChatRepo = Depends(),
+) -> Response:
+    """Get paginated chat history; the cursor for the next page is returned in the X-Next-Cursor header"""
+    page = await chat_repo.get_user_sessions(current_user.id, skip, limit, cursor)
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else None
+    return ChatSessionResponse.response(page.items, headers=headers)
 
 
 @router.get("/sessions/{session_id}", response_model=ChatSessionMessagesResponse)
 async def get_chat_session(
-    session_id: int, current_user: orm.UserAccount = Depends(get_current_user), chat_repo: ChatRepo = Depends()
-) -> ChatSessionMessagesResponse:
+    session_id: int,
+    latest: Optional[int] = Query(None, ge=0, le=500, description="Only include the latest N messages"),
+    current_user: Principal = Depends(get_current_user),
+    chat_repo: ChatRepo = Depends(),
+) -> Response:
     """Get specific chat session with messages"""
-    session = await chat_repo.get_session(session_id, current_user.id)
-    return ChatSessionMessagesResponse.model_validate(session)
+    if latest is None:
+        # The full transcript is serialized by Postgres and passed through as is
+        return Response(await chat_repo.get_session_json(session_id, current_user.id), media_type="application/json")
+
+    session = await chat_repo.get_session(session_id, current_user.id, with_messages=False)
+    messages = await chat_repo.get_messages(session_id, limit=latest + 1)
+    return ChatSessionMessagesResponse.response(
+        {
+            **{field: getattr(session, field) for field in ChatSessionResponse.model_fields},
+            "messages": list(reversed(messages[:latest])),
+            "has_more_messages": len(messages) > latest,
+        }
+    )
+
+
+@router.get("/sessions/{session_id}/messages", response_model=ChatMessagePage)
+async def get_chat_messages(
+    session_id: int,
+    before: Optional[int] = Query(None, description="Return messages older than this message id"),
+    after: Optional[int] = Query(None, description="Return messages newer than this message id"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: Principal = Depends(get_current_user),
+    chat_repo: ChatRepo = Depends(),
+) -> Response:
+    """Get a page of session messages, newest first"""
+    await chat_repo.get_session(session_id, current_user.id, with_messages=False)
+    messages = await chat_repo.get_messages(session_id, before_id=before, after_id=after, limit=limit + 1)
+    # The extra row only tells us whether another page exists; drop it from the cursor's far side
+    page = messages[1:] if after is not None and len(messages) > limit else messages[:limit]
+    return ChatMessagePage.response({"messages": page, "has_more": len(messages) > limit})
+
+
+@router.get("/export")
+async def export_chat_history(
+    gzip: bool = Query(False, description="gzip-compress the export"),
+    current_user: Principal = Depends(get_current_user),
+) -> StreamingResponse:
+    """Download every session and message as NDJSON: a session line followed by its message lines, oldest first"""
+    filename = f"chat-history.ndjson{'.gz' if gzip else ''}"
+    return StreamingResponse(
+        export_history(current_user.id, gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.patch("/sessions/{session_id}", response_model=ChatSessionResponse)
 async def update_chat_session(
     session_id: int,
     data: ChatSessionUpdate,
-    current_user: orm.UserAccount = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     chat_repo: ChatRepo = Depends(),
-) -> ChatSessionResponse:
+) -> Response:
     """Update session title"""
     session = await chat_repo.update_session_title(session_id, current_user.id, data.title)
-    return ChatSessionResponse.model_validate(session)
+    return ChatSessionResponse.response(session)
 
 
 @router.delete("/sessions/{session_id}", status_code=200)
 async def delete_chat_session(
-    session_id: int, current_user: orm.UserAccount = Depends(get_current_user), chat_repo: ChatRepo = Depends()
+    session_id: int, current_user: Principal = Depends(get_current_user), chat_repo: ChatRepo = Depends()
 ) -> None:
     """Delete chat session"""
-    await chat_repo.get_session(session_id, current_user.id)
+    await chat_repo.get_session(session_id, current_user.id, with_messages=False)
     await chat_repo.delete_session(session_id)
 
 
@@ -77,29 +135,33 @@ async def delete_chat_session(
 async def stream_chat_response(
     session_id: int,
     data: ChatMessageCreate,
-    current_user: orm.UserAccount = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     chat_repo: ChatRepo = Depends(),
     chat_service: ChatService = Depends(),
 ):
     """Stream AI response via SSE"""
     try:
-        # Verify session ownership
-        session = await chat_repo.get_session(session_id, current_user.id)
+        # Verify session ownership; only the turns after the summary are needed for the context
+        session = await chat_repo.get_session(session_id, current_user.id, with_messages=False)
+        history, fold_through_id = await chat_repo.get_unsummarized(session, settings.CHAT_CONTEXT_MAX_MESSAGES)
 
-        # Store user message first
-        user_message = await chat_repo.create_message(session_id=session_id, content=data.content, sender="user")
+        # Reserve an upstream slot while a 429 can still be returned, and before the message is stored
+        lease = await Admission.acquire(data.model, current_user.id)
+        try:
+            # Store user message first
+            await ChatMessageWriter.write(session_id=session_id, content=data.content, sender="user")
+        except Exception:
+            await lease.release()
+            raise
 
-        async def generate():
+        async def generate_chunks():
             try:
-                start_time = time.time()
-                total_tokens = 0
-                full_content = []
-
                 print(f"# model: {data.model}")
 
                 # async for chunk in chat_service.mock_stream_response(session_id=session_id, model=data.model, prompt=data.content):
-                async for chunk in chat_service.stream_response(
+                chunks = chat_service.stream_response(
                     session=session,
+                    history=history,
                     model=data.model,
                     prompt=data.content,
                     max_tokens=data.output_length,
@@ -107,57 +169,101 @@ async def stream_chat_response(
                     top_p=data.top_p,
                     top_k=data.top_k,
                     repetition_penalty=data.repetition_penalty,
-                ):
-                    total_tokens += 1
-                    full_content.append(chunk)
-                    # Proper SSE format
-                    yield f"data: {json.dumps({'content': chunk})}\n\n"
-
-                # Calculate metrics
-                end_time = time.time()
-                response_time = (end_time - start_time) * 1000
-                content = "".join(full_content)
-                tokens_per_second = int(total_tokens / (response_time / 1000))
+                    lease=lease,
+                    fold_through_id=fold_through_id,
+                )
+                # Merge upstream tokens into fewer frames; ChatService keeps the full text for persistence
+                async for text in coalesce(chunks, settings.SSE_COALESCE_MAX_BYTES, settings.SSE_COALESCE_MAX_DELAY_MS / 1000):
+                    yield text
+            finally:
+                # Shielded so a disconnected response cannot cancel the release
+                with suppress(asyncio.CancelledError):
+                    await asyncio.shield(lease.release())
+
+        async def generate():
+            try:
+                async for text in generate_chunks():
+                    yield encode_event({"content": text})
 
             except Exception as e:
                 # Send error event
-                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+                yield encode_event({"error": str(e)}, event="error")
                 raise
 
+        headers = {
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        }
+        if settings.SSE_RESUME_ENABLED:
+            # Generate independently of this connection so the client can resume with Last-Event-ID; the lease is
+            # held by the generation, which may outlive the response
+            generation_id = uuid.uuid4().hex
+            try:
+                await GenerationStream.start(generation_id, current_user.id, generate_chunks(), on_done=lease.release)
+                headers["X-Generation-Id"] = generation_id
+                return StreamingResponse(GenerationStream.events(generation_id), media_type="text/event-stream", headers=headers)
+            except Exception as e:
+                print(f"Generation stream error: {str(e)}")
+
+        # The body may never be iterated (its finally then never runs), so the response releases the lease too
         return StreamingResponse(
-            generate(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-            },
+            generate(), media_type="text/event-stream", headers=headers, background=BackgroundTask(lease.release)
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/generations/{generation_id}/stream")
+async def resume_chat_stream(
+    generation_id: str,
+    last_event_id: Optional[str] = Header(None, description="Id of the last SSE event received"),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Resume a generation's SSE stream after Last-Event-ID; replays from the buffer without calling the model"""
+    if last_event_id is not None and not EVENT_ID.match(last_event_id):
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    if await GenerationStream.owner(generation_id) != current_user.id:
+        raise HTTPException(status_code=404, detail="Generation not found")
+
+    return StreamingResponse(
+        GenerationStream.events(generation_id, last_event_id or "0-0"),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        },
+    )
+
+
 # Feedback System
 @router.post("/messages/{message_id}/feedback", response_model=FeedbackResponse)
 async def add_message_feedback(
     message_id: int,
     data: FeedbackCreate,
-    current_user: orm.UserAccount = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     chat_repo: ChatRepo = Depends(),
-) -> FeedbackResponse:
+) -> Response:
     """Add/update message feedback"""
     # Verify ownership
     message = await chat_repo.get_message(message_id)
-    await chat_repo.get_session(message.session_id, current_user.id)
+    await chat_repo.get_session(message.session_id, current_user.id, with_messages=False)
 
-    feedback = await chat_repo.add_feedback(message_id, data.feedback_type)
-    return FeedbackResponse.model_validate(feedback)
+    feedback = await chat_repo.add_feedback(message, data.feedback_type)
+    return FeedbackResponse.response(feedback)
 
 
 @router.get("/sessions/{session_id}/metrics", response_model=ChatSessionMetrics)
 async def get_session_metrics(
-    session_id: int, current_user: orm.UserAccount = Depends(get_current_user), chat_repo: ChatRepo = Depends()
-) -> ChatSessionMetrics:
+    session_id: int,
+    percentiles: bool = Query(False, description="Also compute latency percentiles, which scans the session's messages"),
+    current_user: Principal = Depends(get_current_user),
+    chat_repo: ChatRepo = Depends(),
+) -> Response:
     """Get session analytics"""
-    await chat_repo.get_session(session_id, current_user.id)
-    metrics = await chat_repo.get_session_metrics(session_id)
-    return ChatSessionMetrics(**metrics)
+    session = await chat_repo.get_session(session_id, current_user.id, with_messages=False)
+    metrics = chat_repo.get_session_metrics(session)
+    if percentiles:
+        metrics.update(await chat_repo.get_session_latency_percentiles(session_id))
+    return ChatSessionMetrics.response(metrics)
@@ -1,8 +1,9 @@
 from datetime import datetime
-from typing import List, Optional
-from pydantic import ConfigDict
+from typing import List, Literal, Optional
+from pydantic import ConfigDict, field_validator
 from app.core.base_schema import CamelModel
-from app.db.orm import FeedbackTypeEnum
+from app.core.constants import MODEL_CONTEXT_WINDOWS
+from app.db.orm import FeedbackTypeEnum, MessageStatusEnum
 
 
 # Input schemas
@@ -23,6 +24,14 @@ class ChatMessageCreate(CamelModel):
     repetition_penalty: float = 1.0
     content: str  # User's message content
 
+    @field_validator("model")
+    @classmethod
+    def known_model(cls, model: str) -> str:
+        # The model is a Prometheus label and an admission queue key, so only known models are accepted
+        if model not in MODEL_CONTEXT_WINDOWS:
+            raise ValueError(f"Unknown model, expected one of: {', '.join(MODEL_CONTEXT_WINDOWS)}")
+        return model
+
 
 class FeedbackCreate(CamelModel):
     feedback_type: FeedbackTypeEnum  # upvote/downvote only
@@ -48,6 +57,9 @@ class ChatMessageResponse(CamelModel):
     tokens: Optional[int] = None  # Token count for AI responses
     tokens_per_second: Optional[int] = None  # Generation speed
     response_time_ms: Optional[float] = None  # Total response time
+    model: Optional[str] = None  # Model that generated an assistant message
+    cached: bool = False  # Replayed from the response cache
+    status: MessageStatusEnum = MessageStatusEnum.COMPLETED  # cancelled: partial, the client disconnected
     created_at: datetime
     feedback: Optional[FeedbackResponse] = None  # User feedback if any
 
@@ -60,6 +72,9 @@ class ChatSessionResponse(CamelModel):
     title: str
     created_at: datetime
     updated_at: datetime
+    message_count: int = 0
+    last_message_preview: Optional[str] = None
+    last_message_at: Optional[datetime] = None
 
 
 class ChatSessionMessagesResponse(CamelModel):
@@ -70,7 +85,22 @@ class ChatSessionMessagesResponse(CamelModel):
     title: str
     created_at: datetime
     updated_at: datetime
-    messages: List[ChatMessageResponse]  # Include full message history
+    messages: List[ChatMessageResponse]  # Full history, or the latest N messages when requested
+    has_more_messages: bool = False  # Older messages exist beyond those included
+
+
+# History export: one NDJSON line per session, each followed by the lines of its messages
+class ChatSessionExport(ChatSessionResponse):
+    type: Literal["session"] = "session"
+
+
+class ChatMessageExport(ChatMessageResponse):
+    type: Literal["message"] = "message"
+
+
+class ChatMessagePage(CamelModel):
+    messages: List[ChatMessageResponse]  # Newest first
+    has_more: bool  # More messages exist past the last one in this page
 
 
 class ChatSessionMetrics(CamelModel):
@@ -78,3 +108,13 @@ class ChatSessionMetrics(CamelModel):
     total_tokens: int  # Total tokens generated
     avg_tokens_per_second: float  # Average generation speed
     avg_response_time_ms: float  # Average response latency
+    total_context_tokens: int = 0  # Estimated prompt tokens sent upstream
+    total_context_tokens_saved: int = 0  # Estimated prompt tokens trimmed by context summarization
+    total_prompt_tokens: int = 0  # Upstream-reported prompt tokens
+    total_completion_tokens: int = 0  # Upstream-reported completion tokens
+    avg_ttft_ms: float = 0  # Time to first token
+    p50_ttft_ms: float = 0  # Percentiles are only filled in when requested with ?percentiles=true
+    p95_ttft_ms: float = 0
+    p50_itl_ms: float = 0  # Median of per-message median inter-token latency
+    p95_itl_ms: float = 0  # 95th percentile of per-message p95 inter-token latency
+    max_itl_ms: float = 0  # Longest stall between two tokens
@@ -1,27 +1,38 @@
 import time
-from typing import AsyncGenerator
-import httpx
-from fastapi import Depends
+from contextlib import suppress
+from typing import AsyncGenerator, AsyncIterator, Optional, Sequence
 import asyncio
-from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
-from pydantic import SecretStr
 
+from app.api.chat.context import ChatContext, Message, build_context, build_summary_request
+from app.api.chat.latency import LatencyTracker
 from app.api.chat.repo import ChatRepo
+from app.api.chat.single_flight import SingleFlight
+from app.api.chat.sse import replay
+from app.api.chat.writer import ChatMessageWriter
 from app.config import settings
+from app.core.admission import Admission, Lane, Lease
+from app.core.cache import ResponseCache
+from app.core.constants import MODEL_CONTEXT_WINDOWS
+from app.core.exceptions import TooManyRequestsError
+from app.core.llm import LLMClient
+from app.core.metrics import LLM_CANCELLED, LLM_ERRORS, LLM_TOKENS_SAVED, LLM_TTFT
 from app.db import orm
+from app.db.session import async_session_maker
 
 
 class ChatService:
-    def __init__(self, chat_repo: ChatRepo = Depends()):
-        self.chat_repo = chat_repo
-        self.client = httpx.AsyncClient(
-            base_url=settings.TYPHOON_API_URL, headers={"Authorization": f"Bearer {settings.TYPHOON_API_KEY}"}
-        )
+    """
+    Generates assistant responses. Runs inside the streaming response, after the request's database session
+    may already be closed, so it persists through ChatMessageWriter and its own short-lived sessions.
+    """
+
+    # Summary folds run detached from the response; keep references until they finish
+    _background: set[asyncio.Task] = set()
 
     async def stream_response(
         self,
         session: orm.ChatSession,
+        history: Sequence[orm.ChatMessage],
         model: str,
         prompt: str,
         max_tokens: int = 1000,
@@ -29,62 +40,192 @@ class ChatService:
         top_p: float = 0.9,
         top_k: int = 50,
         repetition_penalty: float = 1.0,
+        lease: Optional[Lease] = None,
+        fold_through_id: Optional[int] = None,
     ) -> AsyncGenerator[str, None]:
-        """Stream response from LLM"""
+        """
+        Stream response from LLM.
+
+        `history` holds the session's messages after its summary, with `fold_through_id`, as loaded by
+        ChatRepo.get_unsummarized. `lease` is the request's interactive admission lease; it is released as soon as the answer is complete,
+        before any follow-up work. The caller still releases it on every other path.
+        """
         try:
-            start_time = time.time()
-            total_tokens = 0
+            latency = LatencyTracker()
+            usage: dict = {}
             full_content = []
 
-            # Initialize LangChain ChatOpenAI
-            llm = ChatOpenAI(
-                model=model,
-                base_url=settings.TYPHOON_API_URL,
-                api_key=SecretStr(settings.TYPHOON_API_KEY),
-                streaming=True,
-                max_completion_tokens=max_tokens,
-                temperature=temperature,
-                top_p=top_p,
-                # top_k=top_k, # LangChain doesn't support top_k
-                # repetition_penalty=repetition_penalty, # LangChain doesn't support repetition_penalty
+            # Fit history into the model's context window, leaving room for the completion
+            context_window = MODEL_CONTEXT_WINDOWS.get(model, settings.CHAT_CONTEXT_WINDOW)
+            context = build_context(
+                history,
+                prompt,
+                budget=context_window - max_tokens,
+                summary=session.summary,
+                summary_message_id=session.summary_message_id,
+                fold_budget=context_window - settings.CHAT_SUMMARY_MAX_TOKENS,
+                fold_through_id=fold_through_id,
             )
-
-            # Create message history
-            messages = [
-                HumanMessage(content=str(m.content)) if m.sender == "user" else SystemMessage(content=str(m.content))
-                for m in session.messages
-            ]
-            messages.append(HumanMessage(content=prompt))
-            print(f"# len messages: {len(messages)}")
+            messages = context.messages
+            print(f"# len messages: {len(messages)}, context tokens: {context.prompt_tokens}, saved: {context.tokens_saved}")
             print(f"# Params: {model}, {max_tokens}, {temperature}, {top_p}, {top_k}, {repetition_penalty}")
 
-            # Stream the response
-            async for chunk in llm.astream(messages):
-                if chunk.content:
-                    total_tokens += 1
-                    full_content.append(chunk.content)
-                    yield chunk.content
+            # Sent to the upstream as is, including top_k and repetition_penalty
+            params = {
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "top_p": top_p,
+                "top_k": top_k,
+                "repetition_penalty": repetition_penalty,
+            }
 
-            # Calculate final metrics
-            end_time = time.time()
+            # Deterministic requests may be answered from the response cache or share an identical in-flight one
+            cache_key = None
+            cached = None
+            flight = None
+            if ResponseCache.cacheable(temperature) or SingleFlight.eligible(temperature):
+                cache_key = ResponseCache.key(model, params, [(message["role"], message["content"]) for message in messages])
+            if ResponseCache.cacheable(temperature):
+                try:
+                    cached = await ResponseCache.get(cache_key)
+                except Exception as e:
+                    print(f"Response cache error: {str(e)}")
+
+            if cached is not None:
+                chunks = replay(
+                    cached["content"],
+                    settings.RESPONSE_CACHE_REPLAY_CHUNK_CHARS,
+                    settings.RESPONSE_CACHE_REPLAY_INTERVAL_MS / 1000,
+                )
+            elif SingleFlight.eligible(temperature):
+                flight = await SingleFlight.join(
+                    cache_key,
+                    lambda flight_usage: self.generate(model, messages, flight_usage, **params),
+                )
+                usage = flight.usage
+                chunks = flight
+            else:
+                chunks = self.generate(model, messages, usage, **params)
+            # Followers of another request's generation are accounted like cache hits
+            shared = flight is not None and not flight.owner
+
+            interrupted = None
+            stream = aiter(chunks)
+            try:
+                async for text in stream:
+                    latency.chunk()
+                    full_content.append(text)
+                    yield text
+            except (asyncio.CancelledError, GeneratorExit) as e:
+                # The client went away: stop the upstream now and keep the partial answer
+                interrupted = e
+                with suppress(asyncio.CancelledError):
+                    await stream.aclose()
+
+            # Calculate final metrics, preferring upstream token counts over the chunk count
+            timings = latency.summary()
             content = "".join(full_content)
-            response_time = (end_time - start_time) * 1000
-            tokens_per_second = int(total_tokens / (response_time / 1000))
+            prompt_tokens = usage.get("input_tokens")
+            completion_tokens = usage.get("output_tokens")
+            if cached is not None:
+                # Nothing was generated upstream; keep the original answer's size for session stats
+                total_tokens = cached.get("completion_tokens") or latency.chunks
+            elif shared:
+                total_tokens = completion_tokens if completion_tokens is not None else latency.chunks
+                prompt_tokens = completion_tokens = None
+            else:
+                if timings["ttft_ms"] is not None:
+                    LLM_TTFT.labels(model).observe(timings["ttft_ms"] / 1000)
+                total_tokens = completion_tokens if completion_tokens is not None else latency.chunks
+            tokens_per_second = int(total_tokens / (timings["response_time_ms"] / 1000))
 
             # Store complete response
-            await self.chat_repo.create_message(
+            message = dict(
                 session_id=session.id,
                 content=content,
                 sender="assistant",
                 tokens=total_tokens,
                 tokens_per_second=tokens_per_second,
-                response_time_ms=response_time,
+                context_tokens=context.prompt_tokens,
+                context_tokens_saved=context.tokens_saved,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                top_k=top_k,
+                repetition_penalty=repetition_penalty,
+                cached=cached is not None or shared,
+                status=orm.MessageStatusEnum.CANCELLED if interrupted else orm.MessageStatusEnum.COMPLETED,
+                **timings,
             )
+            if interrupted is None:
+                await ChatMessageWriter.write(**message)
+            else:
+                if content:
+                    # Shielded: once the client is gone, every await in the request may be cancelled again
+                    with suppress(asyncio.CancelledError):
+                        await asyncio.shield(ChatMessageWriter.write(**message))
+                LLM_CANCELLED.labels(model).inc()
+                if cached is None and (flight is None or flight.flight.subscribers == 0):
+                    LLM_TOKENS_SAVED.labels(model).inc(max(0, max_tokens - total_tokens))
+                raise interrupted
+
+            if ResponseCache.cacheable(temperature) and cached is None and not shared:
+                try:
+                    await ResponseCache.set(
+                        cache_key, content, {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+                    )
+                except Exception as e:
+                    print(f"Response cache error: {str(e)}")
+
+            if lease is not None:
+                await lease.release()
+
+            # Fold turns that fell out of the window into the summary, detached so it does not delay the end of
+            # the stream, and on the background lane now that the interactive slot is free
+            if context.to_fold:
+                task = asyncio.create_task(self.update_summary(session, model, context))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
 
         except Exception as e:
-            print(f"LangChain streaming error: {str(e)}")
+            LLM_ERRORS.labels(model, type(e).__name__).inc()
+            print(f"LLM streaming error: {str(e)}")
             raise
 
+    def generate(self, model: str, messages: list[Message], usage: dict, **params) -> AsyncIterator[str]:
+        """Stream content from the upstream; the final chunk's token usage is copied into `usage`"""
+        return LLMClient.stream_chat(model, messages, usage, **params)
+
+    async def update_summary(self, session: orm.ChatSession, model: str, context: ChatContext) -> None:
+        """
+        Incrementally merge the turns in `context.to_fold` into the stored session summary.
+
+        Runs as a background task, so failures are logged; the same turns are still outside the window next
+        time, so folding just happens later.
+        """
+        try:
+            lease = await Admission.acquire(model, lane=Lane.BACKGROUND)
+        except TooManyRequestsError:
+            print("Summary skipped: upstream busy")
+            return
+        try:
+            try:
+                summary = await LLMClient.complete(
+                    model,
+                    build_summary_request(session.summary, context.to_fold),
+                    max_tokens=settings.CHAT_SUMMARY_MAX_TOKENS,
+                    temperature=0,
+                )
+            finally:
+                await lease.release()
+            async with async_session_maker() as db:
+                await ChatRepo(db).update_session_summary(session.id, summary, context.to_fold[-1].id)
+        except Exception as e:
+            print(f"Summary update error: {str(e)}")
+
     async def mock_stream_response(
         self,
         session: orm.ChatSession,
@@ -109,12 +250,16 @@ class ChatService:
             )
 
             # Stream each word with a small delay
-            for word in response_text.split():
-                await asyncio.sleep(0.2)  # Simulate thinking time
-                word_with_space = word + " "
-                total_tokens += 1
-                full_content.append(word_with_space)
-                yield word_with_space
+            interrupted = None
+            try:
+                for word in response_text.split():
+                    await asyncio.sleep(0.2)  # Simulate thinking time
+                    word_with_space = word + " "
+                    total_tokens += 1
+                    full_content.append(word_with_space)
+                    yield word_with_space
+            except (asyncio.CancelledError, GeneratorExit) as e:
+                interrupted = e
 
             # Calculate final metrics
             end_time = time.time()
@@ -123,14 +268,23 @@ class ChatService:
             tokens_per_second = int(total_tokens / (response_time / 1000))
 
             # Store complete response
-            await self.chat_repo.create_message(
+            message = dict(
                 session_id=session.id,
                 content=content,
                 sender="assistant",
                 tokens=total_tokens,
                 tokens_per_second=tokens_per_second,
                 response_time_ms=response_time,
+                status=orm.MessageStatusEnum.CANCELLED if interrupted else orm.MessageStatusEnum.COMPLETED,
             )
+            if interrupted is None:
+                await ChatMessageWriter.write(**message)
+            else:
+                if content:
+                    # Shielded: once the client is gone, every await in the request may be cancelled again
+                    with suppress(asyncio.CancelledError):
+                        await asyncio.shield(ChatMessageWriter.write(**message))
+                raise interrupted
 
         except Exception as e:
             print(f"Mock streaming error: {str(e)}")
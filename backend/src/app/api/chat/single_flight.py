@@ -0,0 +1,225 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import AsyncIterator, Callable, Optional
+
+from app.config import settings
+from app.core.redis import RedisClient
+
+PREFIX = "llm:flight:"
+
+
+class Flight:
+    """
+    One in-progress generation shared by every identical request in this worker.
+    Chunks are kept for the whole flight so late joiners can replay the prefix before following live.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.chunks: list[str] = []
+        self.usage: dict = {}
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.upstream = True  # False when following a generation running on another worker
+        self.task: Optional[asyncio.Task] = None
+        self._event = asyncio.Event()
+
+    def append(self, text: str) -> None:
+        self.chunks.append(text)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.done = True
+        self.error = error
+        self._notify()
+
+    def _notify(self) -> None:
+        self._event.set()
+        self._event = asyncio.Event()
+
+    async def follow(self) -> AsyncIterator[str]:
+        index = 0
+        while True:
+            event = self._event
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await event.wait()
+
+
+class Subscription:
+    """A request's view of a flight; `owner` is True for the request whose call started the upstream stream"""
+
+    def __init__(self, flight: Flight, owner: bool):
+        self.flight = flight
+        self.owner = owner
+
+    @property
+    def usage(self) -> dict:
+        return self.flight.usage
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        try:
+            async for text in self.flight.follow():
+                yield text
+        finally:
+            SingleFlight.leave(self.flight)
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent generations (same ResponseCache key) onto one upstream stream.
+
+    Within a worker, requests share a Flight. With SINGLE_FLIGHT_SHARED, workers also coordinate through Redis:
+    the first to claim `llm:flight:<key>` generates and appends every chunk to a Redis Stream, and the others
+    follow that stream instead of calling the upstream. A flight is cancelled once no request in any worker is
+    still reading it.
+    """
+
+    _flights: dict[str, Flight] = {}
+
+    @staticmethod
+    def eligible(temperature: float) -> bool:
+        return settings.SINGLE_FLIGHT_ENABLED and temperature <= settings.SINGLE_FLIGHT_MAX_TEMPERATURE
+
+    @classmethod
+    async def join(cls, key: str, generate: Callable[[dict], AsyncIterator[str]]) -> Subscription:
+        """Subscribe to the flight for `key`, starting it with `generate(usage)` if there is none"""
+        flight = cls._flights.get(key)
+        if flight is not None:
+            flight.subscribers += 1
+            return Subscription(flight, owner=False)
+
+        # Registered before any await so concurrent callers join this flight
+        flight = cls._flights[key] = Flight(key)
+        flight.subscribers += 1
+        flight_id = None
+        try:
+            if settings.SINGLE_FLIGHT_SHARED:
+                flight_id, flight.upstream = await cls._claim(key)
+        except Exception as e:
+            # Redis unavailable: coalesce within this worker only
+            print(f"Single-flight claim error: {str(e)}")
+        flight.task = asyncio.create_task(cls._run(flight, flight_id, generate))
+        return Subscription(flight, owner=flight.upstream)
+
+    @classmethod
+    def leave(cls, flight: Flight) -> None:
+        flight.subscribers -= 1
+        if flight.subscribers > 0 or flight.done or flight.task is None:
+            return
+        if not flight.upstream or not settings.SINGLE_FLIGHT_SHARED:
+            # New identical requests start a fresh flight rather than joining one being torn down
+            if cls._flights.get(flight.key) is flight:
+                del cls._flights[flight.key]
+            flight.task.cancel()
+        # A shared upstream flight keeps publishing while other workers follow it; _run checks periodically
+
+    @classmethod
+    async def _claim(cls, key: str) -> tuple[str, bool]:
+        """Become the generating worker for `key`, or return the flight id of the worker that already is"""
+        redis = await RedisClient.get_instance()
+        flight_id = uuid.uuid4().hex
+        for _ in range(3):
+            if await redis.set(PREFIX + key, flight_id, nx=True, ex=settings.SINGLE_FLIGHT_LEADER_TTL):
+                return flight_id, True
+            leader = await redis.get(PREFIX + key)
+            if leader:
+                await redis.incr(f"{PREFIX}{leader}:followers")
+                await redis.expire(f"{PREFIX}{leader}:followers", settings.SINGLE_FLIGHT_STREAM_TTL)
+                return leader, False
+        # The leader kept finishing between SET and GET; generate locally
+        return flight_id, True
+
+    @classmethod
+    async def _run(cls, flight: Flight, flight_id: Optional[str], generate: Callable[[dict], AsyncIterator[str]]):
+        shared = flight_id is not None
+        try:
+            if flight.upstream:
+                await cls._generate(flight, flight_id, generate)
+            else:
+                await cls._follow_remote(flight, flight_id)
+            flight.finish()
+        except asyncio.CancelledError:
+            flight.finish(asyncio.CancelledError())
+            raise
+        except Exception as e:
+            flight.finish(e)
+            if shared and flight.upstream:
+                await cls._publish(flight_id, {"error": str(e)})
+        finally:
+            if cls._flights.get(flight.key) is flight:
+                del cls._flights[flight.key]
+            if shared:
+                await cls._release(flight, flight_id)
+
+    @classmethod
+    async def _generate(cls, flight: Flight, flight_id: Optional[str], generate: Callable[[dict], AsyncIterator[str]]):
+        checked = time.monotonic()
+        stream = generate(flight.usage)
+        try:
+            async for text in stream:
+                flight.append(text)
+                if flight_id is None:
+                    continue
+                await cls._publish(flight_id, {"c": text})
+                if time.monotonic() - checked >= settings.SINGLE_FLIGHT_CHECK_INTERVAL:
+                    checked = time.monotonic()
+                    redis = await RedisClient.get_instance()
+                    await redis.expire(PREFIX + flight.key, settings.SINGLE_FLIGHT_LEADER_TTL)
+                    if flight.subscribers == 0 and not int(await redis.get(f"{PREFIX}{flight_id}:followers") or 0):
+                        raise asyncio.CancelledError()
+        finally:
+            # Close the upstream request now rather than whenever the generator is collected
+            await stream.aclose()
+        if flight_id is not None:
+            await cls._publish(flight_id, {"done": "1", "usage": json.dumps(flight.usage)})
+
+    @classmethod
+    async def _follow_remote(cls, flight: Flight, flight_id: str):
+        redis = await RedisClient.get_instance()
+        blocking = await RedisClient.get_blocking()
+        stream = f"{PREFIX}{flight_id}:chunks"
+        last_id = "0-0"
+        block_ms = int(settings.SINGLE_FLIGHT_CHECK_INTERVAL * 1000)
+        while True:
+            entries = await blocking.xread({stream: last_id}, block=block_ms, count=100)
+            if not entries:
+                # Nothing new; make sure the generating worker is still alive
+                if await redis.get(PREFIX + flight.key) != flight_id and not await redis.exists(stream):
+                    raise RuntimeError("Shared generation was lost")
+                continue
+            for last_id, fields in entries[0][1]:
+                if "c" in fields:
+                    flight.append(fields["c"])
+                elif "error" in fields:
+                    raise RuntimeError(fields["error"])
+                elif "done" in fields:
+                    flight.usage.update(json.loads(fields["usage"]))
+                    return
+
+    @staticmethod
+    async def _publish(flight_id: str, fields: dict):
+        redis = await RedisClient.get_instance()
+        stream = f"{PREFIX}{flight_id}:chunks"
+        await redis.xadd(stream, fields)
+        await redis.expire(stream, settings.SINGLE_FLIGHT_STREAM_TTL)
+
+    @staticmethod
+    async def _release(flight: Flight, flight_id: str):
+        try:
+            redis = await RedisClient.get_instance()
+            if flight.upstream:
+                if await redis.get(PREFIX + flight.key) == flight_id:
+                    await redis.delete(PREFIX + flight.key)
+            else:
+                await redis.decr(f"{PREFIX}{flight_id}:followers")
+        except Exception as e:
+            print(f"Single-flight release error: {str(e)}")
@@ -0,0 +1,95 @@
+import asyncio
+from typing import Any, AsyncIterable, AsyncIterator
+
+import orjson
+
+
+def encode_event(data: Any, event: str | None = None, event_id: str | None = None) -> bytes:
+    """Encode one SSE frame with orjson; `event_id` is what the client sends back as Last-Event-ID"""
+    frame = b"data: " + orjson.dumps(data) + b"\n\n"
+    if event:
+        frame = b"event: " + event.encode() + b"\n" + frame
+    if event_id:
+        frame = b"id: " + event_id.encode() + b"\n" + frame
+    return frame
+
+
+async def replay(content: str, chunk_chars: int, interval: float) -> AsyncIterator[str]:
+    """Stream stored text in `chunk_chars` pieces every `interval` seconds, like a live generation would"""
+    if interval <= 0:
+        yield content
+        return
+    for start in range(0, len(content), chunk_chars):
+        if start:
+            await asyncio.sleep(interval)
+        yield content[start : start + chunk_chars]
+
+
+async def coalesce(chunks: AsyncIterable[str], max_bytes: int, max_delay: float) -> AsyncIterator[str]:
+    """
+    Merge consecutive text chunks so the client gets fewer, larger frames.
+
+    The first chunk is passed through immediately to keep time to first token low. After that, text is
+    buffered until it reaches `max_bytes` or the oldest buffered chunk is `max_delay` seconds old; the deadline
+    is enforced even while the upstream is silent. A `max_delay` of 0 disables coalescing.
+    """
+    if max_delay <= 0:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    queue: asyncio.Queue[str | BaseException | None] = asyncio.Queue()
+
+    async def pump():
+        # Reads the upstream in its own task so waiting on the deadline never cancels the upstream generator
+        try:
+            async for chunk in chunks:
+                queue.put_nowait(chunk)
+            queue.put_nowait(None)
+        except Exception as e:
+            queue.put_nowait(e)
+
+    loop = asyncio.get_running_loop()
+    reader = asyncio.create_task(pump())
+    buffer: list[str] = []
+    size = 0
+    deadline = 0.0
+    first = True
+
+    try:
+        while True:
+            if buffer:
+                try:
+                    async with asyncio.timeout_at(deadline):
+                        item = await queue.get()
+                except TimeoutError:
+                    yield "".join(buffer)
+                    buffer.clear()
+                    size = 0
+                    continue
+            else:
+                item = await queue.get()
+
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                raise item
+
+            if first:
+                first = False
+                yield item
+                continue
+
+            if not buffer:
+                deadline = loop.time() + max_delay
+            buffer.append(item)
+            size += len(item.encode())
+            if size >= max_bytes or loop.time() >= deadline:
+                yield "".join(buffer)
+                buffer.clear()
+                size = 0
+
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        reader.cancel()
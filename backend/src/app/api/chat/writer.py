@@ -0,0 +1,147 @@
+import asyncio
+from typing import Any, Optional
+
+from sqlalchemy import insert
+
+from app.api.analytics.repo import AnalyticsRepo
+from app.api.chat.repo import ChatRepo
+from app.config import settings
+from app.db import orm
+from app.db.session import async_session_maker
+
+# Column defaults for rows written in bulk, so every row in a batch has the same keys
+MESSAGE_DEFAULTS: dict[str, Any] = {
+    "tokens": 0,
+    "tokens_per_second": 0,
+    "response_time_ms": None,
+    "context_tokens": 0,
+    "context_tokens_saved": 0,
+    "ttft_ms": None,
+    "itl_p50_ms": None,
+    "itl_p95_ms": None,
+    "itl_p99_ms": None,
+    "itl_max_ms": None,
+    "prompt_tokens": None,
+    "completion_tokens": None,
+    "model": None,
+    "max_tokens": None,
+    "temperature": None,
+    "top_p": None,
+    "top_k": None,
+    "repetition_penalty": None,
+    "cached": False,
+    "status": orm.MessageStatusEnum.COMPLETED,
+}
+
+
+class ChatMessageWriter:
+    """
+    Persists chat messages outside the request's database session.
+
+    CHAT_WRITE_MODE controls durability:
+    - "immediate": each message is inserted in its own short transaction before `write` returns.
+    - "batched": messages are queued and flushed as one multi-row INSERT (plus one rollup UPDATE per
+      session) every CHAT_WRITE_BATCH_SIZE rows or CHAT_WRITE_MAX_DELAY_MS; `write` returns once its batch
+      has committed, so it is as durable as "immediate" while sharing round trips with concurrent writers.
+    - "deferred": like "batched" but `write` returns as soon as the message is queued. Queued messages are
+      flushed on shutdown but lost if the worker crashes.
+    """
+
+    # A None entry is the stop sentinel put by `close`
+    _queue: Optional[asyncio.Queue[Optional[tuple[dict[str, Any], Optional[asyncio.Future]]]]] = None
+    _task: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def start(cls):
+        if settings.CHAT_WRITE_MODE != "immediate" and cls._task is None:
+            cls._queue = asyncio.Queue(maxsize=settings.CHAT_WRITE_QUEUE_SIZE)
+            cls._task = asyncio.create_task(cls._run())
+
+    @classmethod
+    async def close(cls):
+        """
+        Stop the flusher and persist everything still queued.
+
+        The flusher is not cancelled: it stops at the sentinel after flushing the batch it holds, so no dequeued row
+        is dropped and every waiting `write` resolves. Rows queued behind the sentinel are flushed here.
+        """
+        if cls._task is None or cls._queue is None:
+            return
+        queue, task = cls._queue, cls._task
+        await queue.put(None)
+        await task
+        # Writes from now on go straight to the database
+        cls._task = None
+        cls._queue = None
+        pending = []
+        while not queue.empty():
+            entry = queue.get_nowait()
+            if entry is not None:
+                pending.append(entry)
+        if pending:
+            await cls._flush_batch(pending)
+
+    @classmethod
+    async def write(cls, session_id: int, content: str, sender: str, **metrics: Any) -> None:
+        """Persist a message and update its session's rollups according to CHAT_WRITE_MODE."""
+        row = {**MESSAGE_DEFAULTS, **metrics, "session_id": session_id, "content": content, "sender": sender}
+
+        if cls._queue is None:
+            await cls._flush([row])
+            return
+
+        future = asyncio.get_running_loop().create_future() if settings.CHAT_WRITE_MODE == "batched" else None
+        await cls._queue.put((row, future))
+        if future is not None:
+            await future
+
+    @classmethod
+    async def _run(cls):
+        assert cls._queue is not None
+        loop = asyncio.get_running_loop()
+        max_delay = settings.CHAT_WRITE_MAX_DELAY_MS / 1000
+
+        stopping = False
+        while not stopping:
+            entry = await cls._queue.get()
+            if entry is None:
+                return
+            batch = [entry]
+            deadline = loop.time() + max_delay
+            while len(batch) < settings.CHAT_WRITE_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(cls._queue.get(), timeout)
+                except TimeoutError:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+            await cls._flush_batch(batch)
+
+    @classmethod
+    async def _flush_batch(cls, batch: list[tuple[dict[str, Any], Optional[asyncio.Future]]]):
+        try:
+            await cls._flush([row for row, _ in batch])
+        except Exception as e:
+            print(f"Chat message flush error ({len(batch)} messages): {str(e)}")
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+
+        for _, future in batch:
+            if future is not None and not future.done():
+                future.set_result(None)
+
+    @staticmethod
+    async def _flush(rows: list[dict[str, Any]]):
+        """Insert `rows` and update their session and model rollups in one transaction."""
+        async with async_session_maker() as db:
+            await db.execute(insert(orm.ChatMessage), rows)
+            await ChatRepo(db).update_session_rollups(rows)
+            await AnalyticsRepo(db).record_generations(rows)
+            await db.commit()
@@ -1,22 +1,22 @@
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 
 from app.api.users.repo import UserRepo
+from app.core.principal import Principal, PrincipalCache
 from app.core.security import verify_token
-from app.db.orm import UserAccount
 
 # Specify token URL that matches our auth endpoint
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
 async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)], user_repo: Annotated[UserRepo, Depends()]
-) -> UserAccount:
+    request: Request, token: Annotated[str, Depends(oauth2_scheme)], user_repo: Annotated[UserRepo, Depends()]
+) -> Principal:
     """
-    Validate access token and return current user.
+    Return the current user, reusing the user id already verified by AuthMiddleware.
     Raises 401 if token is invalid or user not found.
     Raises 403 if user account is inactive.
     """
@@ -26,30 +26,43 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        # Verify token and extract user_id
-        payload = verify_token(token)
-        user_id: str | None = payload.get("sub")
-        if user_id is None:
+    user_id: int | None = getattr(request.state, "user_id", None)
+    if user_id is None:
+        # Not behind AuthMiddleware (e.g. a public path): verify the token here
+        try:
+            payload = verify_token(token)
+            user_id = int(payload["sub"])
+        except (JWTError, KeyError, TypeError, ValueError):
             raise credentials_exception
 
-    except JWTError:
-        raise credentials_exception
-
-    try:
+    principal = PrincipalCache.get(user_id)
+    if principal is None:
         # Get user from database
-        user = await user_repo.get_by_id(int(user_id))
+        user = await user_repo.get_by_id(user_id)
         if user is None:
             raise credentials_exception
+        principal = Principal.from_user(user)
+        PrincipalCache.set(principal)
+
+    # Check if user is active
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account is inactive",
+        )
+
+    return principal
 
-        # Check if user is active
-        if not user.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Account is inactive",
-            )
 
-        return user
+async def get_current_superuser(current_user: Annotated[Principal, Depends(get_current_user)]) -> Principal:
+    """
+    Return the current user if they are a superuser.
+    Raises 403 otherwise.
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough privileges",
+        )
 
-    except ValueError:  # Invalid user_id format
-        raise credentials_exception
+    return current_user
@@ -5,8 +5,9 @@ from sqlalchemy.orm import selectinload
 
 import app.db.orm as orm
 from app.api.users.schema import UserCreate
-from app.core.base_repository import BaseRepository
-from app.core.security import hash_password
+from app.core.base_repository import ID, BaseRepository
+from app.core.principal import PrincipalCache
+from app.core.security import ITERATIONS, hash_password_async
 from app.db.session import get_async_session
 
 
@@ -30,13 +31,13 @@ class UserRepo(BaseRepository[orm.UserAccount]):
         return user
 
     async def create(self, user_create: UserCreate) -> orm.UserAccount:
-        hashed_password, salt = hash_password(user_create.password)
+        hashed_password, salt = await hash_password_async(user_create.password)
 
         user_model = orm.UserAccount(
             email=user_create.email,
             hashed_password=hashed_password,
             password_salt=salt,
-            password_iterations=100000,
+            password_iterations=ITERATIONS,
             is_active=True,
             is_superuser=False,
             profile=orm.UserProfile(full_name=user_create.full_name),
@@ -44,3 +45,14 @@ class UserRepo(BaseRepository[orm.UserAccount]):
 
         user_account = await super().create(user_model, ["profile"])
         return user_account
+
+    async def update(self, id: ID, update_data: dict, attributes: list[str] = []) -> orm.UserAccount:
+        user_account = await super().update(id, update_data, attributes)
+        # Evict the cached principal on every worker when a field it carries changes (e.g. is_active)
+        if update_data.keys() & {"email", "is_active", "is_superuser"}:
+            await PrincipalCache.invalidate(user_account.id)
+        return user_account
+
+    async def delete(self, id: ID) -> None:
+        await super().delete(id)
+        await PrincipalCache.invalidate(int(id))
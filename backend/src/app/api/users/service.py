@@ -1,6 +1,6 @@
 from sqlalchemy import select
 from app.api.users.schema import User, UserCreate, UserCreateRes, UserUpdate, UserUpdateRes
-from app.core.security import hash_password
+from app.core.security import ITERATIONS, hash_password_async
 import app.db.orm as orm
 from app.core.base_repository import BaseRepository
 from app.db.session import get_async_session
@@ -45,13 +45,13 @@ class UserRepo:
         return user
 
     async def create_user(self, user_create: UserCreate) -> UserCreateRes:
-        hashed_password, salt = hash_password(user_create.password)
+        hashed_password, salt = await hash_password_async(user_create.password)
 
         user_model = orm.UserAccount(
             email=user_create.email,
             hashed_password=hashed_password,
             password_salt=salt,
-            password_iterations=100000,
+            password_iterations=ITERATIONS,
             is_active=True,
             is_superuser=False,
             profile=orm.UserProfile(full_name=user_create.full_name),
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -16,6 +18,24 @@ class Settings(BaseSettings):
     REDIS_HOST: str = Field(validate_default=True)
     REDIS_PORT: str = Field(validate_default=True)
     REDIS_POOL_SIZE: int = Field(10)
+    REDIS_BLOCKING_POOL_SIZE: int = Field(1000)  # blocking reads (XREAD BLOCK): one connection per open stream
+
+    # Password hashing
+    PASSWORD_ITERATIONS: int = Field(100000)
+    KDF_MAX_WORKERS: int = Field(4)
+    KDF_MAX_PENDING: int = Field(64)
+
+    # In-process tier of the access token cache
+    TOKEN_CACHE_SIZE: int = Field(10000)
+    TOKEN_CACHE_TTL: int = Field(60)  # Only for entries without a known expiry
+    TOKEN_CACHE_NEGATIVE_TTL: int = Field(5)
+
+    # In-process cache of authenticated users
+    PRINCIPAL_CACHE_SIZE: int = Field(10000)
+    PRINCIPAL_CACHE_TTL: int = Field(30)
+
+    # Prometheus /metrics
+    METRICS_ENABLED: bool = Field(True)
 
     # Database pool
     DB_POOL_SIZE: int = Field(10)
@@ -27,6 +47,77 @@ class Settings(BaseSettings):
     TYPHOON_API_URL: str = Field(validate_default=True)
     TYPHOON_API_KEY: str = Field(validate_default=True)
 
+    # Typhoon API connection pool
+    LLM_MAX_CONNECTIONS: int = Field(100)
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = Field(20)
+    LLM_KEEPALIVE_EXPIRY: float = Field(30.0)
+    LLM_CONNECT_TIMEOUT: float = Field(5.0)
+    LLM_READ_TIMEOUT: float = Field(60.0)
+    LLM_HTTP2: bool = Field(True)
+
+    # Chat context
+    CHAT_CONTEXT_WINDOW: int = Field(8192)
+    CHAT_SUMMARY_MAX_TOKENS: int = Field(512)
+    CHAT_CONTEXT_MAX_MESSAGES: int = Field(500)  # unsummarized messages loaded per turn, see ChatRepo.get_unsummarized
+
+    # Chat message persistence: "immediate", "batched" or "deferred" (see ChatMessageWriter)
+    CHAT_WRITE_MODE: Literal["immediate", "batched", "deferred"] = Field("immediate")
+    CHAT_WRITE_BATCH_SIZE: int = Field(100)
+    CHAT_WRITE_MAX_DELAY_MS: int = Field(20)
+    CHAT_WRITE_QUEUE_SIZE: int = Field(10000)
+
+    # Exact-match LLM response cache (opt-in); only requests at or below the max temperature are cached
+    RESPONSE_CACHE_ENABLED: bool = Field(False)
+    RESPONSE_CACHE_MAX_TEMPERATURE: float = Field(0.0)
+    RESPONSE_CACHE_TTL: int = Field(86400)
+    RESPONSE_CACHE_MAX_BYTES: int = Field(65536)
+    RESPONSE_CACHE_REPLAY_CHUNK_CHARS: int = Field(16)
+    RESPONSE_CACHE_REPLAY_INTERVAL_MS: int = Field(10)  # 0 replays the whole answer at once
+
+    # Single-flight: identical concurrent requests at or below the max temperature share one upstream stream.
+    # SINGLE_FLIGHT_SHARED extends this across workers through Redis.
+    SINGLE_FLIGHT_ENABLED: bool = Field(True)
+    SINGLE_FLIGHT_MAX_TEMPERATURE: float = Field(0.0)
+    SINGLE_FLIGHT_SHARED: bool = Field(False)
+    SINGLE_FLIGHT_LEADER_TTL: int = Field(30)
+    SINGLE_FLIGHT_STREAM_TTL: int = Field(60)
+    SINGLE_FLIGHT_CHECK_INTERVAL: float = Field(1.0)
+
+    # Upstream admission control. Leases expire after ADMISSION_LEASE_TTL in case a holder never releases;
+    # ADMISSION_SHARED keeps the counts in Redis so the limits hold across workers.
+    ADMISSION_ENABLED: bool = Field(True)
+    ADMISSION_SHARED: bool = Field(False)
+    ADMISSION_MODEL_CONCURRENCY: int = Field(32)
+    ADMISSION_MODEL_LIMITS: dict[str, int] = Field({})  # per-model overrides, e.g. {"typhoon-v2-70b-instruct": 8}
+    ADMISSION_USER_CONCURRENCY: int = Field(4)
+    ADMISSION_BACKGROUND_SHARE: float = Field(0.5)  # fraction of a model's slots background work may hold
+    ADMISSION_MAX_QUEUE: int = Field(256)
+    ADMISSION_MAX_WAIT_MS: int = Field(10000)
+    ADMISSION_BACKGROUND_MAX_WAIT_MS: int = Field(60000)
+    ADMISSION_LEASE_TTL: int = Field(300)
+    ADMISSION_POLL_INTERVAL_MS: int = Field(100)
+
+    # SSE chunk coalescing; a max delay of 0 sends one frame per upstream chunk
+    SSE_COALESCE_MAX_BYTES: int = Field(512)
+    SSE_COALESCE_MAX_DELAY_MS: int = Field(30)
+
+    # Resumable streams: generations are buffered in Redis Streams for SSE_RESUME_TTL seconds after their last chunk
+    SSE_RESUME_ENABLED: bool = Field(True)
+    SSE_RESUME_TTL: int = Field(300)
+    SSE_KEEP_ALIVE_MS: int = Field(15000)
+    SSE_DISCONNECT_GRACE_MS: int = Field(3000)  # how long an unread generation waits for a reconnect
+
+    # History export (NDJSON, optionally gzip); rows are fetched from a server-side cursor in batches
+    CHAT_EXPORT_BATCH_SIZE: int = Field(1000)
+    CHAT_EXPORT_GZIP_LEVEL: int = Field(6)
+
+    # Startup warmup: connections opened before the worker reports ready on /ready
+    WARMUP_ENABLED: bool = Field(True)
+    WARMUP_DB_CONNECTIONS: int = Field(5)  # capped at DB_POOL_SIZE, overflow connections are not kept
+    WARMUP_REDIS_CONNECTIONS: int = Field(5)  # capped at REDIS_POOL_SIZE
+    WARMUP_LLM: bool = Field(True)
+    WARMUP_TIMEOUT: float = Field(10.0)
+
     model_config = SettingsConfigDict(env_file=".env")
 
 
@@ -0,0 +1,276 @@
+import asyncio
+import bisect
+import itertools
+import math
+import time
+import uuid
+from enum import IntEnum
+from typing import Optional
+
+from app.config import settings
+from app.core.exceptions import TooManyRequestsError
+from app.core.metrics import LLM_ADMISSION_REJECTED, LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT
+from app.core.redis import RedisClient
+
+PREFIX = "llm:admission:"
+
+# Takes a lease in every key whose live lease count is under its limit, or in none of them.
+# Returns 0 on success, otherwise the 1-based index of the first full key.
+ACQUIRE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local ttl = tonumber(ARGV[1])
+for i, key in ipairs(KEYS) do
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now)
+    if redis.call('ZCARD', key) >= tonumber(ARGV[i + 2]) then
+        return i
+    end
+end
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now + ttl, ARGV[2])
+    redis.call('PEXPIRE', key, ttl)
+end
+return 0
+"""
+
+
+class Lane(IntEnum):
+    """Priority lanes; lower values are admitted first"""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class LocalSlots:
+    """Leases held by this worker only"""
+
+    def __init__(self):
+        self.leases: dict[str, dict[str, float]] = {}
+
+    async def acquire(self, limits: list[tuple[str, int]], lease_id: str, ttl: float) -> int:
+        now = time.monotonic()
+        for index, (key, limit) in enumerate(limits, 1):
+            leases = self.leases.setdefault(key, {})
+            for expired in [held for held, expires_at in leases.items() if expires_at <= now]:
+                del leases[expired]
+            if len(leases) >= limit:
+                return index
+        for key, _ in limits:
+            self.leases[key][lease_id] = now + ttl
+        return 0
+
+    async def release(self, keys: list[str], lease_id: str) -> None:
+        for key in keys:
+            self.leases.get(key, {}).pop(lease_id, None)
+
+
+class RedisSlots:
+    """Leases shared by every worker, one sorted set per key scored by expiry"""
+
+    async def acquire(self, limits: list[tuple[str, int]], lease_id: str, ttl: float) -> int:
+        try:
+            redis = await RedisClient.get_instance()
+            keys = [key for key, _ in limits]
+            return int(
+                await redis.eval(ACQUIRE_SCRIPT, len(keys), *keys, int(ttl * 1000), lease_id, *(limit for _, limit in limits))
+            )
+        except Exception as e:
+            # Fail open: an unreachable Redis should not take chat down with it
+            print(f"Admission error: {str(e)}")
+            return 0
+
+    async def release(self, keys: list[str], lease_id: str) -> None:
+        try:
+            redis = await RedisClient.get_instance()
+            async with redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.zrem(key, lease_id)
+                await pipe.execute()
+        except Exception as e:
+            print(f"Admission release error: {str(e)}")
+
+
+class Lease:
+    """An upstream slot; release it once the upstream call is over"""
+
+    def __init__(self, model: str, lane: Lane, keys: list[str], lease_id: str):
+        self.model = model
+        self.lane = lane
+        self.keys = keys
+        self.lease_id = lease_id
+        self.acquired_at = time.monotonic()
+        self.released = False
+
+    async def release(self) -> None:
+        if self.released:
+            return
+        self.released = True
+        if self.keys:
+            await Admission.release(self)
+
+
+class Waiter:
+    def __init__(self, lane: Lane, limits: list[tuple[str, int]], lease_id: str):
+        self.lane = lane
+        self.sequence = next(Admission._sequence)
+        self.limits = limits
+        self.lease_id = lease_id
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    @property
+    def priority(self) -> tuple[int, int]:
+        return self.lane, self.sequence
+
+
+class Admission:
+    """
+    Per-model and per-user concurrency limits for upstream LLM calls.
+
+    A request over its user's limit is rejected straight away. A request over the model's limit waits in a
+    per-model queue ordered by lane, then arrival, and is turned away early with 429 and Retry-After when the
+    queue is full or the expected wait already exceeds the lane's maximum.
+    """
+
+    _slots: Optional[LocalSlots | RedisSlots] = None
+    # Only models with waiters have a queue and lock; both are dropped once the queue drains
+    _queues: dict[str, list[Waiter]] = {}
+    _locks: dict[str, asyncio.Lock] = {}
+    _hold_seconds: dict[str, float] = {}  # moving average of how long a lease is held, per model
+    _sequence = itertools.count()
+
+    @classmethod
+    def slots(cls) -> LocalSlots | RedisSlots:
+        if cls._slots is None:
+            cls._slots = RedisSlots() if settings.ADMISSION_SHARED else LocalSlots()
+        return cls._slots
+
+    @staticmethod
+    def model_limit(model: str, lane: Lane) -> int:
+        limit = settings.ADMISSION_MODEL_LIMITS.get(model, settings.ADMISSION_MODEL_CONCURRENCY)
+        if lane == Lane.BACKGROUND:
+            # Background work never holds every slot, so interactive requests on other workers still get in
+            limit = max(1, int(limit * settings.ADMISSION_BACKGROUND_SHARE))
+        return limit
+
+    @staticmethod
+    def max_wait(lane: Lane) -> float:
+        if lane == Lane.BACKGROUND:
+            return settings.ADMISSION_BACKGROUND_MAX_WAIT_MS / 1000
+        return settings.ADMISSION_MAX_WAIT_MS / 1000
+
+    @classmethod
+    def estimate_wait(cls, model: str, position: int, limit: int) -> Optional[float]:
+        """Seconds until the `position`-th queued request is admitted, if hold times are known yet"""
+        hold = cls._hold_seconds.get(model)
+        if hold is None:
+            return None
+        return hold * math.ceil(position / limit)
+
+    @classmethod
+    def reject(cls, model: str, reason: str, detail: str, retry_after: Optional[float]) -> TooManyRequestsError:
+        LLM_ADMISSION_REJECTED.labels(model, reason).inc()
+        return TooManyRequestsError(detail, retry_after=max(1, math.ceil(retry_after or 1)))
+
+    @classmethod
+    async def acquire(cls, model: str, user_id: Optional[int] = None, lane: Lane = Lane.INTERACTIVE) -> Lease:
+        """Wait for an upstream slot, or raise TooManyRequestsError"""
+        if not settings.ADMISSION_ENABLED:
+            return Lease(model, lane, [], "")
+
+        lease_id = uuid.uuid4().hex
+        limit = cls.model_limit(model, lane)
+        # The model comes last, so a full key before it means the user is over their limit
+        limits = [(f"{PREFIX}model:{model}", limit)]
+        if user_id is not None and lane == Lane.INTERACTIVE:
+            limits.insert(0, (f"{PREFIX}user:{user_id}", settings.ADMISSION_USER_CONCURRENCY))
+        keys = [key for key, _ in limits]
+        lane_label = lane.name.lower()
+        started = time.monotonic()
+
+        ahead = sum(1 for waiter in cls._queues.get(model, ()) if waiter.lane <= lane)
+        if not ahead:
+            full = await cls.slots().acquire(limits, lease_id, settings.ADMISSION_LEASE_TTL)
+            if not full:
+                LLM_QUEUE_WAIT.labels(model, lane_label).observe(0)
+                return Lease(model, lane, keys, lease_id)
+            if full < len(limits):
+                raise cls.reject(model, "user", "Too many concurrent requests", cls._hold_seconds.get(model))
+
+        estimate = cls.estimate_wait(model, ahead + 1, limit)
+        queue = cls._queues.setdefault(model, [])
+        if len(queue) >= settings.ADMISSION_MAX_QUEUE:
+            raise cls.reject(model, "queue_full", "Model is busy, try again later", estimate)
+        if estimate is not None and estimate > cls.max_wait(lane):
+            raise cls.reject(model, "wait", "Model is busy, try again later", estimate)
+
+        waiter = Waiter(lane, limits, lease_id)
+        bisect.insort(queue, waiter, key=lambda w: w.priority)
+        LLM_QUEUE_DEPTH.labels(model, lane_label).inc()
+        deadline = started + cls.max_wait(lane)
+        try:
+            while not waiter.future.done():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise cls.reject(model, "timeout", "Model is busy, try again later", cls.estimate_wait(model, 1, limit))
+                if settings.ADMISSION_SHARED:
+                    # Slots freed by other workers are only noticed by polling
+                    remaining = min(remaining, settings.ADMISSION_POLL_INTERVAL_MS / 1000)
+                await asyncio.wait([waiter.future], timeout=remaining)
+                if not waiter.future.done():
+                    await cls._dispatch(model)
+        finally:
+            LLM_QUEUE_DEPTH.labels(model, lane_label).dec()
+            if waiter in queue:
+                queue.remove(waiter)
+            if not waiter.future.done():
+                # Tells a dispatch already acquiring for this waiter to hand the slot back
+                waiter.future.cancel()
+            cls._prune(model)
+
+        waiter.future.result()
+        LLM_QUEUE_WAIT.labels(model, lane_label).observe(time.monotonic() - started)
+        return Lease(model, lane, keys, lease_id)
+
+    @classmethod
+    async def release(cls, lease: Lease) -> None:
+        await cls.slots().release(lease.keys, lease.lease_id)
+        held = time.monotonic() - lease.acquired_at
+        previous = cls._hold_seconds.get(lease.model)
+        cls._hold_seconds[lease.model] = held if previous is None else previous * 0.8 + held * 0.2
+        await cls._dispatch(lease.model)
+
+    @classmethod
+    def _prune(cls, model: str) -> None:
+        """Forget a drained queue, unless a dispatch is still working through it"""
+        lock = cls._locks.get(model)
+        if not cls._queues.get(model) and (lock is None or not lock.locked()):
+            cls._queues.pop(model, None)
+            cls._locks.pop(model, None)
+
+    @classmethod
+    async def _dispatch(cls, model: str) -> None:
+        """Admit queued requests in priority order until the model is full"""
+        queue = cls._queues.get(model)
+        if not queue:
+            return
+        lock = cls._locks.setdefault(model, asyncio.Lock())
+        async with lock:
+            for waiter in list(queue):
+                if waiter.future.done():
+                    continue
+                full = await cls.slots().acquire(waiter.limits, waiter.lease_id, settings.ADMISSION_LEASE_TTL)
+                if full == len(waiter.limits):
+                    # The model is full; later waiters have the same or lower priority
+                    break
+                if waiter in queue:
+                    queue.remove(waiter)
+                if full:
+                    if not waiter.future.done():
+                        waiter.future.set_exception(
+                            cls.reject(model, "user", "Too many concurrent requests", cls._hold_seconds.get(model))
+                        )
+                elif waiter.future.done():
+                    await cls.slots().release([key for key, _ in waiter.limits], waiter.lease_id)
+                else:
+                    waiter.future.set_result(None)
+        cls._prune(model)
@@ -1,3 +1,4 @@
+from fastapi import HTTPException
 from fastapi.security.utils import get_authorization_scheme_param
 from datetime import datetime
 from jose import JWTError
@@ -20,14 +21,21 @@ class AuthHandler:
             raise InvalidTokenError()
 
         try:
-            # Try cache first
+            # Try cache first (in-process, then Redis)
             cached = await self.token_cache.get(token)
             if cached:
+                if cached.get("invalid"):
+                    raise InvalidTokenError()
                 return cached["user_id"]
 
             # Verify token if not cached
-            payload = verify_token(token)
-            user_id = int(payload.get("sub"))  # type: ignore
+            try:
+                payload = verify_token(token)
+                user_id = int(payload.get("sub"))  # type: ignore
+            except (HTTPException, JWTError, TypeError, ValueError):
+                # Remember the failure briefly so retries of a bad token skip the decode
+                self.token_cache.set_invalid(token)
+                raise InvalidTokenError()
             if not user_id:
                 raise InvalidTokenError()
 
@@ -39,6 +47,8 @@ class AuthHandler:
 
             return user_id
 
+        except AuthenticationError:
+            raise
         except (JWTError, ValueError) as e:
             # Log the original error for debugging if needed
             # logger.error(f"Token validation failed: {str(e)}")
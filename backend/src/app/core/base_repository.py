@@ -1,11 +1,17 @@
 from abc import ABC, abstractmethod
+import base64
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import date, datetime
+import json
 import re
 from uuid import UUID
 from asyncpg import ForeignKeyViolationError
+from sqlalchemy import Select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import Any, Type, TypeVar, Generic
+from sqlalchemy.orm import InstrumentedAttribute
+from typing import Any, Sequence, Type, TypeVar, Generic
 from sqlalchemy.exc import IntegrityError
 
 
@@ -14,6 +20,17 @@ T = TypeVar("T")
 ID = int | str | UUID
 
 
+@dataclass
+class Page(Generic[T]):
+    """
+    One page of a keyset-paginated query.
+    `next_cursor` is None on the last page; otherwise pass it back to fetch the following page.
+    """
+
+    items: list[T]
+    next_cursor: str | None = None
+
+
 class RepositoryAbstract(ABC):
     """
     Abstract base class defining the interface for asynchronous repositories.
@@ -24,6 +41,11 @@ class RepositoryAbstract(ABC):
         """Retrieve all items with pagination."""
         raise NotImplementedError
 
+    @abstractmethod
+    async def get_page(self, cursor: str | None, limit: int):
+        """Retrieve items with keyset (cursor) pagination."""
+        raise NotImplementedError
+
     @abstractmethod
     async def get_by_id(self, id: ID):
         """Retrieve an item by its ID."""
@@ -109,6 +131,82 @@ class BaseRepository(RepositoryAbstract, Generic[T]):
         result = await self.session.execute(select(self.orm_model).offset(skip).limit(limit))
         return list(result.scalars().all())
 
+    def build_page_query(
+        self,
+        cursor: str | None = None,
+        limit: int = 100,
+        order_by: Sequence[InstrumentedAttribute] = (),
+        descending: bool = False,
+        filters: Sequence[Any] = (),
+    ) -> Select:
+        """
+        Build the keyset query used by `get_page`, fetching one extra row to detect a following page.
+        """
+        if not hasattr(self.orm_model, "id"):
+            raise AttributeError(f"{self.orm_model.__name__} must have an 'id' attribute")
+        columns = [*order_by, getattr(self.orm_model, "id")]
+
+        query = select(self.orm_model).where(*filters)
+        if cursor is not None:
+            key = tuple_(*columns)
+            values = tuple_(*self.decode_cursor(cursor, columns))
+            query = query.where(key < values if descending else key > values)
+        return query.order_by(*(c.desc() if descending else c.asc() for c in columns)).limit(limit + 1)
+
+    async def get_page(
+        self,
+        cursor: str | None = None,
+        limit: int = 100,
+        order_by: Sequence[InstrumentedAttribute] = (),
+        descending: bool = False,
+        filters: Sequence[Any] = (),
+    ) -> Page[T]:
+        """
+        Retrieve items with keyset pagination.
+
+        Items are ordered by `order_by` followed by `id` as a tiebreaker, all in the same direction, and
+        the cursor holds the sort key of the last item returned. Unlike OFFSET, the database seeks straight
+        to the cursor, so deep pages cost the same as the first one when an index matches the ordering.
+        """
+        query = self.build_page_query(cursor, limit, order_by, descending, filters)
+        result = await self.session.execute(query)
+        items = list(result.scalars().all())
+        if len(items) <= limit:
+            return Page(items=items)
+
+        items = items[:limit]
+        columns = [*order_by, getattr(self.orm_model, "id")]
+        return Page(items=items, next_cursor=self.encode_cursor([getattr(items[-1], c.key) for c in columns]))
+
+    @staticmethod
+    def encode_cursor(values: Sequence[Any]) -> str:
+        """
+        Encode a sort key into an opaque, URL-safe cursor.
+        """
+        raw = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in values], default=str)
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str, columns: Sequence[InstrumentedAttribute]) -> list[Any]:
+        """
+        Decode a cursor produced by `encode_cursor` back into typed column values.
+        """
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if not isinstance(values, list) or len(values) != len(columns):
+                raise ValueError
+            decoded = []
+            for column, value in zip(columns, values):
+                python_type = column.type.python_type
+                if value is not None and python_type in (date, datetime):
+                    value = python_type.fromisoformat(value)
+                elif value is not None and python_type is UUID:
+                    value = UUID(value)
+                decoded.append(value)
+            return decoded
+        except (ValueError, TypeError, NotImplementedError):
+            raise ValueError("Invalid cursor")
+
     async def get_by_id(self, id: ID) -> T | None:
         """
         Retrieve an item by its ID.
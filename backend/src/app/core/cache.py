@@ -1,22 +1,181 @@
 # app/core/cache.py
+import asyncio
+import hashlib
 import json
-from typing import Optional
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+from app.config import settings
 from app.core.redis import RedisClient
 
 
+class LocalCache:
+    """
+    Bounded in-process LRU cache with per-entry expiry.
+    Not shared between workers; use it in front of Redis or the database for hot, short-lived lookups.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+async def listen_for_invalidations(channel: str, cache: LocalCache, parse_key: Callable[[str], Hashable] = str):
+    """
+    Evict keys published on `channel` by other workers from `cache`; runs for the lifetime of the app.
+    The cache is cleared whenever the subscription is (re)established, since messages may have been missed.
+    """
+    while True:
+        try:
+            redis = await RedisClient.get_blocking()
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(channel)
+                cache.clear()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        cache.delete(parse_key(message["data"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Cache invalidation listener error on {channel}: {str(e)}")
+            cache.clear()
+            await asyncio.sleep(1)
+
+
 class TokenCache:
-    @staticmethod
-    async def set(token: str, user_id: int, exp_seconds: int = 3600):
+    """
+    Two-tier cache of validated access tokens: a per-worker LRU in front of Redis.
+
+    Entries live until the token's `exp`. Tokens that failed validation are remembered locally for a few
+    seconds so a client retrying a bad token does not cost a JWT decode each time. Invalidations are
+    published so every worker drops its local copy.
+    """
+
+    INVALIDATE_CHANNEL = "token:invalidate"
+
+    _local = LocalCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL)
+    _stats = {"local_hits": 0, "redis_hits": 0, "negative_hits": 0, "misses": 0}
+
+    @classmethod
+    async def set(cls, token: str, user_id: int, exp_seconds: int = 3600):
+        exp = time.time() + exp_seconds
+        cls._local.set(token, {"user_id": user_id}, ttl=exp_seconds)
         redis = await RedisClient.get_instance()
-        await redis.set(f"token:{token}", json.dumps({"user_id": user_id}), ex=exp_seconds)
+        await redis.set(f"token:{token}", json.dumps({"user_id": user_id, "exp": exp}), ex=exp_seconds)
+
+    @classmethod
+    def set_invalid(cls, token: str):
+        cls._local.set(token, {"invalid": True}, ttl=settings.TOKEN_CACHE_NEGATIVE_TTL)
+
+    @classmethod
+    async def get(cls, token: str) -> Optional[dict]:
+        cached = cls._local.get(token)
+        if cached is not None:
+            cls._stats["negative_hits" if cached.get("invalid") else "local_hits"] += 1
+            return cached
 
-    @staticmethod
-    async def get(token: str) -> Optional[dict]:
         redis = await RedisClient.get_instance()
         data = await redis.get(f"token:{token}")
-        return json.loads(data) if data else None
+        if not data:
+            cls._stats["misses"] += 1
+            return None
 
-    @staticmethod
-    async def invalidate(token: str):
+        cls._stats["redis_hits"] += 1
+        cached = json.loads(data)
+        ttl = cached["exp"] - time.time() if "exp" in cached else None
+        if ttl is None or ttl > 0:
+            cls._local.set(token, {"user_id": cached["user_id"]}, ttl=ttl)
+        return cached
+
+    @classmethod
+    async def invalidate(cls, token: str):
+        cls._local.delete(token)
         redis = await RedisClient.get_instance()
         await redis.delete(f"token:{token}")
+        await redis.publish(cls.INVALIDATE_CHANNEL, token)
+
+    @classmethod
+    async def listen(cls):
+        await listen_for_invalidations(cls.INVALIDATE_CHANNEL, cls._local)
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Hit/miss counters and size of the local tier, for sizing TOKEN_CACHE_SIZE."""
+        lookups = sum(cls._stats.values())
+        hits = cls._stats["local_hits"] + cls._stats["negative_hits"]
+        return {**cls._stats, "size": len(cls._local), "local_hit_rate": round(hits / lookups, 4) if lookups else 0.0}
+
+
+class ResponseCache:
+    """
+    Exact-match cache of completed LLM responses in Redis, keyed by model, sampling params and a hash of the
+    normalized prompt context. Entries expire after RESPONSE_CACHE_TTL seconds and responses larger than
+    RESPONSE_CACHE_MAX_BYTES are not stored; overall size is bounded by Redis' maxmemory eviction policy.
+    """
+
+    PREFIX = "llm:response:"
+
+    _stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def key(model: str, params: dict[str, Any], messages: list[tuple[str, str]]) -> str:
+        """Stable key for a generation; message text is stripped so whitespace-only edits still match"""
+        payload = json.dumps(
+            {"model": model, "params": params, "messages": [(role, content.strip()) for role, content in messages]},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @classmethod
+    def cacheable(cls, temperature: float) -> bool:
+        return settings.RESPONSE_CACHE_ENABLED and temperature <= settings.RESPONSE_CACHE_MAX_TEMPERATURE
+
+    @classmethod
+    async def get(cls, key: str) -> Optional[dict]:
+        redis = await RedisClient.get_instance()
+        data = await redis.get(cls.PREFIX + key)
+        if not data:
+            cls._stats["misses"] += 1
+            return None
+        cls._stats["hits"] += 1
+        return json.loads(data)
+
+    @classmethod
+    async def set(cls, key: str, content: str, usage: dict[str, Any]):
+        data = json.dumps({"content": content, **usage}, ensure_ascii=False)
+        if len(data.encode()) > settings.RESPONSE_CACHE_MAX_BYTES:
+            return
+        redis = await RedisClient.get_instance()
+        await redis.set(cls.PREFIX + key, data, ex=settings.RESPONSE_CACHE_TTL)
+
+    @classmethod
+    def stats(cls) -> dict:
+        return dict(cls._stats)
@@ -0,0 +1,8 @@
+# Context window (in tokens) per Typhoon model. Also the models chat requests may use (see ChatMessageCreate)
+MODEL_CONTEXT_WINDOWS: dict[str, int] = {
+    "typhoon-instruct": 8192,
+    "typhoon-v1.5-instruct": 8192,
+    "typhoon-v1.5x-70b-instruct": 8192,
+    "typhoon-v2-8b-instruct": 8192,
+    "typhoon-v2-70b-instruct": 8192,
+}
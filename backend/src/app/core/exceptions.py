@@ -14,3 +14,8 @@ class InvalidTokenError(AuthenticationError):
 class NoAuthHeaderError(AuthenticationError):
     def __init__(self):
         super().__init__("No authorization header")
+
+
+class TooManyRequestsError(HTTPException):
+    def __init__(self, detail: str = "Too many requests", retry_after: int = 1):
+        super().__init__(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=detail, headers={"Retry-After": str(retry_after)})
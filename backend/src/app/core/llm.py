@@ -0,0 +1,114 @@
+from typing import AsyncIterator, Optional
+
+import httpx
+import orjson
+
+from app.config import settings
+
+
+class UpstreamError(Exception):
+    """The Typhoon API rejected a request or reported an error mid-stream"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def read_usage(usage: dict, into: dict) -> None:
+    """Copy OpenAI usage into `into` under the input/output token names the rest of the app uses"""
+    into["input_tokens"] = usage.get("prompt_tokens")
+    into["output_tokens"] = usage.get("completion_tokens")
+    into["total_tokens"] = usage.get("total_tokens")
+
+
+class LLMClient:
+    """
+    Process-wide connection pool to the Typhoon API.
+
+    A single keep-alive (and HTTP/2 when available) client is shared by every request so chat turns
+    reuse warm TCP/TLS connections instead of paying a handshake each time.
+
+    Chat completions are called directly over this client: streamed responses are parsed line by line from raw
+    bytes with orjson, and every sampling parameter (including top_k and repetition_penalty, which the
+    OpenAI-compatible server accepts as extensions) is passed through.
+    """
+
+    _instance: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    async def get_instance(cls) -> httpx.AsyncClient:
+        if cls._instance is None:
+            cls._instance = httpx.AsyncClient(
+                base_url=settings.TYPHOON_API_URL,
+                headers={"Authorization": f"Bearer {settings.TYPHOON_API_KEY}"},
+                http2=settings.LLM_HTTP2,
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(settings.LLM_READ_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT),
+            )
+        return cls._instance
+
+    @classmethod
+    async def stream_chat(
+        cls, model: str, messages: list[dict[str, str]], usage: Optional[dict] = None, **params
+    ) -> AsyncIterator[str]:
+        """Stream content deltas of a chat completion; the final usage report is copied into `usage`"""
+        client = await cls.get_instance()
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+            **params,
+        }
+        async with client.stream(
+            "POST", "/chat/completions", content=orjson.dumps(payload), headers={"Content-Type": "application/json"}
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise UpstreamError(f"Upstream error {response.status_code}: {response.text}", response.status_code)
+
+            pending = b""
+            async for data in response.aiter_bytes():
+                lines = (pending + data).split(b"\n")
+                pending = lines.pop()
+                for line in lines:
+                    # Only `data:` lines carry chunks; blank separators and comments are skipped
+                    if not line.startswith(b"data:"):
+                        continue
+                    line = line[5:].strip()
+                    if line == b"[DONE]":
+                        return
+                    chunk = orjson.loads(line)
+                    if "error" in chunk:
+                        # An object with a message, or just a string on some OpenAI-compatible servers
+                        error = chunk["error"]
+                        raise UpstreamError(str(error.get("message", error) if isinstance(error, dict) else error))
+                    if chunk.get("usage") and usage is not None:
+                        read_usage(chunk["usage"], usage)
+                    for choice in chunk.get("choices") or ():
+                        content = choice.get("delta", {}).get("content")
+                        if content:
+                            yield content
+
+    @classmethod
+    async def complete(cls, model: str, messages: list[dict[str, str]], **params) -> str:
+        """Non-streaming chat completion; returns the message content"""
+        client = await cls.get_instance()
+        response = await client.post(
+            "/chat/completions",
+            content=orjson.dumps({"model": model, "messages": messages, **params}),
+            headers={"Content-Type": "application/json"},
+        )
+        if response.status_code >= 400:
+            raise UpstreamError(f"Upstream error {response.status_code}: {response.text}", response.status_code)
+        return orjson.loads(response.content)["choices"][0]["message"]["content"] or ""
+
+    @classmethod
+    async def close(cls):
+        if cls._instance:
+            await cls._instance.aclose()
+            cls._instance = None
@@ -0,0 +1,85 @@
+from typing import Iterator
+
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+from sqlalchemy.pool import Pool
+
+from app.core.cache import ResponseCache, TokenCache
+from app.core.redis import RedisClient
+
+# Request path metrics: updated inline, so each is a single lock-protected increment or bucket lookup
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response starts, by route template",
+    ["method", "route", "status"],
+)
+SSE_STREAMS_ACTIVE = Gauge("sse_streams_active", "Server-sent event responses currently streaming")
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a database connection from the pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+LLM_TTFT = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Upstream time to first token",
+    ["model"],
+    buckets=(0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10, 20, 60),
+)
+LLM_ERRORS = Counter("llm_errors", "Failed upstream generations", ["model", "error"])
+LLM_CANCELLED = Counter("llm_cancelled_generations", "Generations stopped because the client went away", ["model"])
+LLM_TOKENS_SAVED = Counter(
+    "llm_cancelled_tokens_saved",
+    "Completion tokens not generated because of cancellation, counted up to the request's max_tokens",
+    ["model"],
+)
+LLM_QUEUE_DEPTH = Gauge("llm_queue_depth", "Requests waiting for an upstream slot", ["model", "lane"])
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds",
+    "Time admitted requests waited for an upstream slot",
+    ["model", "lane"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+LLM_ADMISSION_REJECTED = Counter(
+    "llm_admission_rejected", "Requests turned away with 429 before reaching the upstream", ["model", "reason"]
+)
+
+
+class PoolCollector(Collector):
+    """
+    Reads connection pool and cache state when /metrics is scraped rather than tracking it per request.
+    """
+
+    def __init__(self, db_pool: Pool):
+        self.db_pool = db_pool
+
+    def collect(self) -> Iterator[Metric]:
+        yield GaugeMetricFamily("db_pool_size", "Configured database pool size", value=self.db_pool.size())
+        yield GaugeMetricFamily("db_pool_checked_out", "Database connections in use", value=self.db_pool.checkedout())
+        yield GaugeMetricFamily(
+            "db_pool_overflow", "Database connections open beyond the pool size", value=max(self.db_pool.overflow(), 0)
+        )
+
+        redis_pool = RedisClient._pool
+        if redis_pool is not None:
+            # redis-py has no public pool stats; its private connection lists are read when present, so a release
+            # that renames them drops these two samples instead of breaking /metrics
+            in_use = getattr(redis_pool, "_in_use_connections", None)
+            if in_use is not None:
+                yield GaugeMetricFamily("redis_pool_in_use", "Redis connections in use", value=len(in_use))
+            available = getattr(redis_pool, "_available_connections", None)
+            if available is not None:
+                yield GaugeMetricFamily("redis_pool_available", "Idle Redis connections", value=len(available))
+            yield GaugeMetricFamily("redis_pool_max", "Maximum Redis connections", value=redis_pool.max_connections)
+
+        stats = TokenCache.stats()
+        lookups = CounterMetricFamily("token_cache_lookups", "Token cache lookups by outcome", labels=["result"])
+        for result in ("local_hits", "redis_hits", "negative_hits", "misses"):
+            lookups.add_metric([result], stats[result])
+        yield lookups
+        yield GaugeMetricFamily("token_cache_size", "Entries in the in-process token cache", value=stats["size"])
+
+        responses = CounterMetricFamily("llm_response_cache_lookups", "LLM response cache lookups by outcome", labels=["result"])
+        for result, count in ResponseCache.stats().items():
+            responses.add_metric([result], count)
+        yield responses
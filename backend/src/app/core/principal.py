@@ -0,0 +1,54 @@
+from dataclasses import dataclass
+
+from app.config import settings
+from app.core.cache import LocalCache, listen_for_invalidations
+from app.core.redis import RedisClient
+from app.db import orm
+
+INVALIDATE_CHANNEL = "principal:invalidate"
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    The authenticated user as seen by request handlers.
+    A plain, immutable snapshot so it can be cached and shared across requests, unlike an ORM instance.
+    """
+
+    id: int
+    email: str
+    is_active: bool
+    is_superuser: bool
+
+    @classmethod
+    def from_user(cls, user: orm.UserAccount) -> "Principal":
+        return cls(id=user.id, email=user.email, is_active=user.is_active, is_superuser=user.is_superuser)
+
+
+class PrincipalCache:
+    """
+    Per-worker cache of principals keyed by user id.
+    Entries expire after PRINCIPAL_CACHE_TTL seconds and are evicted on every worker through Redis pub/sub
+    whenever a user account changes.
+    """
+
+    _local = LocalCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+
+    @classmethod
+    def get(cls, user_id: int) -> Principal | None:
+        return cls._local.get(user_id)
+
+    @classmethod
+    def set(cls, principal: Principal):
+        cls._local.set(principal.id, principal)
+
+    @classmethod
+    async def invalidate(cls, user_id: int):
+        cls._local.delete(user_id)
+        redis = await RedisClient.get_instance()
+        await redis.publish(INVALIDATE_CHANNEL, str(user_id))
+
+    @classmethod
+    async def listen(cls):
+        """Evict principals invalidated by other workers; runs for the lifetime of the app."""
+        await listen_for_invalidations(INVALIDATE_CHANNEL, cls._local, int)
@@ -6,8 +6,18 @@ from app.config import settings
 
 
 class RedisClient:
+    """
+    Shared Redis pools.
+
+    `get_instance` is the general pool for short commands (caches, admission, stream appends). Connections that
+    wait on the server, XREAD BLOCK for every open SSE stream and the pub/sub listeners, use `get_blocking` instead:
+    each holds its connection for the whole wait, so they get a separate pool sized for concurrent streams and
+    cannot starve the general one.
+    """
+
     _instance: Optional[Redis] = None
     _pool: Optional[ConnectionPool] = None
+    _blocking: Optional[Redis] = None
 
     @classmethod
     async def get_instance(cls) -> Redis:
@@ -20,8 +30,23 @@ class RedisClient:
             cls._instance = Redis(connection_pool=cls._pool)
         return cls._instance
 
+    @classmethod
+    async def get_blocking(cls) -> Redis:
+        if cls._blocking is None:
+            cls._blocking = Redis(
+                connection_pool=ConnectionPool.from_url(
+                    f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}",
+                    max_connections=settings.REDIS_BLOCKING_POOL_SIZE,
+                    decode_responses=True,
+                )
+            )
+        return cls._blocking
+
     @classmethod
     async def close(cls):
+        if cls._blocking:
+            await cls._blocking.aclose(close_connection_pool=True)
+            cls._blocking = None
         if cls._instance:
             await cls._instance.close()
             if cls._pool:
@@ -1,57 +1,74 @@
+import asyncio
 import base64
+import hashlib
 import secrets
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from fastapi import HTTPException
-from jose import JWTError, jwt
+from jose import JWTError
 
 from ..config import settings
 
-ITERATIONS = 100000  # High iteration count for security
+ITERATIONS = settings.PASSWORD_ITERATIONS  # High iteration count for security; older hashes are upgraded on login
 
 
-def hash_password(password: str) -> tuple[str, str]:
+def hash_password(password: str, iterations: int = ITERATIONS) -> tuple[str, str]:
     """
-    Hash a password using PBKDF2 with a random salt.
+    Hash a password using PBKDF2-HMAC-SHA256 with a random salt.
     Returns (hash, salt)
     """
     salt = secrets.token_hex(16)
+    password_hash = base64.b64encode(hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), iterations, 32))
+    return password_hash.decode(), salt
 
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=bytes.fromhex(salt),
-        iterations=ITERATIONS,
-    )
 
-    password_hash = base64.b64encode(kdf.derive(password.encode())).decode()
-    return password_hash, salt
-
-
-def verify_password(password: str, stored_hash: str, salt: str) -> bool:
+def verify_password(password: str, stored_hash: str, salt: str, iterations: int = ITERATIONS) -> bool:
     """Verify a password against a stored hash and salt"""
     try:
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=bytes.fromhex(salt),
-            iterations=ITERATIONS,
-        )
-
-        password_hash = base64.b64encode(kdf.derive(password.encode())).decode()
-        return secrets.compare_digest(password_hash, stored_hash)
+        password_hash = base64.b64encode(hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), iterations, 32))
+        return secrets.compare_digest(password_hash.decode(), stored_hash)
     except Exception:
         return False
 
 
+# Key derivation is deliberately slow, so it runs on a small dedicated pool (hashlib releases the GIL)
+# instead of the event loop, and requests beyond KDF_MAX_PENDING are turned away rather than queued.
+_kdf_executor = ThreadPoolExecutor(max_workers=settings.KDF_MAX_WORKERS, thread_name_prefix="kdf")
+_kdf_pending = 0
+
+
+async def _run_kdf(func, *args):
+    global _kdf_pending
+    if _kdf_pending >= settings.KDF_MAX_PENDING:
+        raise HTTPException(status_code=503, detail="Too many concurrent sign-in requests", headers={"Retry-After": "1"})
+
+    _kdf_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_kdf_executor, func, *args)
+    finally:
+        _kdf_pending -= 1
+
+
+async def hash_password_async(password: str, iterations: int = ITERATIONS) -> tuple[str, str]:
+    """`hash_password` on the KDF pool, without blocking the event loop"""
+    return await _run_kdf(hash_password, password, iterations)
+
+
+async def verify_password_async(password: str, stored_hash: str, salt: str, iterations: int = ITERATIONS) -> bool:
+    """`verify_password` on the KDF pool, without blocking the event loop"""
+    return await _run_kdf(verify_password, password, stored_hash, salt, iterations)
+
+
 # JWT functions remain the same
 ACCESS_TOKEN_EXPIRE_MINUTES = 120
 ALGORITHM = "HS256"
 
 
+# jose.jwt loads the cryptography backend (~130 ms), so it is imported on first use rather than at startup
 def create_access_token(data: dict) -> str:
+    from jose import jwt
+
     to_encode = data.copy()
     expire = datetime.now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
@@ -59,6 +76,8 @@ def create_access_token(data: dict) -> str:
 
 
 def verify_token(token: str) -> dict:
+    from jose import jwt
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM], options={"verify_exp": True, "verify_aud": True})
         return payload
@@ -0,0 +1,61 @@
+import math
+from typing import Iterable, Optional
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with bounded relative error (the DDSketch bucketing scheme).
+
+    Values are counted in logarithmic buckets, so any quantile is accurate to within RELATIVE_ACCURACY of its
+    true value and two sketches merge by adding bucket counts. Stored as a JSON object of bucket index to count,
+    which the `sketch_merge` SQL function merges in place during rollup upserts.
+    """
+
+    RELATIVE_ACCURACY = 0.01
+    MIN_VALUE = 1e-3  # Smaller values (including 0) share the lowest bucket
+
+    _gamma = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+    _log_gamma = math.log(_gamma)
+
+    def __init__(self, buckets: Optional[dict[int, int]] = None):
+        self.buckets: dict[int, int] = buckets or {}
+
+    @classmethod
+    def of(cls, values: Iterable[float]) -> "QuantileSketch":
+        sketch = cls()
+        for value in values:
+            sketch.add(value)
+        return sketch
+
+    @classmethod
+    def from_json(cls, data: Optional[dict[str, int]]) -> "QuantileSketch":
+        return cls({int(key): count for key, count in (data or {}).items()})
+
+    def to_json(self) -> dict[str, int]:
+        return {str(key): count for key, count in self.buckets.items()}
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def add(self, value: float, count: int = 1) -> None:
+        key = math.ceil(math.log(max(value, self.MIN_VALUE)) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                break
+        # Midpoint of the bucket (gamma^(key-1), gamma^key] in relative terms
+        return 2 * self._gamma**key / (self._gamma + 1)
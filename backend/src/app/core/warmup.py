@@ -0,0 +1,130 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack
+from typing import Awaitable, Callable
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+from sqlalchemy import text
+
+from app.config import settings
+from app.core.llm import LLMClient
+from app.core.redis import RedisClient
+from app.db.session import async_engine
+
+
+def subclasses(cls: type) -> list[type]:
+    found = []
+    for sub in cls.__subclasses__():
+        found.append(sub)
+        found.extend(subclasses(sub))
+    return found
+
+
+async def warm_database(count: int) -> None:
+    """Open `count` pooled connections at once so they stay in the pool for the first requests"""
+    async with AsyncExitStack() as stack:
+        for connection in await asyncio.gather(
+            *(stack.enter_async_context(async_engine.connect()) for _ in range(min(count, settings.DB_POOL_SIZE)))
+        ):
+            await connection.execute(text("SELECT 1"))
+
+
+async def warm_redis(count: int) -> None:
+    """Connect and ping `count` pooled Redis connections"""
+    await RedisClient.get_instance()
+    pool = RedisClient._pool
+    connections = []
+    try:
+        for _ in range(min(count, settings.REDIS_POOL_SIZE)):
+            connections.append(await pool.get_connection("PING"))
+        for connection in connections:
+            await connection.send_command("PING")
+            await connection.read_response()
+    finally:
+        for connection in connections:
+            await pool.release(connection)
+
+
+async def warm_llm() -> None:
+    """
+    Open the keep-alive connection (TCP, TLS and HTTP/2 setup) to the Typhoon API.
+
+    Any HTTP response means the connection is up, so the status is ignored; only transport errors fail.
+    """
+    client = await LLMClient.get_instance()
+    await client.get("/models")
+
+
+def build_validators(app: FastAPI) -> None:
+    """Finish any deferred Pydantic model builds and generate the OpenAPI schema before the first request"""
+    for model in subclasses(BaseModel):
+        if model.__module__.startswith("app.") and not model.__pydantic_complete__:
+            model.model_rebuild()
+    app.openapi()
+
+
+class Warmup:
+    """
+    Startup warmup and readiness state.
+
+    `run` is awaited in the lifespan before the server accepts traffic. A failed required step (database or Redis)
+    keeps /ready at 503 and is retried on the next readiness probe; the LLM priming is best effort.
+    """
+
+    required = ("database", "redis")
+    status: dict[str, str] = {}
+    ready = False
+    stopping = False
+
+    @classmethod
+    def steps(cls) -> dict[str, Callable[[], Awaitable[None]]]:
+        steps = {
+            "database": lambda: warm_database(settings.WARMUP_DB_CONNECTIONS),
+            "redis": lambda: warm_redis(settings.WARMUP_REDIS_CONNECTIONS),
+        }
+        if settings.WARMUP_LLM:
+            steps["llm"] = warm_llm
+        return steps
+
+    @classmethod
+    async def step(cls, name: str, warm: Callable[[], Awaitable[None]]) -> None:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(warm(), settings.WARMUP_TIMEOUT)
+        except Exception as e:
+            cls.status[name] = f"failed: {e!r}"
+            print(f"Warmup of {name} failed: {e!r}")
+        else:
+            cls.status[name] = "ok"
+            print(f"Warmed up {name} in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    @classmethod
+    async def run(cls, app: FastAPI) -> bool:
+        if not settings.WARMUP_ENABLED:
+            cls.ready = True
+            return True
+        build_validators(app)
+        return await cls.warm(list(cls.steps()))
+
+    @classmethod
+    async def warm(cls, names: list[str]) -> bool:
+        steps = cls.steps()
+        await asyncio.gather(*(cls.step(name, steps[name]) for name in names))
+        cls.ready = all(cls.status.get(name) == "ok" for name in cls.required)
+        return cls.ready
+
+    @classmethod
+    async def check(cls) -> bool:
+        """Readiness: warm, and not shutting down. Failed required steps are retried"""
+        if cls.stopping:
+            return False
+        if not cls.ready:
+            await cls.warm([name for name in cls.required if cls.status.get(name) != "ok"])
+        return cls.ready
+
+    @classmethod
+    def stop(cls) -> None:
+        """Report not ready from now on so the load balancer drains this worker before pools close"""
+        cls.stopping = True
+        cls.ready = False
@@ -0,0 +1,33 @@
+"""chat context summary
+
+Revision ID: 3c1e9a7d52b4
+Revises: 76886f3bc776
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c1e9a7d52b4"
+down_revision: Union[str, None] = "76886f3bc776"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("chat_sessions", sa.Column("summary", sa.Text(), nullable=True))
+    op.add_column("chat_sessions", sa.Column("summary_message_id", sa.Integer(), nullable=True))
+    op.add_column("chat_messages", sa.Column("context_tokens", sa.Integer(), server_default="0", nullable=False))
+    op.add_column("chat_messages", sa.Column("context_tokens_saved", sa.Integer(), server_default="0", nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column("chat_messages", "context_tokens_saved")
+    op.drop_column("chat_messages", "context_tokens")
+    op.drop_column("chat_sessions", "summary_message_id")
+    op.drop_column("chat_sessions", "summary")
@@ -0,0 +1,26 @@
+"""chat messages session index
+
+Revision ID: 8f4d2b6e1a93
+Revises: 3c1e9a7d52b4
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8f4d2b6e1a93"
+down_revision: Union[str, None] = "3c1e9a7d52b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_chat_messages_session_id_id", "chat_messages", ["session_id", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chat_messages_session_id_id", table_name="chat_messages")
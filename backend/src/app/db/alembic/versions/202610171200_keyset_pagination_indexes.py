@@ -0,0 +1,26 @@
+"""keyset pagination indexes
+
+Revision ID: b27e5c9f0d41
+Revises: 8f4d2b6e1a93
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b27e5c9f0d41"
+down_revision: Union[str, None] = "8f4d2b6e1a93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_chat_sessions_user_id_updated_at", "chat_sessions", ["user_id", "updated_at", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chat_sessions_user_id_updated_at", table_name="chat_sessions")
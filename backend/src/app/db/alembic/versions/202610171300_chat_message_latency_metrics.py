@@ -0,0 +1,39 @@
+"""chat message latency metrics
+
+Revision ID: 5d8a3f61c2e7
+Revises: b27e5c9f0d41
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5d8a3f61c2e7"
+down_revision: Union[str, None] = "b27e5c9f0d41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("chat_messages", sa.Column("ttft_ms", sa.Float(), nullable=True))
+    op.add_column("chat_messages", sa.Column("itl_p50_ms", sa.Float(), nullable=True))
+    op.add_column("chat_messages", sa.Column("itl_p95_ms", sa.Float(), nullable=True))
+    op.add_column("chat_messages", sa.Column("itl_p99_ms", sa.Float(), nullable=True))
+    op.add_column("chat_messages", sa.Column("itl_max_ms", sa.Float(), nullable=True))
+    op.add_column("chat_messages", sa.Column("prompt_tokens", sa.Integer(), nullable=True))
+    op.add_column("chat_messages", sa.Column("completion_tokens", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("chat_messages", "completion_tokens")
+    op.drop_column("chat_messages", "prompt_tokens")
+    op.drop_column("chat_messages", "itl_max_ms")
+    op.drop_column("chat_messages", "itl_p99_ms")
+    op.drop_column("chat_messages", "itl_p95_ms")
+    op.drop_column("chat_messages", "itl_p50_ms")
+    op.drop_column("chat_messages", "ttft_ms")
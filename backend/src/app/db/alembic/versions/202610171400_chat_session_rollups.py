@@ -0,0 +1,100 @@
+"""chat session rollups
+
+Revision ID: 9e2c7b4a1f36
+Revises: 5d8a3f61c2e7
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9e2c7b4a1f36"
+down_revision: Union[str, None] = "5d8a3f61c2e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = [
+    ("message_count", sa.Integer()),
+    ("assistant_message_count", sa.Integer()),
+    ("total_tokens", sa.Integer()),
+    ("total_tokens_per_second", sa.Integer()),
+    ("total_response_time_ms", sa.Float()),
+    ("total_context_tokens", sa.Integer()),
+    ("total_context_tokens_saved", sa.Integer()),
+    ("total_prompt_tokens", sa.Integer()),
+    ("total_completion_tokens", sa.Integer()),
+    ("total_ttft_ms", sa.Float()),
+    ("ttft_count", sa.Integer()),
+]
+
+
+def upgrade() -> None:
+    for name, type_ in COUNTERS:
+        op.add_column("chat_sessions", sa.Column(name, type_, server_default="0", nullable=False))
+    op.add_column("chat_sessions", sa.Column("max_itl_ms", sa.Float(), nullable=True))
+    op.add_column("chat_sessions", sa.Column("last_message_preview", sa.String(length=200), nullable=True))
+    op.add_column("chat_sessions", sa.Column("last_message_at", sa.DateTime(), nullable=True))
+
+    # Backfill from existing messages
+    op.execute(
+        """
+        UPDATE chat_sessions AS s SET
+            message_count = m.message_count,
+            assistant_message_count = m.assistant_message_count,
+            total_tokens = m.total_tokens,
+            total_tokens_per_second = m.total_tokens_per_second,
+            total_response_time_ms = m.total_response_time_ms,
+            total_context_tokens = m.total_context_tokens,
+            total_context_tokens_saved = m.total_context_tokens_saved,
+            total_prompt_tokens = m.total_prompt_tokens,
+            total_completion_tokens = m.total_completion_tokens,
+            total_ttft_ms = m.total_ttft_ms,
+            ttft_count = m.ttft_count,
+            max_itl_ms = m.max_itl_ms
+        FROM (
+            SELECT
+                session_id,
+                count(*) AS message_count,
+                count(*) FILTER (WHERE sender = 'assistant') AS assistant_message_count,
+                coalesce(sum(tokens), 0) AS total_tokens,
+                coalesce(sum(tokens_per_second), 0) AS total_tokens_per_second,
+                coalesce(sum(response_time_ms), 0) AS total_response_time_ms,
+                coalesce(sum(context_tokens), 0) AS total_context_tokens,
+                coalesce(sum(context_tokens_saved), 0) AS total_context_tokens_saved,
+                coalesce(sum(prompt_tokens), 0) AS total_prompt_tokens,
+                coalesce(sum(completion_tokens), 0) AS total_completion_tokens,
+                coalesce(sum(ttft_ms), 0) AS total_ttft_ms,
+                count(ttft_ms) AS ttft_count,
+                max(itl_max_ms) AS max_itl_ms
+            FROM chat_messages
+            GROUP BY session_id
+        ) AS m
+        WHERE s.id = m.session_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE chat_sessions AS s SET
+            last_message_preview = left(m.content, 200),
+            last_message_at = m.created_at
+        FROM (
+            SELECT DISTINCT ON (session_id) session_id, content, created_at
+            FROM chat_messages
+            ORDER BY session_id, id DESC
+        ) AS m
+        WHERE s.id = m.session_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("chat_sessions", "last_message_at")
+    op.drop_column("chat_sessions", "last_message_preview")
+    op.drop_column("chat_sessions", "max_itl_ms")
+    for name, _ in reversed(COUNTERS):
+        op.drop_column("chat_sessions", name)
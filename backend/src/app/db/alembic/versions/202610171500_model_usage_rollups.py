@@ -0,0 +1,80 @@
+"""model usage rollups
+
+Revision ID: 2a6f9d0b8c15
+Revises: 9e2c7b4a1f36
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "2a6f9d0b8c15"
+down_revision: Union[str, None] = "9e2c7b4a1f36"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("chat_messages", sa.Column("model", sa.String(length=100), nullable=True))
+    op.add_column("chat_messages", sa.Column("max_tokens", sa.Integer(), nullable=True))
+    op.add_column("chat_messages", sa.Column("temperature", sa.Float(), nullable=True))
+    op.add_column("chat_messages", sa.Column("top_p", sa.Float(), nullable=True))
+    op.add_column("chat_messages", sa.Column("top_k", sa.Integer(), nullable=True))
+    op.add_column("chat_messages", sa.Column("repetition_penalty", sa.Float(), nullable=True))
+
+    op.create_table(
+        "model_usage_rollups",
+        sa.Column("model", sa.String(length=100), nullable=False),
+        sa.Column("granularity", sa.String(length=10), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("message_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("prompt_tokens", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("completion_tokens", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("tokens", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("total_tokens_per_second", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("total_response_time_ms", sa.Float(), server_default="0", nullable=False),
+        sa.Column("ttft_ms_sketch", postgresql.JSONB(astext_type=sa.Text()), server_default="{}", nullable=False),
+        sa.Column("response_time_ms_sketch", postgresql.JSONB(astext_type=sa.Text()), server_default="{}", nullable=False),
+        sa.Column("upvotes", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("downvotes", sa.Integer(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("model", "granularity", "bucket_start"),
+    )
+    op.create_index(
+        "ix_model_usage_rollups_granularity_bucket_start", "model_usage_rollups", ["granularity", "bucket_start"], unique=False
+    )
+
+    # Adds QuantileSketch bucket counts, so rollup upserts can merge sketches without reading them first
+    op.execute(
+        """
+        CREATE FUNCTION sketch_merge(a jsonb, b jsonb) RETURNS jsonb
+        LANGUAGE sql IMMUTABLE AS $$
+            SELECT coalesce(jsonb_object_agg(key, total), '{}'::jsonb)
+            FROM (
+                SELECT key, sum(value::bigint) AS total
+                FROM (
+                    SELECT * FROM jsonb_each_text(coalesce(a, '{}'::jsonb))
+                    UNION ALL
+                    SELECT * FROM jsonb_each_text(coalesce(b, '{}'::jsonb))
+                ) AS entries
+                GROUP BY key
+            ) AS merged
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION sketch_merge(jsonb, jsonb)")
+    op.drop_index("ix_model_usage_rollups_granularity_bucket_start", table_name="model_usage_rollups")
+    op.drop_table("model_usage_rollups")
+    op.drop_column("chat_messages", "repetition_penalty")
+    op.drop_column("chat_messages", "top_k")
+    op.drop_column("chat_messages", "top_p")
+    op.drop_column("chat_messages", "temperature")
+    op.drop_column("chat_messages", "max_tokens")
+    op.drop_column("chat_messages", "model")
@@ -0,0 +1,27 @@
+"""chat message cached
+
+Revision ID: 7b3e1c9d4f82
+Revises: 2a6f9d0b8c15
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7b3e1c9d4f82"
+down_revision: Union[str, None] = "2a6f9d0b8c15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("chat_messages", sa.Column("cached", sa.Boolean(), server_default="false", nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column("chat_messages", "cached")
@@ -0,0 +1,31 @@
+"""chat message status
+
+Revision ID: 4c8e2a7f1b63
+Revises: 7b3e1c9d4f82
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4c8e2a7f1b63"
+down_revision: Union[str, None] = "7b3e1c9d4f82"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+message_status = sa.Enum("COMPLETED", "CANCELLED", name="messagestatusenum")
+
+
+def upgrade() -> None:
+    message_status.create(op.get_bind())
+    op.add_column("chat_messages", sa.Column("status", message_status, server_default="COMPLETED", nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column("chat_messages", "status")
+    message_status.drop(op.get_bind())
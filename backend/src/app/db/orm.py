@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import Boolean, ForeignKey, Integer, String, Text, Float, Enum, func
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String, Text, Float, Enum, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 import enum
 
@@ -59,10 +60,28 @@ class ChatSession(Base):
     """
 
     __tablename__ = "chat_sessions"
+    __table_args__ = (Index("ix_chat_sessions_user_id_updated_at", "user_id", "updated_at", "id"),)  # Session list keyset
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("user_accounts.id", ondelete="CASCADE"))
     title: Mapped[str] = mapped_column(String(255), nullable=True)
+    summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # Rolling summary of older turns
+    summary_message_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # Last message folded into summary
+    # Rollups maintained in the same transaction as each message insert (see ChatRepo.update_session_rollups)
+    message_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    assistant_message_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    total_tokens: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    total_tokens_per_second: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    total_response_time_ms: Mapped[float] = mapped_column(Float, default=0, server_default="0")
+    total_context_tokens: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    total_context_tokens_saved: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    total_prompt_tokens: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    total_completion_tokens: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    total_ttft_ms: Mapped[float] = mapped_column(Float, default=0, server_default="0")
+    ttft_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    max_itl_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    last_message_preview: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
+    last_message_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(server_default=func.now(), onupdate=func.now())
 
@@ -73,12 +92,18 @@ class ChatSession(Base):
         return f"<ChatSession(id={self.id!r}, user_id={self.user_id!r})>"
 
 
+class MessageStatusEnum(enum.Enum):
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"  # Stopped early because the client went away; content is partial
+
+
 class ChatMessage(Base):
     """
     Chat message model to store individual messages within a session
     """
 
     __tablename__ = "chat_messages"
+    __table_args__ = (Index("ix_chat_messages_session_id_id", "session_id", "id"),)  # Keyset pagination per session
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     session_id: Mapped[int] = mapped_column(ForeignKey("chat_sessions.id", ondelete="CASCADE"))
@@ -87,6 +112,26 @@ class ChatMessage(Base):
     tokens: Mapped[int] = mapped_column(Integer, default=0)
     tokens_per_second: Mapped[int] = mapped_column(Integer, default=0)
     response_time_ms: Mapped[Float] = mapped_column(Float, nullable=True)
+    context_tokens: Mapped[int] = mapped_column(Integer, default=0)  # Estimated prompt tokens sent upstream
+    context_tokens_saved: Mapped[int] = mapped_column(Integer, default=0)  # Estimated tokens trimmed by summarization
+    ttft_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # Time to first token
+    itl_p50_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # Inter-token latency percentiles
+    itl_p95_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    itl_p99_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    itl_max_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    prompt_tokens: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # Upstream-reported usage
+    completion_tokens: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Generation request, for assistant messages
+    model: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    max_tokens: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    temperature: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    top_p: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    top_k: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    repetition_penalty: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    cached: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")  # Replayed from the response cache
+    status: Mapped[MessageStatusEnum] = mapped_column(
+        Enum(MessageStatusEnum), default=MessageStatusEnum.COMPLETED, server_default=MessageStatusEnum.COMPLETED.name
+    )
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
 
     session: Mapped["ChatSession"] = relationship(back_populates="messages")
@@ -119,3 +164,30 @@ class Feedback(Base):
 
     def __repr__(self) -> str:
         return f"<Feedback(id={self.id!r}, message_id={self.message_id!r}, feedback_type={self.feedback_type!r})>"
+
+
+class ModelUsageRollup(Base):
+    """
+    Generation statistics per model and hour/day bucket, updated incrementally as messages and feedback are
+    written. Latency distributions are stored as mergeable QuantileSketch buckets.
+    """
+
+    __tablename__ = "model_usage_rollups"
+    __table_args__ = (Index("ix_model_usage_rollups_granularity_bucket_start", "granularity", "bucket_start"),)
+
+    model: Mapped[str] = mapped_column(String(100), primary_key=True)
+    granularity: Mapped[str] = mapped_column(String(10), primary_key=True)  # 'hour' or 'day'
+    bucket_start: Mapped[datetime] = mapped_column(primary_key=True)
+    message_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    prompt_tokens: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    completion_tokens: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    tokens: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    total_tokens_per_second: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    total_response_time_ms: Mapped[float] = mapped_column(Float, default=0, server_default="0")
+    ttft_ms_sketch: Mapped[dict] = mapped_column(JSONB, default=dict, server_default="{}")
+    response_time_ms_sketch: Mapped[dict] = mapped_column(JSONB, default=dict, server_default="{}")
+    upvotes: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    downvotes: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    def __repr__(self) -> str:
+        return f"<ModelUsageRollup(model={self.model!r}, granularity={self.granularity!r}, bucket_start={self.bucket_start!r})>"
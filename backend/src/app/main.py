@@ -1,11 +1,52 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
 
+from app.api.analytics.route import router as analytics_router
 from app.api.auth.route import router as auth_router
+from app.api.chat.generation import GenerationStream
 from app.api.chat.route import router as chat_router
+from app.api.chat.writer import ChatMessageWriter
+from app.core.cache import TokenCache
+from app.config import settings
+from app.core.llm import LLMClient
+from app.core.metrics import PoolCollector
+from app.core.principal import PrincipalCache
+from app.core.redis import RedisClient
+from app.core.warmup import Warmup
+from app.db.session import async_engine
 from app.middleware.auth import AuthMiddleware
+from app.middleware.metrics import MetricsMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cross-worker invalidation of the in-process caches
+    listeners = [asyncio.create_task(PrincipalCache.listen()), asyncio.create_task(TokenCache.listen())]
+    await ChatMessageWriter.start()
+    # Open pools and build schemas before the server starts accepting requests
+    await Warmup.run(app)
+    yield
+    Warmup.stop()
+    await GenerationStream.close()
+    # Flush queued chat messages while the database pool is still open
+    await ChatMessageWriter.close()
+    for listener in listeners:
+        listener.cancel()
+        with suppress(asyncio.CancelledError):
+            await listener
+    # Close shared connection pools on shutdown
+    await LLMClient.close()
+    await RedisClient.close()
+    await async_engine.dispose()
 
-app = FastAPI()
+
+# Routes returning CamelModel.response are sent as is; anything else is encoded with orjson
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Add CORS middleware with expanded configuration
 origins = [
@@ -39,24 +80,35 @@ public_paths = [
     "/docs",
     "/openapi.json",
     "/redoc",
+    "/metrics",
+    "/ready",
 ]
 app.add_middleware(AuthMiddleware, public_paths=public_paths)
 
-
-# app.add_event_handler(
-#     "startup",
-#     execute_backend_server_event_handler(backend_app=app),
-# )
-# app.add_event_handler(
-#     "shutdown",
-#     terminate_backend_server_event_handler(backend_app=app),
-# )
+# Outermost, so rejected requests are measured too
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    REGISTRY.register(PoolCollector(async_engine.pool))
 
 app.include_router(router=auth_router)
 app.include_router(router=chat_router)
+app.include_router(router=analytics_router)
 
 
-@app.get("/")
 @app.get("/")
 async def root():
     return {"message": "Welcome to yet-another-fastapi-template"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus exposition; keep this path reachable only from the scraper's network"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/ready", include_in_schema=False)
+async def ready(response: Response):
+    """Readiness probe: 503 until warmup has opened the database and Redis pools, and again once shutdown begins"""
+    if not await Warmup.check():
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"ready": Warmup.ready, "warmup": Warmup.status}
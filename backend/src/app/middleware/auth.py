@@ -1,32 +1,43 @@
 from typing import Sequence
-from fastapi import Request, status
+from fastapi import status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
 from app.core.auth import AuthHandler
 from app.core.cache import TokenCache
 from app.core.exceptions import AuthenticationError
 
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, public_paths: Sequence[str]):
-        super().__init__(app)
+class AuthMiddleware:
+    """
+    Raw ASGI authentication middleware.
+
+    Unlike BaseHTTPMiddleware it never wraps the response: once the request is authenticated the downstream
+    app talks to the server directly, so streaming (SSE) responses are not re-buffered through a task and
+    memory stream.
+    """
+
+    def __init__(self, app: ASGIApp, public_paths: Sequence[str]):
+        self.app = app
         self.public_paths = set(public_paths)
         self.auth_handler = AuthHandler(TokenCache())
 
-    async def dispatch(self, request: Request, call_next):
-        try:
-            if request.method == "OPTIONS" or request.url.path in self.public_paths:
-                return await call_next(request)
-
-            user_id = await self.auth_handler.authenticate(request.headers.get("Authorization"))
-            request.state.user_id = user_id
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in self.public_paths:
+            await self.app(scope, receive, send)
+            return
 
-            return await call_next(request)
+        try:
+            user_id = await self.auth_handler.authenticate(Headers(scope=scope).get("Authorization"))
         except AuthenticationError as e:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": str(e)},
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        except Exception as e:
-            raise e
+            await response(scope, receive, send)
+            return
+
+        # Exposed to handlers as request.state.user_id
+        scope.setdefault("state", {})["user_id"] = user_id
+        await self.app(scope, receive, send)
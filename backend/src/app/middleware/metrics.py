@@ -0,0 +1,44 @@
+import time
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import HTTP_REQUEST_DURATION, SSE_STREAMS_ACTIVE
+
+
+class MetricsMiddleware:
+    """
+    Raw ASGI middleware recording request latency per route template and the number of open SSE streams.
+
+    Latency is measured until the response starts, so streaming responses report their time to first byte
+    rather than the length of the stream. Requests that match no route share one label to bound cardinality.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        streaming = False
+
+        async def send_wrapper(message: Message):
+            nonlocal streaming
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                HTTP_REQUEST_DURATION.labels(
+                    scope["method"], route.path if route is not None else "<unmatched>", message["status"]
+                ).observe(time.perf_counter() - start)
+                if Headers(raw=message["headers"]).get("content-type", "").startswith("text/event-stream"):
+                    streaming = True
+                    SSE_STREAMS_ACTIVE.inc()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if streaming:
+                SSE_STREAMS_ACTIVE.dec()
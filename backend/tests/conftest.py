@@ -1,3 +1,4 @@
+import os
 from typing import AsyncGenerator
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
@@ -5,6 +6,20 @@ from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
 
+# Settings are read when app modules are imported; provide placeholders so they import without a .env
+for key, value in {
+    "SECRET_KEY": "test-secret",
+    "DB_USERNAME": "postgres",
+    "DB_PASSWORD": "password",
+    "DB_HOST": "localhost",
+    "DB_DATABASE": "test",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "TYPHOON_API_URL": "http://localhost/v1",
+    "TYPHOON_API_KEY": "test",
+}.items():
+    os.environ.setdefault(key, value)
+
 
 @pytest.fixture(scope="function")
 async def async_session() -> AsyncGenerator[AsyncSession, None]:
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.core.admission import Admission, Lane, LocalSlots
+from app.core.exceptions import TooManyRequestsError
+
+
+@pytest.fixture(autouse=True)
+def admission(monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(settings, "ADMISSION_SHARED", False)
+    monkeypatch.setattr(settings, "ADMISSION_MODEL_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "ADMISSION_MODEL_LIMITS", {})
+    monkeypatch.setattr(settings, "ADMISSION_USER_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "ADMISSION_BACKGROUND_SHARE", 0.5)
+    monkeypatch.setattr(settings, "ADMISSION_MAX_QUEUE", 10)
+    monkeypatch.setattr(settings, "ADMISSION_MAX_WAIT_MS", 1000)
+    monkeypatch.setattr(settings, "ADMISSION_BACKGROUND_MAX_WAIT_MS", 1000)
+    monkeypatch.setattr(Admission, "_slots", LocalSlots())
+    monkeypatch.setattr(Admission, "_queues", {})
+    monkeypatch.setattr(Admission, "_locks", {})
+    monkeypatch.setattr(Admission, "_hold_seconds", {})
+
+
+async def test_rejects_requests_over_the_user_limit():
+    leases = [await Admission.acquire("m", user_id=1) for _ in range(2)]
+
+    with pytest.raises(TooManyRequestsError) as error:
+        await Admission.acquire("m", user_id=1)
+    assert error.value.status_code == 429
+    assert "Retry-After" in error.value.headers
+
+    await leases[0].release()
+    await (await Admission.acquire("m", user_id=1)).release()
+
+
+async def test_queued_requests_are_admitted_by_lane_then_arrival():
+    held = [await Admission.acquire("m", user_id=user) for user in (1, 2)]
+    order = []
+
+    async def request(name: str, lane: Lane, user_id=None):
+        lease = await Admission.acquire("m", user_id=user_id, lane=lane)
+        order.append(name)
+        return lease
+
+    background = asyncio.create_task(request("background", Lane.BACKGROUND))
+    await asyncio.sleep(0)
+    first = asyncio.create_task(request("first", Lane.INTERACTIVE, 3))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(request("second", Lane.INTERACTIVE, 4))
+    await asyncio.sleep(0)
+    assert order == []
+
+    for lease in held:
+        await lease.release()
+    await asyncio.sleep(0.01)
+    assert order == ["first", "second"]
+
+    await (await first).release()
+    await (await second).release()
+    await (await background).release()
+    assert order == ["first", "second", "background"]
+
+
+async def test_background_lane_only_gets_its_share():
+    lease = await Admission.acquire("m", lane=Lane.BACKGROUND)
+    waiting = asyncio.create_task(Admission.acquire("m", lane=Lane.BACKGROUND))
+    interactive = await asyncio.wait_for(Admission.acquire("m", user_id=1), 0.1)
+
+    assert not waiting.done()
+    await lease.release()
+    await interactive.release()
+    await (await waiting).release()
+
+
+async def test_rejects_early_when_the_expected_wait_is_too_long(monkeypatch):
+    held = [await Admission.acquire("m", user_id=user) for user in (1, 2)]
+    monkeypatch.setattr(Admission, "_hold_seconds", {"m": 5.0})
+
+    with pytest.raises(TooManyRequestsError) as error:
+        await Admission.acquire("m", user_id=3)
+    assert error.value.headers["Retry-After"] == "5"
+
+    for lease in held:
+        await lease.release()
+
+
+async def test_wait_times_out(monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_MAX_WAIT_MS", 20)
+    held = [await Admission.acquire("m", user_id=user) for user in (1, 2)]
+
+    with pytest.raises(TooManyRequestsError):
+        await Admission.acquire("m", user_id=3)
+    assert Admission._queues.get("m", []) == []
+
+    for lease in held:
+        await lease.release()
+
+
+async def test_drained_queues_are_forgotten():
+    held = [await Admission.acquire("m", user_id=user) for user in (1, 2)]
+    waiting = asyncio.create_task(Admission.acquire("m", user_id=3))
+    await asyncio.sleep(0)
+    assert len(Admission._queues["m"]) == 1
+
+    await held[0].release()
+    await (await waiting).release()
+    await held[1].release()
+
+    # Per-model state only exists while requests are waiting
+    assert Admission._queues == {} and Admission._locks == {}
@@ -152,3 +152,34 @@ async def test_delete_not_found(repository):
 
     with pytest.raises(ValueError, match=f"Item with id {non_existent_id} not found"):
         await repository.delete(non_existent_id)
+
+
+async def test_get_page_with_cursor(repository, async_session):
+    async_session.add_all([MockORM(name=f"Item {i:02d}") for i in range(25)])
+    await async_session.commit()
+
+    page1 = await repository.get_page(limit=10)
+    page2 = await repository.get_page(page1.next_cursor, limit=10)
+    page3 = await repository.get_page(page2.next_cursor, limit=10)
+
+    assert [len(page1.items), len(page2.items), len(page3.items)] == [10, 10, 5]
+    assert page3.next_cursor is None
+    ids = [item.id for page in (page1, page2, page3) for item in page.items]
+    assert ids == sorted(ids) and len(set(ids)) == 25
+
+
+async def test_get_page_descending_with_order_by(repository, async_session):
+    async_session.add_all([MockORM(name=name) for name in ["b", "a", "c", "a", "b"]])
+    await async_session.commit()
+
+    page1 = await repository.get_page(limit=3, order_by=[MockORM.name], descending=True)
+    page2 = await repository.get_page(page1.next_cursor, limit=3, order_by=[MockORM.name], descending=True)
+
+    names = [item.name for item in page1.items + page2.items]
+    assert names == ["c", "b", "b", "a", "a"]
+    assert page2.next_cursor is None
+
+
+async def test_get_page_invalid_cursor(repository):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        await repository.get_page("not-a-cursor")
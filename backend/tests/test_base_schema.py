@@ -0,0 +1,36 @@
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Optional
+
+import orjson
+
+from app.core.base_schema import CamelModel
+
+
+class Item(CamelModel):
+    item_id: int
+    created_at: datetime
+    note: Optional[str] = None
+
+
+def test_response_serializes_rows_by_alias():
+    row = SimpleNamespace(item_id=1, created_at=datetime(2026, 1, 2, 3, 4, 5), note="ทดสอบ", ignored=True)
+
+    response = Item.response(row, status_code=201, headers={"X-Next-Cursor": "abc"})
+
+    assert response.status_code == 201
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["x-next-cursor"] == "abc"
+    assert orjson.loads(response.body) == {"itemId": 1, "createdAt": "2026-01-02T03:04:05", "note": "ทดสอบ"}
+
+
+def test_response_serializes_lists_of_rows_dicts_and_instances():
+    created_at = datetime(2026, 1, 1)
+    rows = [
+        SimpleNamespace(item_id=1, created_at=created_at, note=None),
+        {"item_id": 2, "created_at": created_at},
+        Item(item_id=3, created_at=created_at),
+    ]
+
+    assert [item["itemId"] for item in orjson.loads(Item.response(rows).body)] == [1, 2, 3]
+    assert Item.response([]).body == b"[]"
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+from app.core.auth import AuthHandler
+from app.core.cache import LocalCache, ResponseCache, TokenCache
+from app.core.exceptions import InvalidTokenError
+from app.core.security import create_access_token
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_local_cache_expires_entries(monkeypatch):
+    cache = LocalCache(maxsize=10, ttl=60)
+    cache.set("short", 1, ttl=5)
+    cache.set("default", 2)
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+
+    assert cache.get("short") is None
+    assert cache.get("default") == 2
+
+
+class FakeTokenCache:
+    def __init__(self):
+        self.entries: dict[str, dict] = {}
+        self.redis_lookups = 0
+
+    async def get(self, token):
+        self.redis_lookups += 1
+        return self.entries.get(token)
+
+    async def set(self, token, user_id, exp_seconds=3600):
+        self.entries[token] = {"user_id": user_id}
+
+    def set_invalid(self, token):
+        self.entries[token] = {"invalid": True}
+
+
+async def test_authenticate_caches_valid_and_invalid_tokens():
+    cache = FakeTokenCache()
+    handler = AuthHandler(cache)  # type: ignore
+    token = create_access_token({"sub": "42"})
+
+    assert await handler.authenticate(f"Bearer {token}") == 42
+    assert cache.entries[token] == {"user_id": 42}
+
+    with pytest.raises(InvalidTokenError):
+        await handler.authenticate("Bearer not-a-jwt")
+    assert cache.entries["not-a-jwt"] == {"invalid": True}
+
+    # The negative entry answers the retry without decoding again
+    with pytest.raises(InvalidTokenError):
+        await handler.authenticate("Bearer not-a-jwt")
+
+
+def test_token_cache_stats_report_hit_rate():
+    stats = TokenCache.stats()
+    assert {"local_hits", "redis_hits", "negative_hits", "misses", "size", "local_hit_rate"} <= stats.keys()
+
+
+def test_response_cache_key():
+    params = {"max_tokens": 512, "temperature": 0.0}
+    key = ResponseCache.key("typhoon", params, [("human", "What is Typhoon?")])
+
+    assert key == ResponseCache.key("typhoon", dict(reversed(params.items())), [("human", "  What is Typhoon?\n")])
+    assert key != ResponseCache.key("typhoon", {**params, "temperature": 0.1}, [("human", "What is Typhoon?")])
+    assert key != ResponseCache.key("other", params, [("human", "What is Typhoon?")])
+    assert key != ResponseCache.key("typhoon", params, [("ai", "What is Typhoon?")])
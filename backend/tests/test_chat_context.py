@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+from app.api.chat.context import build_context, build_summary_request, estimate_tokens
+
+
+def make_history(count: int, content: str = "x" * 40) -> list[SimpleNamespace]:
+    return [SimpleNamespace(id=i + 1, sender="user" if i % 2 == 0 else "assistant", content=content) for i in range(count)]
+
+
+def test_short_history_is_sent_verbatim():
+    history = make_history(4)
+    context = build_context(history, "hello", budget=1000)
+
+    assert context.messages == [
+        {"role": "user", "content": "x" * 40},
+        {"role": "assistant", "content": "x" * 40},
+        {"role": "user", "content": "x" * 40},
+        {"role": "assistant", "content": "x" * 40},
+        {"role": "user", "content": "hello"},
+    ]
+    assert context.to_fold == []
+    assert context.tokens_saved == 0
+
+
+def test_long_history_keeps_recent_turns_and_folds_older_ones():
+    history = make_history(20)
+    per_message = estimate_tokens("x" * 40)
+    budget = per_message * 8
+
+    context = build_context(history, "hello", budget=budget)
+
+    assert context.prompt_tokens <= budget
+    assert context.messages[-1] == {"role": "user", "content": "hello"}
+    # Newest turns are kept in order
+    assert len(context.messages) > 1
+    assert context.tokens_saved > 0
+    # Folding shrinks the verbatim window to half the budget, oldest first
+    assert context.to_fold[0].id == 1
+    assert sum(estimate_tokens(m.content) for m in history if m.id > context.to_fold[-1].id) <= budget // 2
+
+
+def test_existing_summary_replaces_folded_turns():
+    history = make_history(10)
+
+    context = build_context(history, "hello", budget=1000, summary="earlier stuff", summary_message_id=6)
+
+    assert context.messages[0]["role"] == "system"
+    assert "earlier stuff" in context.messages[0]["content"]
+    # Only turns after the summary are sent verbatim
+    assert len(context.messages) == 1 + 4 + 1
+    assert context.to_fold == []
+
+
+def test_summary_request_lists_the_turns_to_fold():
+    request = build_summary_request("earlier stuff", make_history(2, "hi"))
+
+    assert [m["role"] for m in request] == ["system", "user"]
+    assert "earlier stuff" in request[1]["content"]
+    assert "user: hi\nassistant: hi" in request[1]["content"]
+
+
+def test_legacy_session_backlog_is_folded_in_chunks_that_fit_the_summary_request():
+    # A long session from before summaries existed: no summary, thousands of unsummarized turns
+    history = make_history(2000)
+    per_message = estimate_tokens("x" * 40)
+    budget = per_message * 8
+    fold_budget = per_message * 50
+
+    folded = 0
+    summary, summary_message_id = None, None
+    while True:
+        context = build_context(
+            history, "hello", budget=budget, summary=summary, summary_message_id=summary_message_id, fold_budget=fold_budget
+        )
+        if not context.to_fold:
+            break
+        request = build_summary_request(summary, context.to_fold)
+        assert sum(estimate_tokens(m["content"]) for m in request) <= fold_budget
+        # Oldest turns first, continuing where the previous fold stopped
+        assert context.to_fold[0].id == folded + 1
+        folded = context.to_fold[-1].id
+        summary, summary_message_id = "s" * 40, folded
+
+    assert context.prompt_tokens <= budget
+    assert folded > 1900
+
+
+def test_nothing_past_a_gap_in_the_history_is_folded():
+    # The oldest and newest turns of a long backlog, without the ones in between
+    history = [m for m in make_history(100) if m.id <= 10 or m.id > 90]
+    per_message = estimate_tokens("x" * 40)
+
+    context = build_context(history, "hello", budget=per_message * 8, fold_budget=per_message * 50, fold_through_id=10)
+
+    assert [m.id for m in context.to_fold] == list(range(1, 11))
+    assert context.messages[-2]["content"] == "x" * 40 and len(context.messages) <= 9
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+import orjson
+
+from app.api.chat.export import history_lines
+from app.api.chat.repo import HISTORY_FIELDS
+from app.db import orm
+
+NOW = datetime(2026, 1, 1)
+
+
+def row(session_id: int, message_id: int | None = None, feedback: bool = False) -> tuple:
+    session = {
+        "id": session_id,
+        "user_id": 1,
+        "title": "t",
+        "created_at": NOW,
+        "updated_at": NOW,
+        "message_count": 0,
+        "last_message_preview": None,
+        "last_message_at": None,
+    }
+    message = {
+        "id": message_id,
+        "session_id": session_id,
+        "content": "hi",
+        "sender": "user",
+        "tokens": 0,
+        "tokens_per_second": 0,
+        "response_time_ms": None,
+        "model": None,
+        "cached": False,
+        "status": orm.MessageStatusEnum.COMPLETED,
+        "created_at": NOW,
+    }
+    feedback_row = {
+        "id": 9 if feedback else None,
+        "message_id": message_id,
+        "created_at": NOW,
+        "feedback_type": orm.FeedbackTypeEnum.UPVOTE if feedback else None,
+    }
+    return tuple(values[name] for values, names in zip((session, message, feedback_row), HISTORY_FIELDS) for name in names)
+
+
+def test_history_lines_emit_each_session_once_across_batches():
+    first, session_id = history_lines([row(1, 10), row(1, 11, feedback=True)], None)
+    second, session_id = history_lines([row(1, 12), row(2)], session_id)
+
+    records = [orjson.loads(line) for line in first + second]
+    assert [(r["type"], r["id"]) for r in records] == [
+        ("session", 1),
+        ("message", 10),
+        ("message", 11),
+        ("message", 12),
+        ("session", 2),
+    ]
+    assert records[2]["feedback"]["feedbackType"] == "upvote"
+    assert records[1]["feedback"] is None
+    assert session_id == 2
@@ -0,0 +1,35 @@
+import time
+
+from app.api.chat.latency import LatencyTracker, percentile
+
+
+def test_percentile_matches_percentile_cont():
+    values = [10.0, 20.0, 30.0, 40.0]
+    assert percentile(values, 0.5) == 25.0
+    assert percentile(values, 0.0) == 10.0
+    assert percentile(values, 1.0) == 40.0
+    assert percentile([5.0], 0.99) == 5.0
+    assert percentile([], 0.5) is None
+
+
+def test_latency_tracker(monkeypatch):
+    clock = iter([0.0, 0.2, 0.25, 0.3, 0.8, 1.0])
+    monkeypatch.setattr(time, "perf_counter", lambda: next(clock))
+
+    latency = LatencyTracker()
+    for _ in range(4):
+        latency.chunk()
+    summary = latency.summary()
+
+    assert latency.chunks == 4
+    assert summary["ttft_ms"] == 200.0
+    assert summary["response_time_ms"] == 1000.0
+    assert round(summary["itl_p50_ms"], 6) == 50.0
+    assert round(summary["itl_max_ms"], 6) == 500.0
+
+
+def test_latency_tracker_without_chunks():
+    summary = LatencyTracker().summary()
+    assert summary["ttft_ms"] is None
+    assert summary["itl_p50_ms"] is None
+    assert summary["itl_max_ms"] is None
@@ -0,0 +1,68 @@
+import httpx
+import orjson
+import pytest
+
+from app.core.llm import LLMClient, UpstreamError
+
+
+def sse(*chunks: dict) -> bytes:
+    return b"".join(b"data: " + orjson.dumps(chunk) + b"\n\n" for chunk in chunks) + b"data: [DONE]\n\n"
+
+
+def delta(content: str) -> dict:
+    return {"choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}]}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    requests = []
+
+    def use(body: bytes, status_code: int = 200, split: int = 0):
+        async def stream():
+            # Split the body at arbitrary offsets to exercise reassembly of lines across reads
+            step = split or len(body)
+            for start in range(0, len(body), step):
+                yield body[start : start + step]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(orjson.loads(request.content))
+            return httpx.Response(status_code, content=stream())
+
+        client = httpx.AsyncClient(base_url="http://upstream/v1", transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(LLMClient, "_instance", client)
+        return requests
+
+    return use
+
+
+async def test_stream_chat_yields_deltas_and_usage(upstream):
+    body = sse(
+        delta("สวัส"),
+        delta("ดี"),
+        {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]},
+        {"choices": [], "usage": {"prompt_tokens": 7, "completion_tokens": 2, "total_tokens": 9}},
+    )
+    requests = upstream(body, split=5)
+    usage: dict = {}
+
+    chunks = [text async for text in LLMClient.stream_chat("m", [{"role": "user", "content": "hi"}], usage, top_k=40)]
+
+    assert chunks == ["สวัส", "ดี"]
+    assert usage == {"input_tokens": 7, "output_tokens": 2, "total_tokens": 9}
+    assert requests[0]["stream"] is True
+    assert requests[0]["top_k"] == 40
+
+
+async def test_stream_chat_raises_on_upstream_errors(upstream):
+    upstream(b'{"error": "overloaded"}', status_code=503)
+    with pytest.raises(UpstreamError) as error:
+        [text async for text in LLMClient.stream_chat("m", [])]
+    assert error.value.status_code == 503
+
+    upstream(sse(delta("a"), {"error": {"message": "boom"}}))
+    with pytest.raises(UpstreamError, match="boom"):
+        [text async for text in LLMClient.stream_chat("m", [])]
+
+    upstream(sse(delta("a"), {"error": "model overloaded"}))
+    with pytest.raises(UpstreamError, match="model overloaded"):
+        [text async for text in LLMClient.stream_chat("m", [])]
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.api.chat.schema import ChatMessageCreate
+from app.core.metrics import PoolCollector
+from app.core.redis import RedisClient
+from app.middleware.metrics import MetricsMiddleware
+
+
+def request_count(method: str, route: str, status: str) -> float:
+    labels = {"method": method, "route": route, "status": status}
+    return REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) or 0
+
+
+def active_streams() -> float:
+    return REGISTRY.get_sample_value("sse_streams_active")
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/stream")
+    async def stream():
+        async def generate():
+            # The stream is open while its body is being produced
+            yield f"data: {active_streams()}\n\n"
+
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    return app
+
+
+def test_request_latency_is_labelled_by_route_template():
+    client = TestClient(build_app())
+    before = request_count("GET", "/items/{item_id}", "200")
+    unmatched = request_count("GET", "<unmatched>", "404")
+
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+
+    assert request_count("GET", "/items/{item_id}", "200") == before + 2
+    assert request_count("GET", "<unmatched>", "404") == unmatched + 1
+
+
+def test_active_sse_streams_gauge():
+    client = TestClient(build_app())
+    before = active_streams()
+
+    response = client.get("/stream")
+
+    assert response.text == f"data: {before + 1}\n\n"
+    assert active_streams() == before
+
+
+def test_unknown_models_are_rejected_before_they_become_labels():
+    app = FastAPI()
+
+    @app.post("/chat")
+    async def chat(data: ChatMessageCreate):
+        return {"model": data.model}
+
+    client = TestClient(app)
+    assert client.post("/chat", json={"content": "hi", "model": "typhoon-v2-8b-instruct"}).status_code == 200
+    assert client.post("/chat", json={"content": "hi", "model": "x" * 40}).status_code == 422
+
+
+def test_pool_collector_skips_redis_stats_it_cannot_read(monkeypatch):
+    # A redis-py pool without the private connection lists the in-use and idle gauges are read from
+    monkeypatch.setattr(RedisClient, "_pool", SimpleNamespace(max_connections=10))
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=AsyncAdaptedQueuePool)
+
+    names = [metric.name for metric in PoolCollector(engine.sync_engine.pool).collect()]
+
+    assert "redis_pool_max" in names
+    assert "redis_pool_in_use" not in names and "redis_pool_available" not in names
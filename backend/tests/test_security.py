@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.security import hash_password, hash_password_async, verify_password, verify_password_async
+
+
+def test_verify_password_uses_stored_iterations():
+    password_hash, salt = hash_password("secret", iterations=1000)
+
+    assert verify_password("secret", password_hash, salt, iterations=1000)
+    assert not verify_password("secret", password_hash, salt, iterations=2000)
+    assert not verify_password("wrong", password_hash, salt, iterations=1000)
+
+
+async def test_async_hashing_round_trip():
+    password_hash, salt = await hash_password_async("secret", iterations=1000)
+
+    assert await verify_password_async("secret", password_hash, salt, iterations=1000)
+
+
+async def test_kdf_admission_limit(monkeypatch):
+    monkeypatch.setattr(security.settings, "KDF_MAX_PENDING", 2)
+
+    results = await asyncio.gather(
+        *(verify_password_async("secret", "x", "00" * 16, iterations=200000) for _ in range(4)), return_exceptions=True
+    )
+
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 2
+    assert rejected[0].status_code == 503
+    assert security._kdf_pending == 0
+
+
+def test_hash_matches_previous_pbkdf2_implementation():
+    cryptography = pytest.importorskip("cryptography.hazmat.primitives.kdf.pbkdf2")
+    from cryptography.hazmat.primitives import hashes
+    import base64
+
+    kdf = cryptography.PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=bytes.fromhex("ab" * 16), iterations=1000)
+    previous = base64.b64encode(kdf.derive(b"secret")).decode()
+
+    assert verify_password("secret", previous, "ab" * 16, iterations=1000)
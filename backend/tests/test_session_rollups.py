@@ -0,0 +1,40 @@
+from app.api.chat.repo import LAST_MESSAGE_PREVIEW_LENGTH, session_rollups
+
+
+def test_session_rollups_fold_rows_per_session():
+    rows = [
+        {"session_id": 1, "sender": "user", "content": "question", "tokens": 0},
+        {
+            "session_id": 1,
+            "sender": "assistant",
+            "content": "answer",
+            "tokens": 12,
+            "tokens_per_second": 40,
+            "response_time_ms": 300.0,
+            "prompt_tokens": 20,
+            "completion_tokens": 12,
+            "ttft_ms": 120.0,
+            "itl_max_ms": 35.0,
+        },
+        {"session_id": 2, "sender": "user", "content": "x" * 500},
+    ]
+
+    first, second = session_rollups(rows)
+
+    assert first["session"] == 1
+    assert first["messages"] == 2
+    assert first["assistant_messages"] == 1
+    assert first["tokens"] == 12
+    assert first["response_time_ms"] == 300.0
+    assert first["prompt_tokens"] == 20
+    assert first["ttft_ms"] == 120.0
+    assert first["ttft_messages"] == 1
+    assert first["itl_max_ms"] == 35.0
+    assert first["preview"] == "answer"
+
+    assert second["session"] == 2
+    assert second["messages"] == 1
+    assert second["assistant_messages"] == 0
+    assert second["ttft_messages"] == 0
+    assert second["itl_max_ms"] is None
+    assert len(second["preview"]) == LAST_MESSAGE_PREVIEW_LENGTH
@@ -0,0 +1,86 @@
+import asyncio
+
+from app.api.chat.single_flight import SingleFlight
+
+
+class Upstream:
+    def __init__(self, *chunks: str):
+        self.chunks = chunks
+        self.calls = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def generate(self, usage: dict):
+        self.calls += 1
+        try:
+            for i, chunk in enumerate(self.chunks):
+                if i == 1:
+                    # Hold the stream after the first chunk until the test lets it continue
+                    await self.release.wait()
+                yield chunk
+            usage["output_tokens"] = len(self.chunks)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+async def collect(subscription) -> list[str]:
+    return [text async for text in subscription]
+
+
+async def test_identical_requests_share_one_upstream_stream():
+    upstream = Upstream("a", "b", "c")
+    first = await SingleFlight.join("key", upstream.generate)
+    second = await SingleFlight.join("key", upstream.generate)
+    upstream.release.set()
+
+    results = await asyncio.gather(collect(first), collect(second))
+
+    assert results == [["a", "b", "c"], ["a", "b", "c"]]
+    assert upstream.calls == 1
+    assert (first.owner, second.owner) == (True, False)
+    assert second.usage == {"output_tokens": 3}
+    assert "key" not in SingleFlight._flights
+
+
+async def test_late_joiner_replays_the_prefix():
+    upstream = Upstream("a", "b", "c")
+    first = await SingleFlight.join("key", upstream.generate)
+    iterator = first.__aiter__()
+    assert await anext(iterator) == "a"
+
+    late = await SingleFlight.join("key", upstream.generate)
+    upstream.release.set()
+
+    assert await collect(late) == ["a", "b", "c"]
+    assert [text async for text in iterator] == ["b", "c"]
+    assert upstream.calls == 1
+
+
+async def test_upstream_is_cancelled_when_every_subscriber_leaves():
+    upstream = Upstream("a", "b", "c")
+    first = await SingleFlight.join("key", upstream.generate)
+    second = await SingleFlight.join("key", upstream.generate)
+    iterators = [first.__aiter__(), second.__aiter__()]
+    for iterator in iterators:
+        assert await anext(iterator) == "a"
+
+    await iterators[0].aclose()
+    await asyncio.sleep(0)
+    assert not upstream.cancelled
+
+    await iterators[1].aclose()
+    await asyncio.sleep(0.01)
+    assert upstream.cancelled
+    assert "key" not in SingleFlight._flights
+
+
+async def test_errors_reach_every_subscriber():
+    async def failing(usage: dict):
+        yield "a"
+        raise RuntimeError("upstream failed")
+
+    subscriptions = [await SingleFlight.join("key", failing) for _ in range(2)]
+    results = await asyncio.gather(*(collect(s) for s in subscriptions), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,50 @@
+import random
+from datetime import datetime
+
+from app.api.analytics.repo import bucket_start, generation_rollups
+from app.core.sketch import QuantileSketch
+
+
+def test_quantiles_within_relative_accuracy():
+    rng = random.Random(7)
+    values = sorted(rng.lognormvariate(5, 1) for _ in range(10000))
+    sketch = QuantileSketch.of(values)
+
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) / exact <= QuantileSketch.RELATIVE_ACCURACY
+
+
+def test_merged_sketches_match_a_single_sketch():
+    values = [float(v) for v in range(1, 1001)]
+    merged = QuantileSketch.of(values[:300]).merge(QuantileSketch.of(values[300:]))
+    single = QuantileSketch.of(values)
+
+    assert merged.buckets == single.buckets
+    assert QuantileSketch.from_json(merged.to_json()).quantile(0.95) == single.quantile(0.95)
+
+
+def test_empty_sketch():
+    assert QuantileSketch().quantile(0.5) is None
+    assert QuantileSketch.of([0.0]).count == 1
+
+
+def test_generation_rollups_per_model_and_granularity():
+    now = datetime(2026, 10, 17, 13, 42, 5)
+    rows = [
+        {"sender": "user", "content": "hi"},
+        {"sender": "assistant", "model": "a", "tokens": 10, "response_time_ms": 200.0, "ttft_ms": 50.0},
+        {"sender": "assistant", "model": "a", "tokens": 5, "response_time_ms": 100.0, "ttft_ms": None},
+        {"sender": "assistant", "model": "b", "tokens": 1, "response_time_ms": 10.0, "ttft_ms": 5.0},
+    ]
+
+    rollups = {(r["model"], r["granularity"]): r for r in generation_rollups(rows, now)}
+
+    assert set(rollups) == {("a", "hour"), ("a", "day"), ("b", "hour"), ("b", "day")}
+    assert rollups["a", "hour"]["bucket_start"] == datetime(2026, 10, 17, 13)
+    assert rollups["a", "day"]["bucket_start"] == datetime(2026, 10, 17)
+    assert rollups["a", "hour"]["message_count"] == 2
+    assert rollups["a", "hour"]["tokens"] == 15
+    assert QuantileSketch.from_json(rollups["a", "hour"]["ttft_ms_sketch"]).count == 1
+    assert QuantileSketch.from_json(rollups["a", "hour"]["response_time_ms_sketch"]).count == 2
+    assert bucket_start(now, "day") == datetime(2026, 10, 17)
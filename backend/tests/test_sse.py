@@ -0,0 +1,61 @@
+import asyncio
+
+import orjson
+
+from app.api.chat.sse import coalesce, encode_event, replay
+
+
+async def stream(*chunks: str, gap: float = 0):
+    for chunk in chunks:
+        if gap:
+            await asyncio.sleep(gap)
+        yield chunk
+
+
+async def collect(chunks, max_bytes: int, max_delay: float) -> list[str]:
+    return [text async for text in coalesce(chunks, max_bytes, max_delay)]
+
+
+def test_encode_event():
+    assert encode_event({"content": "สวัสดี"}) == b"data: " + orjson.dumps({"content": "สวัสดี"}) + b"\n\n"
+    assert encode_event({"error": "boom"}, event="error") == b'event: error\ndata: {"error":"boom"}\n\n'
+    assert encode_event({}, event="done", event_id="1-0") == b"id: 1-0\nevent: done\ndata: {}\n\n"
+
+
+async def test_coalesce_passes_first_chunk_through_and_merges_the_rest():
+    frames = await collect(stream("a", "b", "c", "d"), max_bytes=1024, max_delay=10)
+    assert frames == ["a", "bcd"]
+
+
+async def test_coalesce_flushes_on_size():
+    frames = await collect(stream("first", "aa", "bb", "cc", "d"), max_bytes=4, max_delay=10)
+    assert frames == ["first", "aabb", "ccd"]
+
+
+async def test_coalesce_flushes_on_deadline_while_upstream_is_silent():
+    async def stalled():
+        yield "first"
+        yield "a"
+        await asyncio.sleep(0.2)
+        yield "b"
+
+    frames = await collect(stalled(), max_bytes=1024, max_delay=0.02)
+    assert frames == ["first", "a", "b"]
+
+
+async def test_coalesce_disabled():
+    frames = await collect(stream("a", "b", "c"), max_bytes=1024, max_delay=0)
+    assert frames == ["a", "b", "c"]
+
+
+async def test_coalesce_keeps_all_text():
+    chunks = [f"token {i} " for i in range(200)]
+    frames = await collect(stream(*chunks, gap=0.001), max_bytes=64, max_delay=0.005)
+    assert "".join(frames) == "".join(chunks)
+    assert len(frames) < len(chunks)
+
+
+async def test_replay_splits_text_into_chunks():
+    frames = [text async for text in replay("abcdefghij", chunk_chars=4, interval=0.001)]
+    assert frames == ["abcd", "efgh", "ij"]
+    assert [text async for text in replay("abcdefghij", chunk_chars=4, interval=0)] == ["abcdefghij"]
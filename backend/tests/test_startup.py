@@ -0,0 +1,13 @@
+import os
+import subprocess
+import sys
+
+# Heavy dependencies that must not load when a worker starts (jose.jwt is imported on first use)
+LAZY_MODULES = ["langchain", "langchain_core", "langchain_openai", "jose.jwt"]
+
+
+def test_app_import_does_not_load_lazy_dependencies():
+    code = f"import sys, app.main; print([m for m in {LAZY_MODULES!r} if m in sys.modules])"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,79 @@
+"""
+The Postgres-built transcript must match the Pydantic serialization of the same session.
+
+Needs TEST_DATABASE_URL, like test_query_plans; the database is dropped and recreated from the ORM metadata.
+"""
+
+import os
+from datetime import datetime
+
+import orjson
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.db.orm as orm
+from app.api.chat.repo import ChatRepo
+from app.api.chat.schema import ChatSessionMessagesResponse
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+def parse_times(value):
+    """Postgres drops trailing zeros from fractional seconds; compare timestamps as datetimes"""
+    if isinstance(value, dict):
+        return {key: datetime.fromisoformat(item) if key.endswith("At") else parse_times(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [parse_times(item) for item in value]
+    return value
+
+
+@pytest.fixture(scope="function")
+async def pg_session():
+    engine = create_async_engine(TEST_DATABASE_URL)  # type: ignore
+
+    async with engine.begin() as conn:
+        await conn.run_sync(orm.Base.metadata.drop_all)
+        await conn.run_sync(orm.Base.metadata.create_all)
+
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        yield session
+
+    async with engine.begin() as conn:
+        await conn.run_sync(orm.Base.metadata.drop_all)
+    await engine.dispose()
+
+
+async def test_session_json_matches_orm_serialization(pg_session):
+    user = orm.UserAccount(email="a@example.com", hashed_password="x", password_salt="x")
+    chat = orm.ChatSession(user=user, title='ทดสอบ "quotes"')
+    question = orm.ChatMessage(session=chat, sender="user", content="สวัสดี\n")
+    answer = orm.ChatMessage(
+        session=chat,
+        sender="assistant",
+        content="Hi",
+        tokens=3,
+        tokens_per_second=12,
+        response_time_ms=250.5,
+        model="typhoon-v1.5-instruct",
+        status=orm.MessageStatusEnum.CANCELLED,
+    )
+    answer.feedback = orm.Feedback(feedback_type=orm.FeedbackTypeEnum.DOWNVOTE)
+    empty = orm.ChatSession(user=user, title="Empty")
+    pg_session.add_all([question, answer, empty])
+    await pg_session.commit()
+
+    user_id, session_ids = user.id, (chat.id, empty.id)
+    pg_session.expunge_all()
+
+    repo = ChatRepo(pg_session)
+    for session_id in session_ids:
+        transcript = orjson.loads(await repo.get_session_json(session_id, user_id))
+        expected = ChatSessionMessagesResponse.model_validate(await repo.get_session(session_id, user_id))
+        assert parse_times(transcript) == parse_times(expected.model_dump(mode="json", by_alias=True))
+
+    with pytest.raises(HTTPException) as error:
+        await repo.get_session_json(session_ids[0], user_id + 1)
+    assert error.value.status_code == 404
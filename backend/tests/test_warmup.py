@@ -0,0 +1,51 @@
+import pytest
+
+from app.config import settings
+from app.core.warmup import Warmup
+
+
+@pytest.fixture
+def steps(monkeypatch):
+    calls = []
+    failing = set()
+
+    def step(name):
+        async def warm():
+            calls.append(name)
+            if name in failing:
+                raise ConnectionError(name)
+
+        return warm
+
+    monkeypatch.setattr(Warmup, "status", {})
+    monkeypatch.setattr(Warmup, "ready", False)
+    monkeypatch.setattr(Warmup, "stopping", False)
+    monkeypatch.setattr(settings, "WARMUP_ENABLED", True)
+    monkeypatch.setattr(Warmup, "steps", classmethod(lambda cls: {n: step(n) for n in ("database", "redis", "llm")}))
+    return calls, failing
+
+
+async def test_failed_required_step_is_retried_by_readiness(steps):
+    calls, failing = steps
+    failing.add("database")
+
+    assert not await Warmup.warm(["database", "redis", "llm"])
+    assert Warmup.status["redis"] == "ok"
+    assert Warmup.status["database"].startswith("failed")
+
+    failing.clear()
+    calls.clear()
+    assert await Warmup.check()
+    assert calls == ["database"]
+
+
+async def test_llm_priming_is_best_effort(steps):
+    _, failing = steps
+    failing.add("llm")
+    assert await Warmup.warm(["database", "redis", "llm"])
+
+
+async def test_not_ready_once_stopping(steps):
+    assert await Warmup.warm(["database", "redis"])
+    Warmup.stop()
+    assert not await Warmup.check()
@@ -0,0 +1,29 @@
+import asyncio
+
+from app.api.chat.writer import ChatMessageWriter
+from app.config import settings
+
+
+async def test_close_flushes_the_batch_in_progress_and_the_queue(monkeypatch):
+    flushed = []
+    flushing = asyncio.Event()
+
+    async def flush(rows):
+        flushing.set()
+        await asyncio.sleep(0.05)
+        flushed.extend(row["content"] for row in rows)
+
+    monkeypatch.setattr(settings, "CHAT_WRITE_MODE", "batched")
+    monkeypatch.setattr(settings, "CHAT_WRITE_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "CHAT_WRITE_MAX_DELAY_MS", 1)
+    monkeypatch.setattr(ChatMessageWriter, "_flush", staticmethod(flush))
+    await ChatMessageWriter.start()
+
+    writes = [asyncio.create_task(ChatMessageWriter.write(1, str(i), "user")) for i in range(5)]
+    await flushing.wait()
+    await ChatMessageWriter.close()
+
+    # Every waiting write resolved, including the rows dequeued when close was called
+    await asyncio.wait_for(asyncio.gather(*writes), 1)
+    assert sorted(flushed) == ["0", "1", "2", "3", "4"]
+    assert ChatMessageWriter._task is None and ChatMessageWriter._queue is None
@@ -11,6 +11,81 @@ import type {
 import { apiClient, BASE_URL } from '@/utils/api-client';
 import { useAuthStore } from '../store/auth';
 
+const MAX_RESUME_ATTEMPTS = 3;
+
+interface StreamState {
+  generationId?: string;
+  lastEventId?: string;
+}
+
+const authHeaders = () => {
+  const token = useAuthStore.getState().token;
+  return token ? { Authorization: `Bearer ${token}` } : {};
+};
+
+// Reads SSE frames from a stream response. Returns true once the server has
+// ended the generation, false if the connection closed before that.
+async function readEvents(
+  response: Response,
+  state: StreamState,
+  onChunk: (chunk: string) => void,
+  onError: (error: string) => void
+): Promise<boolean> {
+  const reader = response.body?.getReader();
+  if (!reader) {
+    throw new Error('No readable stream available');
+  }
+
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  try {
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) return false;
+
+      // Frames end with a blank line and may be split across reads
+      buffer += decoder.decode(value, { stream: true });
+      const frames = buffer.split('\n\n');
+      buffer = frames.pop() ?? '';
+
+      for (const frame of frames) {
+        let event = 'message';
+        let data = '';
+        for (const line of frame.split('\n')) {
+          if (line.startsWith('id: ')) {
+            state.lastEventId = line.slice(4);
+          } else if (line.startsWith('event: ')) {
+            event = line.slice(7);
+          } else if (line.startsWith('data: ')) {
+            data += line.slice(6);
+          }
+        }
+        // Keep-alive comments carry no data
+        if (!data) continue;
+
+        try {
+          const payload = JSON.parse(data);
+          if (event === 'generation') {
+            state.generationId = payload.generationId;
+          } else if (event === 'error') {
+            onError(payload.error);
+            return true;
+          } else if (event === 'done') {
+            return true;
+          } else {
+            onChunk(payload.content);
+          }
+        } catch (e) {
+          console.error('Error parsing chunk:', e);
+        }
+      }
+    }
+  } finally {
+    reader.releaseLock();
+  }
+}
+
 export const chatService = {
   getSessions: async (
     skip = 0,
@@ -51,59 +126,44 @@ export const chatService = {
     onChunk: (chunk: string) => void,
     onError: (error: string) => void
   ): Promise<void> => {
-    const response = await fetch(
+    let response = await fetch(
       `${BASE_URL}/chat/sessions/${sessionId}/stream`,
       {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
-          ...(useAuthStore.getState().token && {
-            Authorization: `Bearer ${useAuthStore.getState().token}`,
-          }),
+          ...authHeaders(),
         },
         body: JSON.stringify(data),
       }
     );
 
-    if (!response.ok) {
-      throw new Error(`HTTP error! status: ${response.status}`);
-    }
+    const state: StreamState = {};
+    for (let attempt = 0; ; attempt++) {
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
 
-    const reader = response.body?.getReader();
-    if (!reader) {
-      throw new Error('No readable stream available');
-    }
+      let finished = false;
+      try {
+        finished = await readEvents(response, state, onChunk, onError);
+      } catch (e) {
+        if (!state.generationId || attempt >= MAX_RESUME_ATTEMPTS) throw e;
+      }
+      if (finished || !state.generationId || attempt >= MAX_RESUME_ATTEMPTS) {
+        return;
+      }
 
-    const decoder = new TextDecoder();
-
-    try {
-      while (true) {
-        const { done, value } = await reader.read();
-        if (done) break;
-
-        // Decode chunk and parse SSE format
-        const text = decoder.decode(value);
-        const lines = text.split('\n\n');
-
-        for (const line of lines) {
-          if (!line) continue;
-
-          if (line.startsWith('data: ')) {
-            try {
-              const data = JSON.parse(line.slice(6));
-              onChunk(data.content);
-            } catch (e) {
-              console.error('Error parsing chunk:', e);
-            }
-          } else if (line.startsWith('event: error')) {
-            const errorData = JSON.parse(line.slice(line.indexOf('{')));
-            onError(errorData.error);
-            break;
-          }
+      // The connection dropped mid-generation; continue after the last event received
+      response = await fetch(
+        `${BASE_URL}/chat/generations/${state.generationId}/stream`,
+        {
+          headers: {
+            ...authHeaders(),
+            ...(state.lastEventId ? { 'Last-Event-ID': state.lastEventId } : {}),
+          },
         }
-      }
-    } finally {
-      reader.releaseLock();
+      );
     }
   },
 